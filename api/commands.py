@@ -10,6 +10,7 @@ import uuid
 import click
 import qdrant_client
 from qdrant_client.http.models import TextIndexParams, TextIndexType, TokenizerType
+from sqlalchemy.dialects.postgresql import insert
 from tqdm import tqdm
 from flask import current_app, Flask
 from langchain.embeddings import OpenAIEmbeddings
@@ -17,9 +18,12 @@ from werkzeug.exceptions import NotFound
 
 from core.embedding.cached_embedding import CacheEmbedding
 from core.index.index import IndexBuilder
+from core.index.keyword_table_index.keyword_table_cache import get_keyword_table_cache
+from core.index.keyword_table_index.keyword_table_index import SetEncoder
 from core.model_providers.model_factory import ModelFactory
 from core.model_providers.models.embedding.openai_embedding import OpenAIEmbedding
 from core.model_providers.models.entity.model_params import ModelType
+from core.model_providers.provider_usage_accounting import ProviderUsageAccounting
 from core.model_providers.providers.hosted import hosted_model_providers
 from core.model_providers.providers.openai_provider import OpenAIProvider
 from libs.password import password_pattern, valid_password, hash_password
@@ -27,12 +31,14 @@ from libs.helper import email as email_validate
 from extensions.ext_database import db
 from libs.rsa import generate_key_pair
 from models.account import InvitationCode, Tenant, TenantAccountJoin
-from models.dataset import Dataset, DatasetQuery, Document, DatasetCollectionBinding
+from models.dataset import Dataset, DatasetQuery, Document, DatasetCollectionBinding, Embedding, \
+    DatasetKeywordTable, DatasetKeywordPosting
 from models.model import Account, AppModelConfig, App
 import secrets
 import base64
 
 from models.provider import Provider, ProviderType, ProviderQuotaType, ProviderModel
+from services.dataset_counter_service import DatasetCounterService
 
 
 @click.command('reset-password', help='Reset the account password.')
@@ -277,6 +283,9 @@ def sync_anthropic_hosted_providers():
     click.echo(click.style('Start sync anthropic hosted providers.', fg='green'))
     count = 0
 
+    # scale the used quota with the deltas not flushed yet
+    ProviderUsageAccounting.flush(blocking=True)
+
     new_quota_limit = hosted_model_providers.anthropic.quota_limit
 
     page = 1
@@ -303,6 +312,7 @@ def sync_anthropic_hosted_providers():
                     else original_quota_limit * division
                 provider.quota_used = division * provider.quota_used
                 db.session.commit()
+                ProviderUsageAccounting.invalidate_quota(provider.id)
 
                 count += 1
             except Exception as e:
@@ -752,6 +762,149 @@ def migrate_default_input_to_dataset_query_variable(batch_size):
             pbar.update(len(data_batch))
 
 
+@click.command('migrate-embedding-storage-format', help='Migrate pickled embeddings to the compact binary format.')
+@click.option("--batch-size", default=1000, help="Number of records to migrate in each batch.")
+@click.option("--dtype", default='float32', type=click.Choice(['float32', 'float16']),
+              help="Storage precision of the migrated embeddings.")
+def migrate_embedding_storage_format(batch_size, dtype):
+    click.secho("Start migrate embeddings to the compact binary format.", fg='green')
+
+    migrated_count = 0
+    last_id = None
+    while True:
+        query = db.session.query(Embedding.id, Embedding.embedding).order_by(Embedding.id)
+        if last_id:
+            query = query.filter(Embedding.id > last_id)
+        data_batch = query.limit(batch_size).all()
+
+        if not data_batch:
+            break
+
+        last_id = data_batch[-1].id
+        try:
+            update_mappings = [
+                {
+                    'id': data.id,
+                    'embedding': Embedding.encode_embedding(Embedding.decode_embedding(data.embedding).tolist(), dtype)
+                }
+                for data in data_batch if not Embedding.is_compact_format(data.embedding)
+            ]
+
+            if update_mappings:
+                db.session.bulk_update_mappings(Embedding, update_mappings)
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            click.secho(f"Error while migrating embeddings: {e}, last embedding id: {last_id}", fg='red')
+            continue
+
+        migrated_count += len(update_mappings)
+        click.secho(f"Migrated {migrated_count} embeddings, last embedding id: {last_id}.", fg='green')
+
+    click.secho(f"Congratulations! Migrated {migrated_count} embeddings.", fg='green')
+
+
+@click.command('migrate-keyword-table-to-inverted-index',
+               help='Migrate the json keyword tables of datasets to the inverted index storage.')
+@click.option("--batch-size", default=1000, help="Number of postings to insert in each batch.")
+def migrate_keyword_table_to_inverted_index(batch_size):
+    click.secho("Start migrate keyword tables to the inverted index storage.", fg='green')
+
+    dataset_keyword_table_ids = [row.id for row in db.session.query(DatasetKeywordTable.id).filter(
+        DatasetKeywordTable.storage_type == 'json'
+    ).all()]
+
+    migrated_count = 0
+    for dataset_keyword_table_id in tqdm(dataset_keyword_table_ids, desc="Migrating Keyword Tables"):
+        try:
+            # lock the keyword table row while its json table is converted to postings
+            dataset_keyword_table = db.session.query(DatasetKeywordTable).filter(
+                DatasetKeywordTable.id == dataset_keyword_table_id,
+                DatasetKeywordTable.storage_type == 'json'
+            ).with_for_update().first()
+            if not dataset_keyword_table:
+                db.session.rollback()
+                continue
+
+            keyword_table_dict = dataset_keyword_table.keyword_table_dict
+            keyword_table = keyword_table_dict['__data__']['table'] if keyword_table_dict else {}
+            postings = [
+                {
+                    'dataset_id': dataset_keyword_table.dataset_id,
+                    'keyword': keyword,
+                    'index_node_id': node_idx
+                }
+                for keyword, node_idxs in keyword_table.items() if len(keyword) <= 255
+                for node_idx in node_idxs
+            ]
+
+            for i in range(0, len(postings), batch_size):
+                db.session.execute(
+                    insert(DatasetKeywordPosting).values(postings[i:i + batch_size])
+                    .on_conflict_do_nothing(index_elements=['dataset_id', 'keyword', 'index_node_id'])
+                )
+
+            dataset_keyword_table.storage_type = 'inverted_index'
+            dataset_keyword_table.keyword_table = json.dumps({
+                '__type__': 'keyword_table',
+                '__data__': {
+                    "index_id": dataset_keyword_table.dataset_id,
+                    "summary": None,
+                    "table": {}
+                }
+            }, cls=SetEncoder)
+            db.session.commit()
+            get_keyword_table_cache().invalidate(dataset_keyword_table.dataset_id)
+            migrated_count += 1
+        except Exception as e:
+            db.session.rollback()
+            click.secho(f"Error while migrating keyword table {dataset_keyword_table_id}: {e}", fg='red')
+            continue
+
+    click.secho(f"Congratulations! Migrated {migrated_count} keyword tables.", fg='green')
+
+
+@click.command('reconcile-dataset-counters', help='Recompute the app, document, segment and word counters of datasets.')
+@click.option("--batch-size", default=100, help="Number of datasets to recompute in each batch.")
+def reconcile_dataset_counters(batch_size):
+    click.secho("Start reconcile dataset counters.", fg='green')
+
+    reconciled_count = 0
+    last_id = None
+    while True:
+        query = db.session.query(Dataset.id).order_by(Dataset.id)
+        if last_id:
+            query = query.filter(Dataset.id > last_id)
+        dataset_ids = [row.id for row in query.limit(batch_size).all()]
+
+        if not dataset_ids:
+            break
+
+        last_id = dataset_ids[-1]
+        try:
+            DatasetCounterService.refresh_counters(dataset_ids)
+        except Exception as e:
+            db.session.rollback()
+            click.secho(f"Error while reconciling dataset counters: {e}, last dataset id: {last_id}", fg='red')
+            continue
+
+        reconciled_count += len(dataset_ids)
+        click.secho(f"Reconciled {reconciled_count} datasets, last dataset id: {last_id}.", fg='green')
+
+    click.secho(f"Congratulations! Reconciled counters of {reconciled_count} datasets.", fg='green')
+
+
+@click.command('reconcile-provider-usage',
+               help='Flush the quota used and the last used times of model providers accumulated in redis.')
+def reconcile_provider_usage():
+    click.secho("Start reconcile provider usage.", fg='green')
+
+    quota_count, last_used_count = ProviderUsageAccounting.reconcile()
+
+    click.secho(f"Congratulations! Flushed {quota_count} provider quota deltas "
+                f"and {last_used_count} last used times.", fg='green')
+
+
 def register_commands(app):
     app.cli.add_command(reset_password)
     app.cli.add_command(reset_email)
@@ -766,3 +919,7 @@ def register_commands(app):
     app.cli.add_command(normalization_collections)
     app.cli.add_command(migrate_default_input_to_dataset_query_variable)
     app.cli.add_command(add_qdrant_full_text_index)
+    app.cli.add_command(migrate_embedding_storage_format)
+    app.cli.add_command(migrate_keyword_table_to_inverted_index)
+    app.cli.add_command(reconcile_dataset_counters)
+    app.cli.add_command(reconcile_provider_usage)
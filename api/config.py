@@ -38,6 +38,34 @@ DEFAULTS = {
     'SENTRY_PROFILES_SAMPLE_RATE': 1.0,
     'WEAVIATE_GRPC_ENABLED': 'True',
     'WEAVIATE_BATCH_SIZE': 100,
+    'QUERY_EMBEDDING_CACHE_SIZE': 10000,
+    'QUERY_EMBEDDING_CACHE_REDIS_TTL': 86400,
+    'RSA_DECRYPTION_CACHE_SIZE': 1000,
+    'RSA_DECRYPTION_CACHE_TTL': 120,
+    'INDEXING_EMBEDDING_MAX_WORKERS': 4,
+    'INDEXING_EMBEDDING_BATCH_SIZE': 100,
+    'INDEXING_STREAMING_ENABLED': 'False',
+    'DOCUMENT_PROGRESS_CACHE_TTL': 30,
+    'KEYWORD_TABLE_STORAGE_TYPE': 'json',
+    'KEYWORD_TABLE_CACHE_SIZE': 100,
+    'RETRIEVAL_MAX_WORKERS': 16,
+    'RETRIEVAL_TIMEOUT': 30,
+    'STREAM_TEXT_FLUSH_INTERVAL_MS': 30,
+    'STREAM_TEXT_FLUSH_SIZE': 64,
+    'STREAM_STOP_CHECK_INTERVAL_MS': 500,
+    'GENERATION_MAX_WORKERS': 100,
+    'GENERATION_MAX_QUEUE_SIZE': 200,
+    'GENERATION_TIMEOUT': 600,
+    'GENERATION_PING_INTERVAL': 10,
+    'GENERATION_TRANSPORT': 'local',
+    'APP_STATISTIC_ROLLUP_INTERVAL': 600,
+    'APP_STATISTIC_ROLLUP_LOOKBACK_HOURS': 24,
+    'PROVIDER_USAGE_FLUSH_INTERVAL': 60,
+    'PROVIDER_QUOTA_CACHE_TTL': 60,
+    'API_TOKEN_CACHE_TTL': 60,
+    'API_TOKEN_LAST_USED_FLUSH_INTERVAL': 60,
+    'WEB_APP_SESSION_CACHE_SIZE': 10000,
+    'WEB_APP_SESSION_CACHE_TTL': 300,
     'CELERY_BACKEND': 'database',
     'LOG_LEVEL': 'INFO',
     'HOSTED_OPENAI_QUOTA_LIMIT': 200,
@@ -213,6 +241,14 @@ class Config:
         self.WEAVIATE_GRPC_ENABLED = get_bool_env('WEAVIATE_GRPC_ENABLED')
         self.WEAVIATE_BATCH_SIZE = int(get_env('WEAVIATE_BATCH_SIZE'))
 
+        # query embedding cache settings
+        self.QUERY_EMBEDDING_CACHE_SIZE = int(get_env('QUERY_EMBEDDING_CACHE_SIZE'))
+        self.QUERY_EMBEDDING_CACHE_REDIS_TTL = int(get_env('QUERY_EMBEDDING_CACHE_REDIS_TTL'))
+
+        # in-process cache of the parsed private keys of tenants and the credentials decrypted with them
+        self.RSA_DECRYPTION_CACHE_SIZE = int(get_env('RSA_DECRYPTION_CACHE_SIZE'))
+        self.RSA_DECRYPTION_CACHE_TTL = int(get_env('RSA_DECRYPTION_CACHE_TTL'))
+
         # ------------------------
         # Mail Configurations.
         # ------------------------
@@ -243,6 +279,71 @@ class Config:
         self.TENANT_DOCUMENT_COUNT = get_env('TENANT_DOCUMENT_COUNT')
         self.CLEAN_DAY_SETTING = get_env('CLEAN_DAY_SETTING')
 
+        # Indexing Configurations.
+        # embedding worker count and chunk size of the indexing pipeline,
+        # INDEXING_EMBEDDING_PROVIDER_SETTINGS overrides them per provider, e.g. `openai:8:200,xinference:2:32`
+        self.INDEXING_EMBEDDING_MAX_WORKERS = int(get_env('INDEXING_EMBEDDING_MAX_WORKERS'))
+        self.INDEXING_EMBEDDING_BATCH_SIZE = int(get_env('INDEXING_EMBEDDING_BATCH_SIZE'))
+        self.INDEXING_EMBEDDING_PROVIDER_SETTINGS = get_env('INDEXING_EMBEDDING_PROVIDER_SETTINGS')
+        # load, split and index documents as a stream in chunks of INDEXING_EMBEDDING_BATCH_SIZE segments
+        self.INDEXING_STREAMING_ENABLED = get_bool_env('INDEXING_STREAMING_ENABLED')
+        # seconds the segment progress of a document polled by the indexing status endpoints is cached in redis
+        self.DOCUMENT_PROGRESS_CACHE_TTL = int(get_env('DOCUMENT_PROGRESS_CACHE_TTL'))
+
+        # keyword table storage of new economy datasets, support: json, inverted_index
+        self.KEYWORD_TABLE_STORAGE_TYPE = get_env('KEYWORD_TABLE_STORAGE_TYPE')
+        # max number of parsed json keyword tables cached in each process
+        self.KEYWORD_TABLE_CACHE_SIZE = int(get_env('KEYWORD_TABLE_CACHE_SIZE'))
+
+        # Retrieval Configurations.
+        # size of the process-wide retrieval thread pool and seconds to wait for the searches of a request,
+        # RETRIEVAL_DB_CONCURRENCY caps the searches holding a db connection, defaults to half of the pool size
+        self.RETRIEVAL_MAX_WORKERS = int(get_env('RETRIEVAL_MAX_WORKERS'))
+        self.RETRIEVAL_DB_CONCURRENCY = get_env('RETRIEVAL_DB_CONCURRENCY')
+        self.RETRIEVAL_TIMEOUT = float(get_env('RETRIEVAL_TIMEOUT'))
+
+        # Streaming Configurations.
+        # streamed tokens are published once per flush interval or once the buffered text reaches the flush size,
+        # the stop flag of a generation is checked at most once per stop check interval
+        self.STREAM_TEXT_FLUSH_INTERVAL_MS = int(get_env('STREAM_TEXT_FLUSH_INTERVAL_MS'))
+        self.STREAM_TEXT_FLUSH_SIZE = int(get_env('STREAM_TEXT_FLUSH_SIZE'))
+        self.STREAM_STOP_CHECK_INTERVAL_MS = int(get_env('STREAM_STOP_CHECK_INTERVAL_MS'))
+
+        # Generation Configurations.
+        # completions run on a pool of GENERATION_MAX_WORKERS workers, requests are rejected once
+        # GENERATION_MAX_QUEUE_SIZE completions are waiting, generations are stopped after GENERATION_TIMEOUT seconds
+        self.GENERATION_MAX_WORKERS = int(get_env('GENERATION_MAX_WORKERS'))
+        self.GENERATION_MAX_QUEUE_SIZE = int(get_env('GENERATION_MAX_QUEUE_SIZE'))
+        self.GENERATION_TIMEOUT = float(get_env('GENERATION_TIMEOUT'))
+        self.GENERATION_PING_INTERVAL = float(get_env('GENERATION_PING_INTERVAL'))
+        # transport of the generation events to the response, support: local, redis
+        # local passes them through an in-memory queue, redis through redis pub/sub
+        self.GENERATION_TRANSPORT = get_env('GENERATION_TRANSPORT')
+
+        # App Statistic Configurations.
+        # seconds between the rollups of the messages into the hourly app statistics,
+        # each rollup also recomputes the last APP_STATISTIC_ROLLUP_LOOKBACK_HOURS hours for late answers and feedbacks
+        self.APP_STATISTIC_ROLLUP_INTERVAL = int(get_env('APP_STATISTIC_ROLLUP_INTERVAL'))
+        self.APP_STATISTIC_ROLLUP_LOOKBACK_HOURS = int(get_env('APP_STATISTIC_ROLLUP_LOOKBACK_HOURS'))
+
+        # Provider Usage Configurations.
+        # seconds between the flushes of the quota used and the last used times of model providers from redis,
+        # and seconds the quota snapshots of providers checked before each LLM call are cached in redis
+        self.PROVIDER_USAGE_FLUSH_INTERVAL = int(get_env('PROVIDER_USAGE_FLUSH_INTERVAL'))
+        self.PROVIDER_QUOTA_CACHE_TTL = int(get_env('PROVIDER_QUOTA_CACHE_TTL'))
+
+        # Service API Token Configurations.
+        # API tokens are cached in redis for API_TOKEN_CACHE_TTL seconds, deleting a token drops its entry
+        self.API_TOKEN_CACHE_TTL = int(get_env('API_TOKEN_CACHE_TTL'))
+        # seconds between the flushes of the last used times of API tokens from redis
+        self.API_TOKEN_LAST_USED_FLUSH_INTERVAL = int(get_env('API_TOKEN_LAST_USED_FLUSH_INTERVAL'))
+
+        # Web App Session Configurations.
+        # in-process cache of the app, site and end user resolved from the jwt of web app requests,
+        # editing the app, its model config or its site invalidates the entries of the app in every process
+        self.WEB_APP_SESSION_CACHE_SIZE = int(get_env('WEB_APP_SESSION_CACHE_SIZE'))
+        self.WEB_APP_SESSION_CACHE_TTL = int(get_env('WEB_APP_SESSION_CACHE_TTL'))
+
         # File upload Configurations.
         self.UPLOAD_FILE_SIZE_LIMIT = int(get_env('UPLOAD_FILE_SIZE_LIMIT'))
         self.UPLOAD_FILE_BATCH_LIMIT = int(get_env('UPLOAD_FILE_BATCH_LIMIT'))
@@ -10,6 +10,7 @@ from controllers.console.wraps import only_edition_cloud
 from extensions.ext_database import db
 from libs.helper import supported_language
 from models.model import RecommendedApp, App, InstalledApp
+from services.web_app_session_service import WebAppSessionService
 
 
 def admin_required(view):
@@ -87,6 +88,7 @@ class InsertExploreAppListApi(Resource):
 
             app.is_public = True
             db.session.commit()
+            WebAppSessionService.invalidate(app.id)
 
             return {'result': 'success'}, 201
         else:
@@ -100,6 +102,7 @@ class InsertExploreAppListApi(Resource):
             app.is_public = True
 
             db.session.commit()
+            WebAppSessionService.invalidate(app.id)
 
             return {'result': 'success'}, 200
 
@@ -126,6 +129,7 @@ class InsertExploreAppApi(Resource):
 
         db.session.delete(recommended_app)
         db.session.commit()
+        WebAppSessionService.invalidate(recommended_app.app_id)
 
         return {'result': 'success'}, 204
 
@@ -7,6 +7,7 @@ from werkzeug.exceptions import Forbidden
 from extensions.ext_database import db
 from models.model import App, ApiToken
 from models.dataset import Dataset
+from services.api_token_service import ApiTokenService
 
 from . import api
 from .setup import setup_required
@@ -115,6 +116,7 @@ class BaseApiKeyResource(Resource):
 
         db.session.query(ApiToken).filter(ApiToken.id == api_key_id).delete()
         db.session.commit()
+        ApiTokenService.invalidate(key)
 
         return {'result': 'success'}, 204
 
@@ -22,6 +22,7 @@ from fields.app_fields import app_pagination_fields, app_detail_fields, template
 from extensions.ext_database import db
 from models.model import App, AppModelConfig, Site
 from services.app_model_config_service import AppModelConfigService
+from services.web_app_session_service import WebAppSessionService
 
 
 def _get_app(app_id, tenant_id):
@@ -171,6 +172,7 @@ class AppListApi(Resource):
 
         db.session.add(site)
         db.session.commit()
+        WebAppSessionService.invalidate(app.id)
 
         app_was_created.send(app)
 
@@ -222,6 +224,7 @@ class AppApi(Resource):
 
         db.session.delete(app)
         db.session.commit()
+        WebAppSessionService.invalidate(app.id)
 
         # todo delete related data??
         # model_config, site, api_token, conversation, message, message_feedback, message_annotation
@@ -247,6 +250,7 @@ class AppNameApi(Resource):
         app.name = args.get('name')
         app.updated_at = datetime.utcnow()
         db.session.commit()
+        WebAppSessionService.invalidate(app.id)
         return app
 
 
@@ -268,6 +272,7 @@ class AppIconApi(Resource):
         app.icon_background = args.get('icon_background')
         app.updated_at = datetime.utcnow()
         db.session.commit()
+        WebAppSessionService.invalidate(app.id)
 
         return app
 
@@ -292,6 +297,7 @@ class AppSiteStatus(Resource):
         app.enable_site = args.get('enable_site')
         app.updated_at = datetime.utcnow()
         db.session.commit()
+        WebAppSessionService.invalidate(app.id)
         return app
 
 
@@ -314,6 +320,7 @@ class AppApiStatus(Resource):
         app.enable_api = args.get('enable_api')
         app.updated_at = datetime.utcnow()
         db.session.commit()
+        WebAppSessionService.invalidate(app.id)
         return app
 
 
@@ -362,6 +369,7 @@ class AppCopy(Resource):
             db.session.commit()
             copy_app.app_model_config_id = copy_app_model_config.id
         db.session.commit()
+        WebAppSessionService.invalidate(copy_app.id)
 
         return copy_app, 201
 
@@ -13,7 +13,7 @@ from controllers.console import api
 from controllers.console.app import _get_app
 from controllers.console.app.error import ConversationCompletedError, AppUnavailableError, \
     ProviderNotInitializeError, CompletionRequestError, ProviderQuotaExceededError, \
-    ProviderModelCurrentlyNotSupportError
+    ProviderModelCurrentlyNotSupportError, CompletionQueueFullError
 from controllers.console.setup import setup_required
 from controllers.console.wraps import account_initialization_required
 from core.conversation_message_task import PubHandler
@@ -78,6 +78,8 @@ class CompletionMessageApi(Resource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception as e:
@@ -154,6 +156,8 @@ class ChatMessageApi(Resource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception as e:
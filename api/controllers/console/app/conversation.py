@@ -18,6 +18,7 @@ from fields.conversation_fields import conversation_pagination_fields, conversat
 from libs.helper import datetime_string
 from extensions.ext_database import db
 from models.model import Message, MessageAnnotation, Conversation
+from services.conversation_hydrator import ConversationHydrator
 
 
 class CompletionConversationApi(Resource):
@@ -94,6 +95,8 @@ class CompletionConversationApi(Resource):
             error_out=False
         )
 
+        ConversationHydrator.hydrate(conversations.items, app)
+
         return conversations
 
 
@@ -216,6 +219,8 @@ class ChatConversationApi(Resource):
             error_out=False
         )
 
+        ConversationHydrator.hydrate(conversations.items, app)
+
         return conversations
 
 
@@ -8,10 +8,12 @@ from flask_restful import Resource, reqparse, marshal_with, fields
 from flask_restful.inputs import int_range
 from werkzeug.exceptions import InternalServerError, NotFound
 
+import services
 from controllers.console import api
 from controllers.console.app import _get_app
 from controllers.console.app.error import CompletionRequestError, ProviderNotInitializeError, \
-    AppMoreLikeThisDisabledError, ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError
+    AppMoreLikeThisDisabledError, ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, \
+    CompletionQueueFullError
 from controllers.console.setup import setup_required
 from controllers.console.wraps import account_initialization_required
 from core.model_providers.error import LLMRateLimitError, LLMBadRequestError, LLMAuthorizationError, LLMAPIConnectionError, \
@@ -242,6 +244,8 @@ class MessageMoreLikeThisApi(Resource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception as e:
@@ -13,6 +13,7 @@ from events.app_event import app_model_config_was_updated
 from extensions.ext_database import db
 from models.model import AppModelConfig
 from services.app_model_config_service import AppModelConfigService
+from services.web_app_session_service import WebAppSessionService
 
 
 class ModelConfigResource(Resource):
@@ -44,6 +45,7 @@ class ModelConfigResource(Resource):
 
         app_model.app_model_config_id = new_app_model_config.id
         db.session.commit()
+        WebAppSessionService.invalidate(app_model.id)
 
         app_model_config_was_updated.send(
             app_model,
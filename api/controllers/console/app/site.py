@@ -12,6 +12,7 @@ from fields.app_fields import app_site_fields
 from libs.helper import supported_language
 from extensions.ext_database import db
 from models.model import Site
+from services.web_app_session_service import WebAppSessionService
 
 
 def parse_app_site_args():
@@ -74,6 +75,7 @@ class AppSite(Resource):
                     app_model.icon_background = value
 
         db.session.commit()
+        WebAppSessionService.invalidate(app_model.id)
 
         return site
 
@@ -99,6 +101,7 @@ class AppSiteAccessTokenReset(Resource):
 
         site.code = Site.generate_code(16)
         db.session.commit()
+        WebAppSessionService.invalidate(app_model.id)
 
         return site
 
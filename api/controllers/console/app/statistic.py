@@ -14,6 +14,7 @@ from controllers.console.setup import setup_required
 from controllers.console.wraps import account_initialization_required
 from libs.helper import datetime_string
 from extensions.ext_database import db
+from services.app_statistic_service import AppStatisticService
 
 
 class DailyConversationStatistic(Resource):
@@ -31,15 +32,10 @@ class DailyConversationStatistic(Resource):
         parser.add_argument('end', type=datetime_string('%Y-%m-%d %H:%M'), location='args')
         args = parser.parse_args()
 
-        sql_query = '''
-        SELECT date(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date, count(distinct messages.conversation_id) AS conversation_count
-            FROM messages where app_id = :app_id 
-        '''
-        arg_dict = {'tz': account.timezone, 'app_id': app_model.id}
-
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
 
+        start_datetime_utc = None
         if args['start']:
             start_datetime = datetime.strptime(args['start'], '%Y-%m-%d %H:%M')
             start_datetime = start_datetime.replace(second=0)
@@ -47,9 +43,7 @@ class DailyConversationStatistic(Resource):
             start_datetime_timezone = timezone.localize(start_datetime)
             start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at >= :start'
-            arg_dict['start'] = start_datetime_utc
-
+        end_datetime_utc = None
         if args['end']:
             end_datetime = datetime.strptime(args['end'], '%Y-%m-%d %H:%M')
             end_datetime = end_datetime.replace(second=0)
@@ -57,20 +51,22 @@ class DailyConversationStatistic(Resource):
             end_datetime_timezone = timezone.localize(end_datetime)
             end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at < :end'
-            arg_dict['end'] = end_datetime_utc
-
-        sql_query += ' GROUP BY date order by date'
+        rs = AppStatisticService.get_daily_statistics(
+            app_id=app_model.id,
+            timezone=account.timezone,
+            start=start_datetime_utc,
+            end=end_datetime_utc,
+            table='app_hourly_conversations',
+            columns=['conversation_id'],
+            aggregates='COUNT(DISTINCT t.conversation_id) AS conversation_count'
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({
-                    'date': str(i.date),
-                    'conversation_count': i.conversation_count
-                })
+        for i in rs:
+            response_data.append({
+                'date': str(i.date),
+                'conversation_count': i.conversation_count
+            })
 
         return jsonify({
             'data': response_data
@@ -92,15 +88,10 @@ class DailyTerminalsStatistic(Resource):
         parser.add_argument('end', type=datetime_string('%Y-%m-%d %H:%M'), location='args')
         args = parser.parse_args()
 
-        sql_query = '''
-                SELECT date(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date, count(distinct messages.from_end_user_id) AS terminal_count
-                    FROM messages where app_id = :app_id 
-                '''
-        arg_dict = {'tz': account.timezone, 'app_id': app_model.id}
-
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
 
+        start_datetime_utc = None
         if args['start']:
             start_datetime = datetime.strptime(args['start'], '%Y-%m-%d %H:%M')
             start_datetime = start_datetime.replace(second=0)
@@ -108,9 +99,7 @@ class DailyTerminalsStatistic(Resource):
             start_datetime_timezone = timezone.localize(start_datetime)
             start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at >= :start'
-            arg_dict['start'] = start_datetime_utc
-
+        end_datetime_utc = None
         if args['end']:
             end_datetime = datetime.strptime(args['end'], '%Y-%m-%d %H:%M')
             end_datetime = end_datetime.replace(second=0)
@@ -118,20 +107,22 @@ class DailyTerminalsStatistic(Resource):
             end_datetime_timezone = timezone.localize(end_datetime)
             end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at < :end'
-            arg_dict['end'] = end_datetime_utc
-
-        sql_query += ' GROUP BY date order by date'
+        rs = AppStatisticService.get_daily_statistics(
+            app_id=app_model.id,
+            timezone=account.timezone,
+            start=start_datetime_utc,
+            end=end_datetime_utc,
+            table='app_hourly_conversations',
+            columns=['from_end_user_id'],
+            aggregates='COUNT(DISTINCT t.from_end_user_id) AS terminal_count'
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)            
-            for i in rs:
-                response_data.append({
-                    'date': str(i.date),
-                    'terminal_count': i.terminal_count
-                })
+        for i in rs:
+            response_data.append({
+                'date': str(i.date),
+                'terminal_count': i.terminal_count
+            })
 
         return jsonify({
             'data': response_data
@@ -152,17 +143,10 @@ class DailyTokenCostStatistic(Resource):
         parser.add_argument('end', type=datetime_string('%Y-%m-%d %H:%M'), location='args')
         args = parser.parse_args()
 
-        sql_query = '''
-                SELECT date(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date, 
-                    (sum(messages.message_tokens) + sum(messages.answer_tokens)) as token_count,
-                    sum(total_price) as total_price
-                    FROM messages where app_id = :app_id 
-                '''
-        arg_dict = {'tz': account.timezone, 'app_id': app_model.id}
-
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
 
+        start_datetime_utc = None
         if args['start']:
             start_datetime = datetime.strptime(args['start'], '%Y-%m-%d %H:%M')
             start_datetime = start_datetime.replace(second=0)
@@ -170,9 +154,7 @@ class DailyTokenCostStatistic(Resource):
             start_datetime_timezone = timezone.localize(start_datetime)
             start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at >= :start'
-            arg_dict['start'] = start_datetime_utc
-
+        end_datetime_utc = None
         if args['end']:
             end_datetime = datetime.strptime(args['end'], '%Y-%m-%d %H:%M')
             end_datetime = end_datetime.replace(second=0)
@@ -180,22 +162,25 @@ class DailyTokenCostStatistic(Resource):
             end_datetime_timezone = timezone.localize(end_datetime)
             end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at < :end'
-            arg_dict['end'] = end_datetime_utc
-
-        sql_query += ' GROUP BY date order by date'
+        rs = AppStatisticService.get_daily_statistics(
+            app_id=app_model.id,
+            timezone=account.timezone,
+            start=start_datetime_utc,
+            end=end_datetime_utc,
+            table='app_hourly_statistics',
+            columns=['message_tokens', 'answer_tokens', 'total_price'],
+            aggregates='CAST(SUM(t.message_tokens) + SUM(t.answer_tokens) AS BIGINT) AS token_count, '
+                       'SUM(t.total_price) AS total_price'
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({
-                    'date': str(i.date),
-                    'token_count': i.token_count,
-                    'total_price': i.total_price,
-                    'currency': 'USD'
-                })
+        for i in rs:
+            response_data.append({
+                'date': str(i.date),
+                'token_count': i.token_count,
+                'total_price': i.total_price,
+                'currency': 'USD'
+            })
 
         return jsonify({
             'data': response_data
@@ -282,18 +267,10 @@ class UserSatisfactionRateStatistic(Resource):
         parser.add_argument('end', type=datetime_string('%Y-%m-%d %H:%M'), location='args')
         args = parser.parse_args()
 
-        sql_query = '''
-                        SELECT date(DATE_TRUNC('day', m.created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date, 
-                            COUNT(m.id) as message_count, COUNT(mf.id) as feedback_count 
-                            FROM messages m
-                            LEFT JOIN message_feedbacks mf on mf.message_id=m.id
-                            WHERE m.app_id = :app_id 
-                        '''
-        arg_dict = {'tz': account.timezone, 'app_id': app_model.id}
-
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
 
+        start_datetime_utc = None
         if args['start']:
             start_datetime = datetime.strptime(args['start'], '%Y-%m-%d %H:%M')
             start_datetime = start_datetime.replace(second=0)
@@ -301,9 +278,7 @@ class UserSatisfactionRateStatistic(Resource):
             start_datetime_timezone = timezone.localize(start_datetime)
             start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and m.created_at >= :start'
-            arg_dict['start'] = start_datetime_utc
-
+        end_datetime_utc = None
         if args['end']:
             end_datetime = datetime.strptime(args['end'], '%Y-%m-%d %H:%M')
             end_datetime = end_datetime.replace(second=0)
@@ -311,20 +286,22 @@ class UserSatisfactionRateStatistic(Resource):
             end_datetime_timezone = timezone.localize(end_datetime)
             end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and m.created_at < :end'
-            arg_dict['end'] = end_datetime_utc
-
-        sql_query += ' GROUP BY date order by date'
+        rs = AppStatisticService.get_daily_statistics(
+            app_id=app_model.id,
+            timezone=account.timezone,
+            start=start_datetime_utc,
+            end=end_datetime_utc,
+            table='app_hourly_statistics',
+            columns=['message_count', 'feedback_count'],
+            aggregates='SUM(t.message_count) AS message_count, CAST(SUM(t.feedback_count) AS BIGINT) AS feedback_count'
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({
-                    'date': str(i.date),
-                    'rate': round((i.feedback_count * 1000 / i.message_count) if i.message_count > 0 else 0, 2),
-                })
+        for i in rs:
+            response_data.append({
+                'date': str(i.date),
+                'rate': round((i.feedback_count * 1000 / i.message_count) if i.message_count > 0 else 0, 2),
+            })
 
         return jsonify({
             'data': response_data
@@ -345,17 +322,10 @@ class AverageResponseTimeStatistic(Resource):
         parser.add_argument('end', type=datetime_string('%Y-%m-%d %H:%M'), location='args')
         args = parser.parse_args()
 
-        sql_query = '''
-                SELECT date(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date, 
-                    AVG(provider_response_latency) as latency
-                    FROM messages
-                    WHERE app_id = :app_id
-                '''
-        arg_dict = {'tz': account.timezone, 'app_id': app_model.id}
-
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
 
+        start_datetime_utc = None
         if args['start']:
             start_datetime = datetime.strptime(args['start'], '%Y-%m-%d %H:%M')
             start_datetime = start_datetime.replace(second=0)
@@ -363,9 +333,7 @@ class AverageResponseTimeStatistic(Resource):
             start_datetime_timezone = timezone.localize(start_datetime)
             start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at >= :start'
-            arg_dict['start'] = start_datetime_utc
-
+        end_datetime_utc = None
         if args['end']:
             end_datetime = datetime.strptime(args['end'], '%Y-%m-%d %H:%M')
             end_datetime = end_datetime.replace(second=0)
@@ -373,20 +341,22 @@ class AverageResponseTimeStatistic(Resource):
             end_datetime_timezone = timezone.localize(end_datetime)
             end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at < :end'
-            arg_dict['end'] = end_datetime_utc
-
-        sql_query += ' GROUP BY date order by date'
+        rs = AppStatisticService.get_daily_statistics(
+            app_id=app_model.id,
+            timezone=account.timezone,
+            start=start_datetime_utc,
+            end=end_datetime_utc,
+            table='app_hourly_statistics',
+            columns=['message_count', 'provider_response_latency'],
+            aggregates='SUM(t.provider_response_latency) / SUM(t.message_count) AS latency'
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)            
-            for i in rs:
-                response_data.append({
-                    'date': str(i.date),
-                    'latency': round(i.latency * 1000, 4)
-                })
+        for i in rs:
+            response_data.append({
+                'date': str(i.date),
+                'latency': round(i.latency * 1000, 4)
+            })
 
         return jsonify({
             'data': response_data
@@ -407,18 +377,10 @@ class TokensPerSecondStatistic(Resource):
         parser.add_argument('end', type=datetime_string('%Y-%m-%d %H:%M'), location='args')
         args = parser.parse_args()
 
-        sql_query = '''SELECT date(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date, 
-    CASE 
-        WHEN SUM(provider_response_latency) = 0 THEN 0
-        ELSE (SUM(answer_tokens) / SUM(provider_response_latency))
-    END as tokens_per_second
-FROM messages
-WHERE app_id = :app_id'''
-        arg_dict = {'tz': account.timezone, 'app_id': app_model.id}
-
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
 
+        start_datetime_utc = None
         if args['start']:
             start_datetime = datetime.strptime(args['start'], '%Y-%m-%d %H:%M')
             start_datetime = start_datetime.replace(second=0)
@@ -426,9 +388,7 @@ WHERE app_id = :app_id'''
             start_datetime_timezone = timezone.localize(start_datetime)
             start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at >= :start'
-            arg_dict['start'] = start_datetime_utc
-
+        end_datetime_utc = None
         if args['end']:
             end_datetime = datetime.strptime(args['end'], '%Y-%m-%d %H:%M')
             end_datetime = end_datetime.replace(second=0)
@@ -436,20 +396,23 @@ WHERE app_id = :app_id'''
             end_datetime_timezone = timezone.localize(end_datetime)
             end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query += ' and created_at < :end'
-            arg_dict['end'] = end_datetime_utc
-
-        sql_query += ' GROUP BY date order by date'
+        rs = AppStatisticService.get_daily_statistics(
+            app_id=app_model.id,
+            timezone=account.timezone,
+            start=start_datetime_utc,
+            end=end_datetime_utc,
+            table='app_hourly_statistics',
+            columns=['answer_tokens', 'provider_response_latency'],
+            aggregates='CASE WHEN SUM(t.provider_response_latency) = 0 THEN 0 '
+                       'ELSE SUM(t.answer_tokens) / SUM(t.provider_response_latency) END AS tokens_per_second'
+        )
 
         response_data = []
-
-        with db.engine.begin() as conn:
-            rs = conn.execute(db.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({
-                    'date': str(i.date),
-                    'tps': round(i.tokens_per_second, 4)
-                })
+        for i in rs:
+            response_data.append({
+                'date': str(i.date),
+                'tps': round(i.tokens_per_second, 4)
+            })
 
         return jsonify({
             'data': response_data
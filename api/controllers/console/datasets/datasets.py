@@ -20,9 +20,11 @@ from fields.app_fields import related_app_list
 from fields.dataset_fields import dataset_detail_fields, dataset_query_detail_fields
 from fields.document_fields import document_status_fields
 from extensions.ext_database import db
-from models.dataset import DocumentSegment, Document
+from models.dataset import Document
 from models.model import UploadFile, ApiToken
+from services.api_token_service import ApiTokenService
 from services.dataset_service import DatasetService, DocumentService
+from services.document_progress_service import DocumentProgressService
 from services.provider_service import ProviderService
 
 
@@ -339,15 +341,9 @@ class DatasetIndexingStatusApi(Resource):
             Document.dataset_id == dataset_id,
             Document.tenant_id == current_user.current_tenant_id
         ).all()
+        DocumentProgressService.attach_progress(documents)
         documents_status = []
         for document in documents:
-            completed_segments = DocumentSegment.query.filter(DocumentSegment.completed_at.isnot(None),
-                                                              DocumentSegment.document_id == str(document.id),
-                                                              DocumentSegment.status != 're_segment').count()
-            total_segments = DocumentSegment.query.filter(DocumentSegment.document_id == str(document.id),
-                                                          DocumentSegment.status != 're_segment').count()
-            document.completed_segments = completed_segments
-            document.total_segments = total_segments
             documents_status.append(marshal(document, document_status_fields))
         data = {
             'data': documents_status
@@ -423,6 +419,7 @@ class DatasetApiDeleteApi(Resource):
 
         db.session.query(ApiToken).filter(ApiToken.id == api_key_id).delete()
         db.session.commit()
+        ApiTokenService.invalidate(key)
 
         return {'result': 'success'}, 204
 
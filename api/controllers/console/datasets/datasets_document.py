@@ -29,6 +29,8 @@ from models.dataset import DatasetProcessRule, Dataset
 from models.dataset import Document, DocumentSegment
 from models.model import UploadFile
 from services.dataset_service import DocumentService, DatasetService
+from services.dataset_counter_service import DatasetCounterService
+from services.document_progress_service import DocumentProgressService
 from tasks.add_document_to_index_task import add_document_to_index_task
 from tasks.remove_document_from_index_task import remove_document_from_index_task
 
@@ -164,14 +166,7 @@ class DatasetDocumentListApi(Resource):
             page=page, per_page=limit, max_per_page=100, error_out=False)
         documents = paginated_documents.items
         if fetch:
-            for document in documents:
-                completed_segments = DocumentSegment.query.filter(DocumentSegment.completed_at.isnot(None),
-                                                                  DocumentSegment.document_id == str(document.id),
-                                                                  DocumentSegment.status != 're_segment').count()
-                total_segments = DocumentSegment.query.filter(DocumentSegment.document_id == str(document.id),
-                                                              DocumentSegment.status != 're_segment').count()
-                document.completed_segments = completed_segments
-                document.total_segments = total_segments
+            DocumentProgressService.attach_progress(documents)
             data = marshal(documents, document_with_segments_fields)
         else:
             data = marshal(documents, document_fields)
@@ -453,15 +448,9 @@ class DocumentBatchIndexingStatusApi(DocumentResource):
         dataset_id = str(dataset_id)
         batch = str(batch)
         documents = self.get_batch_documents(dataset_id, batch)
+        DocumentProgressService.attach_progress(documents)
         documents_status = []
         for document in documents:
-            completed_segments = DocumentSegment.query.filter(DocumentSegment.completed_at.isnot(None),
-                                                              DocumentSegment.document_id == str(document.id),
-                                                              DocumentSegment.status != 're_segment').count()
-            total_segments = DocumentSegment.query.filter(DocumentSegment.document_id == str(document.id),
-                                                          DocumentSegment.status != 're_segment').count()
-            document.completed_segments = completed_segments
-            document.total_segments = total_segments
             if document.is_paused:
                 document.indexing_status = 'paused'
             documents_status.append(marshal(document, document_status_fields))
@@ -481,18 +470,7 @@ class DocumentIndexingStatusApi(DocumentResource):
         document_id = str(document_id)
         document = self.get_document(dataset_id, document_id)
 
-        completed_segments = DocumentSegment.query \
-            .filter(DocumentSegment.completed_at.isnot(None),
-                    DocumentSegment.document_id == str(document_id),
-                    DocumentSegment.status != 're_segment') \
-            .count()
-        total_segments = DocumentSegment.query \
-            .filter(DocumentSegment.document_id == str(document_id),
-                    DocumentSegment.status != 're_segment') \
-            .count()
-
-        document.completed_segments = completed_segments
-        document.total_segments = total_segments
+        DocumentProgressService.attach_progress([document])
         if document.is_paused:
             document.indexing_status = 'paused'
         return marshal(document, document_status_fields)
@@ -722,6 +700,7 @@ class DocumentStatusApi(DocumentResource):
             document.disabled_by = None
             document.updated_at = datetime.utcnow()
             db.session.commit()
+            DatasetCounterService.refresh_counters(document.dataset_id)
 
             # Set cache to prevent indexing the same document multiple times
             redis_client.setex(indexing_cache_key, 600, 1)
@@ -741,6 +720,7 @@ class DocumentStatusApi(DocumentResource):
             document.disabled_by = current_user.id
             document.updated_at = datetime.utcnow()
             db.session.commit()
+            DatasetCounterService.refresh_counters(document.dataset_id)
 
             # Set cache to prevent indexing the same document multiple times
             redis_client.setex(indexing_cache_key, 600, 1)
@@ -758,6 +738,7 @@ class DocumentStatusApi(DocumentResource):
             document.archived_by = current_user.id
             document.updated_at = datetime.utcnow()
             db.session.commit()
+            DatasetCounterService.refresh_counters(document.dataset_id)
 
             if document.enabled:
                 # Set cache to prevent indexing the same document multiple times
@@ -783,6 +764,7 @@ class DocumentStatusApi(DocumentResource):
             document.archived_by = None
             document.updated_at = datetime.utcnow()
             db.session.commit()
+            DatasetCounterService.refresh_counters(document.dataset_id)
 
             # Set cache to prevent indexing the same document multiple times
             redis_client.setex(indexing_cache_key, 600, 1)
@@ -12,7 +12,7 @@ from werkzeug.exceptions import InternalServerError, NotFound
 import services
 from controllers.console import api
 from controllers.console.app.error import ConversationCompletedError, AppUnavailableError, ProviderNotInitializeError, \
-    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionRequestError
+    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionRequestError, CompletionQueueFullError
 from controllers.console.explore.error import NotCompletionAppError, NotChatAppError
 from controllers.console.explore.wraps import InstalledAppResource
 from core.conversation_message_task import PubHandler
@@ -71,6 +71,8 @@ class CompletionApi(InstalledAppResource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception as e:
@@ -136,6 +138,8 @@ class ChatApi(InstalledAppResource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception as e:
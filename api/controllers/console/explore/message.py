@@ -12,7 +12,7 @@ from werkzeug.exceptions import NotFound, InternalServerError
 import services
 from controllers.console import api
 from controllers.console.app.error import AppMoreLikeThisDisabledError, ProviderNotInitializeError, \
-    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionRequestError
+    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionRequestError, CompletionQueueFullError
 from controllers.console.explore.error import NotCompletionAppError, AppSuggestedQuestionsAfterAnswerDisabledError
 from controllers.console.explore.wraps import InstalledAppResource
 from core.model_providers.error import LLMRateLimitError, LLMBadRequestError, LLMAuthorizationError, LLMAPIConnectionError, \
@@ -98,6 +98,8 @@ class MessageMoreLikeThisApi(InstalledAppResource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception:
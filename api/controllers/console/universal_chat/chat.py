@@ -10,7 +10,7 @@ from werkzeug.exceptions import InternalServerError, NotFound
 import services
 from controllers.console import api
 from controllers.console.app.error import ConversationCompletedError, AppUnavailableError, ProviderNotInitializeError, \
-    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionRequestError
+    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionRequestError, CompletionQueueFullError
 from controllers.console.universal_chat.wraps import UniversalChatResource
 from core.conversation_message_task import PubHandler
 from core.model_providers.error import ProviderTokenNotInitError, QuotaExceededError, ModelCurrentlyNotSupportError, \
@@ -90,6 +90,8 @@ class UniversalChatApi(UniversalChatResource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception as e:
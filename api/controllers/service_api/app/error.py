@@ -52,6 +52,12 @@ class CompletionRequestError(BaseHTTPException):
     code = 400
 
 
+class CompletionQueueFullError(BaseHTTPException):
+    error_code = 'completion_queue_full'
+    description = "Too many completions are in progress, please try again later."
+    code = 503
+
+
 class NoAudioUploadedError(BaseHTTPException):
     error_code = 'no_audio_uploaded'
     description = "Please upload your audio."
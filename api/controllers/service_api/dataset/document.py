@@ -16,8 +16,9 @@ from libs.login import current_user
 from core.model_providers.error import ProviderTokenNotInitError
 from extensions.ext_database import db
 from fields.document_fields import document_fields, document_status_fields
-from models.dataset import Dataset, Document, DocumentSegment
+from models.dataset import Dataset, Document
 from services.dataset_service import DocumentService
+from services.document_progress_service import DocumentProgressService
 from services.file_service import FileService
 
 
@@ -361,15 +362,9 @@ class DocumentIndexingStatusApi(DatasetApiResource):
         documents = DocumentService.get_batch_documents(dataset_id, batch)
         if not documents:
             raise NotFound('Documents not found.')
+        DocumentProgressService.attach_progress(documents)
         documents_status = []
         for document in documents:
-            completed_segments = DocumentSegment.query.filter(DocumentSegment.completed_at.isnot(None),
-                                                              DocumentSegment.document_id == str(document.id),
-                                                              DocumentSegment.status != 're_segment').count()
-            total_segments = DocumentSegment.query.filter(DocumentSegment.document_id == str(document.id),
-                                                          DocumentSegment.status != 're_segment').count()
-            document.completed_segments = completed_segments
-            document.total_segments = total_segments
             if document.is_paused:
                 document.indexing_status = 'paused'
             documents_status.append(marshal(document, document_status_fields))
@@ -1,5 +1,4 @@
 # -*- coding:utf-8 -*-
-from datetime import datetime
 from functools import wraps
 
 from flask import request, current_app
@@ -10,7 +9,8 @@ from werkzeug.exceptions import NotFound, Unauthorized
 from libs.login import _get_user
 from extensions.ext_database import db
 from models.account import Tenant, TenantAccountJoin, Account
-from models.model import ApiToken, App
+from models.model import App
+from services.api_token_service import ApiTokenService
 
 
 def validate_app_token(view=None):
@@ -87,16 +87,12 @@ def validate_and_get_api_token(scope=None):
     if auth_scheme != 'bearer':
         raise Unauthorized("Authorization scheme must be 'Bearer'")
 
-    api_token = db.session.query(ApiToken).filter(
-        ApiToken.token == auth_token,
-        ApiToken.type == scope,
-    ).first()
+    api_token = ApiTokenService.get_api_token(auth_token, scope)
 
     if not api_token:
         raise Unauthorized("Access token is invalid")
 
-    api_token.last_used_at = datetime.utcnow()
-    db.session.commit()
+    ApiTokenService.record_last_used(api_token)
 
     return api_token
 
@@ -11,7 +11,7 @@ import services
 from controllers.web import api
 from controllers.web.error import AppUnavailableError, ConversationCompletedError, \
     ProviderNotInitializeError, NotChatAppError, NotCompletionAppError, CompletionRequestError, \
-    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError
+    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionQueueFullError
 from controllers.web.wraps import WebApiResource
 from core.conversation_message_task import PubHandler
 from core.model_providers.error import LLMBadRequestError, LLMAPIUnavailableError, LLMAuthorizationError, LLMAPIConnectionError, \
@@ -65,6 +65,8 @@ class CompletionApi(WebApiResource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception as e:
@@ -126,6 +128,8 @@ class ChatApi(WebApiResource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception as e:
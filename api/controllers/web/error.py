@@ -52,6 +52,12 @@ class CompletionRequestError(BaseHTTPException):
     code = 400
 
 
+class CompletionQueueFullError(BaseHTTPException):
+    error_code = 'completion_queue_full'
+    description = "Too many completions are in progress, please try again later."
+    code = 503
+
+
 class AppMoreLikeThisDisabledError(BaseHTTPException):
     error_code = 'app_more_like_this_disabled'
     description = "The 'More like this' feature is disabled. Please refresh your page."
@@ -12,7 +12,7 @@ import services
 from controllers.web import api
 from controllers.web.error import NotChatAppError, CompletionRequestError, ProviderNotInitializeError, \
     AppMoreLikeThisDisabledError, NotCompletionAppError, AppSuggestedQuestionsAfterAnswerDisabledError, \
-    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError
+    ProviderQuotaExceededError, ProviderModelCurrentlyNotSupportError, CompletionQueueFullError
 from controllers.web.wraps import WebApiResource
 from core.model_providers.error import LLMRateLimitError, LLMBadRequestError, LLMAuthorizationError, LLMAPIConnectionError, \
     ProviderTokenNotInitError, LLMAPIUnavailableError, QuotaExceededError, ModelCurrentlyNotSupportError
@@ -132,6 +132,8 @@ class MessageMoreLikeThisApi(WebApiResource):
         except (LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError,
                 LLMRateLimitError, LLMAuthorizationError) as e:
             raise CompletionRequestError(str(e))
+        except services.errors.completion.CompletionQueueFullError:
+            raise CompletionQueueFullError()
         except ValueError as e:
             raise e
         except Exception:
@@ -5,9 +5,8 @@ from flask import request
 from flask_restful import Resource
 from werkzeug.exceptions import NotFound, Unauthorized
 
-from extensions.ext_database import db
-from models.model import App, EndUser, Site
 from libs.passport import PassportService
+from services.web_app_session_service import WebAppSessionService
 
 def validate_jwt_token(view=None):
     def decorator(view):
@@ -36,15 +35,13 @@ def decode_jwt_token():
         raise Unauthorized('Invalid Authorization header format. Expected \'Bearer <api-key>\' format.')
     decoded = PassportService().verify(tk)
     app_code = decoded.get('app_code')
-    app_model = db.session.query(App).filter(App.id == decoded['app_id']).first()
-    site = db.session.query(Site).filter(Site.code == app_code).first()
+    app_model, site, end_user = WebAppSessionService.resolve(decoded['app_id'], app_code, decoded['end_user_id'])
     if not app_model:
         raise NotFound()
     if not app_code or not site:
         raise Unauthorized('Site URL is no longer valid.')
     if app_model.enable_site is False:
         raise Unauthorized('Site is disabled.')
-    end_user = db.session.query(EndUser).filter(EndUser.id == decoded['end_user_id']).first()
     if not end_user:
         raise NotFound()
 
@@ -4,15 +4,15 @@ import time
 from typing import Any, Dict, List, Union, Optional
 
 from flask import Flask, current_app
-from langchain.callbacks.base import BaseCallbackHandler
 from langchain.schema import LLMResult, BaseMessage
 from pydantic import BaseModel
 
 from core.callback_handler.entity.llm_message import LLMMessage
+from core.callback_handler.token_counter_callback_handler import TokenCounterCallbackHandler
 from core.conversation_message_task import ConversationMessageTask, ConversationTaskStoppedException, \
     ConversationTaskInterruptException
 from core.model_providers.models.entity.message import to_prompt_messages, PromptMessage, LCHumanMessageWithFiles, \
-    ImagePromptMessageFile
+    ImagePromptMessageFile, MessageType
 from core.model_providers.models.llm.base import BaseLLM
 from core.moderation.base import ModerationOutputsResult, ModerationAction
 from core.moderation.factory import ModerationFactory
@@ -23,11 +23,12 @@ class ModerationRule(BaseModel):
     config: Dict[str, Any]
 
 
-class LLMCallbackHandler(BaseCallbackHandler):
+class LLMCallbackHandler(TokenCounterCallbackHandler):
     raise_error: bool = True
 
     def __init__(self, model_instance: BaseLLM,
                  conversation_message_task: ConversationMessageTask):
+        super().__init__(model_instance.get_token_counter())
         self.model_instance = model_instance
         self.llm_message = LLMMessage()
         self.start_at = None
@@ -51,11 +52,6 @@ class LLMCallbackHandler(BaseCallbackHandler):
                 on_message_replace_func=self.conversation_message_task.on_message_replace
             )
 
-    @property
-    def always_verbose(self) -> bool:
-        """Whether to call verbose callbacks even if verbose is False."""
-        return True
-
     def on_chat_model_start(
             self,
             serialized: Dict[str, Any],
@@ -95,6 +91,7 @@ class LLMCallbackHandler(BaseCallbackHandler):
         self.llm_message.prompt_tokens = self.model_instance.get_num_tokens([PromptMessage(content=prompts[0])])
 
     def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        streamed_completion = self.llm_message.completion
         if self.output_moderation_handler:
             self.output_moderation_handler.stop_thread()
 
@@ -115,11 +112,9 @@ class LLMCallbackHandler(BaseCallbackHandler):
             if 'completion_tokens' in response.llm_output['token_usage']:
                 self.llm_message.completion_tokens = response.llm_output['token_usage']['completion_tokens']
             else:
-                self.llm_message.completion_tokens = self.model_instance.get_num_tokens(
-                    [PromptMessage(content=self.llm_message.completion)])
+                self.llm_message.completion_tokens = self.get_num_completion_tokens(streamed_completion)
         else:
-            self.llm_message.completion_tokens = self.model_instance.get_num_tokens(
-                [PromptMessage(content=self.llm_message.completion)])
+            self.llm_message.completion_tokens = self.get_num_completion_tokens(streamed_completion)
 
         self.conversation_message_task.save_message(self.llm_message)
 
@@ -133,6 +128,7 @@ class LLMCallbackHandler(BaseCallbackHandler):
         try:
             self.conversation_message_task.append_message_text(token)
             self.llm_message.completion += token
+            self.token_counter.append(token)
 
             if self.output_moderation_handler:
                 self.output_moderation_handler.append_new_token(token)
@@ -149,20 +145,30 @@ class LLMCallbackHandler(BaseCallbackHandler):
 
         if isinstance(error, ConversationTaskStoppedException):
             if self.conversation_message_task.streaming:
-                self.llm_message.completion_tokens = self.model_instance.get_num_tokens(
-                    [PromptMessage(content=self.llm_message.completion)]
-                )
+                self.llm_message.completion_tokens = self.get_num_completion_tokens(self.llm_message.completion)
                 self.conversation_message_task.save_message(llm_message=self.llm_message, by_stopped=True)
         if isinstance(error, ConversationTaskInterruptException):
+            streamed_completion = self.llm_message.completion
             self.llm_message.completion = self.output_moderation_handler.get_final_output()
-            self.llm_message.completion_tokens = self.model_instance.get_num_tokens(
-                [PromptMessage(content=self.llm_message.completion)]
-            )
+            self.llm_message.completion_tokens = self.get_num_completion_tokens(streamed_completion)
             self.conversation_message_task.save_message(llm_message=self.llm_message)
         else:
             logging.debug("on_llm_error: %s", error)
 
 
+    def get_num_completion_tokens(self, streamed_completion: str) -> int:
+        """
+        Use the running count of the streamed tokens,
+        the completion is only counted again when it is not the streamed text, e.g. replaced by moderation.
+        """
+        if streamed_completion and self.llm_message.completion == streamed_completion:
+            return self.token_counter.num_tokens
+
+        return self.model_instance.get_num_tokens(
+            [PromptMessage(content=self.llm_message.completion, type=MessageType.ASSISTANT)]
+        )
+
+
 class OutputModerationHandler(BaseModel):
     DEFAULT_BUFFER_SIZE: int = 300
 
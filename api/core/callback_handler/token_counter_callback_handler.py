@@ -0,0 +1,20 @@
+from typing import Any
+
+from langchain.callbacks.base import BaseCallbackHandler
+
+from core.model_providers.models.llm.token_counter import StreamTokenCounter
+
+
+class TokenCounterCallbackHandler(BaseCallbackHandler):
+    """Callback Handler that counts the streamed tokens of an LLM run."""
+
+    def __init__(self, token_counter: StreamTokenCounter) -> None:
+        self.token_counter = token_counter
+
+    @property
+    def always_verbose(self) -> bool:
+        """Whether to call verbose callbacks even if verbose is False."""
+        return True
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.token_counter.append(token)
@@ -1,17 +1,24 @@
 import json
+import logging
+import threading
 import time
+import weakref
 from typing import Optional, Union, List
 
+from flask import current_app
+
 from core.callback_handler.entity.agent_loop import AgentLoop
 from core.callback_handler.entity.dataset_query import DatasetQueryObj
 from core.callback_handler.entity.llm_message import LLMMessage
 from core.callback_handler.entity.chain_result import ChainResult
+from core import generation_transport
 from core.file.file_obj import FileObj
 from core.model_providers.model_factory import ModelFactory
 from core.model_providers.models.entity.message import to_prompt_messages, MessageType, PromptMessageFile
 from core.model_providers.models.llm.base import BaseLLM
 from core.prompt.prompt_builder import PromptBuilder
 from core.prompt.prompt_template import PromptTemplateParser
+from core.timer_wheel import TimerWheel, Timer
 from events.message_event import message_was_created
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
@@ -321,9 +328,13 @@ class ConversationMessageTask:
 
 
 class PubHandler:
+    # live handlers by channel, so an error published for a task flushes the text its handler still buffers
+    _handlers = weakref.WeakValueDictionary()
+
     def __init__(self, user: Union[Account | EndUser], task_id: str,
                  message: Message, conversation: Conversation,
-                 chain_pub: bool = False, agent_thought_pub: bool = False):
+                 chain_pub: bool = False, agent_thought_pub: bool = False,
+                 timer_wheel: Optional[TimerWheel] = None):
         self._channel = PubHandler.generate_channel_name(user, task_id)
         self._stopped_cache_key = PubHandler.generate_stopped_cache_key(user, task_id)
 
@@ -333,6 +344,24 @@ class PubHandler:
         self._chain_pub = chain_pub
         self._agent_thought_pub = agent_thought_pub
 
+        # streamed text is coalesced and published once per flush window or flush size,
+        # and the stop flag is checked at most once per stop check interval
+        self._text_flush_interval = int(current_app.config.get('STREAM_TEXT_FLUSH_INTERVAL_MS', 30)) / 1000
+        self._text_flush_size = int(current_app.config.get('STREAM_TEXT_FLUSH_SIZE', 64))
+        self._stop_check_interval = int(current_app.config.get('STREAM_STOP_CHECK_INTERVAL_MS', 500)) / 1000
+        # the tail of the buffer is flushed by a timer when the model pauses
+        self._timer_wheel = timer_wheel or get_text_flush_timer_wheel()
+        self._flush_timer: Optional[Timer] = None
+
+        self._lock = threading.RLock()
+        self._text_buffer = []
+        self._text_buffer_size = 0
+        self._last_flushed_at = 0.0
+        self._last_stop_checked_at = 0.0
+        self._stats = {'texts': 0, 'publishes': 0, 'stop_checks': 0}
+
+        PubHandler._handlers[self._channel] = self
+
     @classmethod
     def generate_channel_name(cls, user: Union[Account | EndUser], task_id: str):
         if not user:
@@ -347,20 +376,18 @@ class PubHandler:
         return "generate_result_stopped:{}-{}".format(user_str, task_id)
 
     def pub_text(self, text: str):
-        content = {
-            'event': 'message',
-            'data': {
-                'task_id': self._task_id,
-                'message_id': str(self._message.id),
-                'text': text,
-                'mode': self._conversation.mode,
-                'conversation_id': str(self._conversation.id)
-            }
-        }
-
-        redis_client.publish(self._channel, json.dumps(content))
-
-        if self._is_stopped():
+        with self._lock:
+            self._stats['texts'] += 1
+            self._text_buffer.append(text)
+            self._text_buffer_size += len(text)
+
+            if self._text_buffer_size >= self._text_flush_size \
+                    or time.perf_counter() - self._last_flushed_at >= self._text_flush_interval:
+                self._flush_text()
+            elif self._flush_timer is None:
+                self._flush_timer = self._timer_wheel.schedule(self._text_flush_interval, self._flush_text)
+
+        if self._is_stopped(force=False):
             self.pub_end()
             raise ConversationTaskStoppedException()
 
@@ -376,7 +403,7 @@ class PubHandler:
             }
         }
 
-        redis_client.publish(self._channel, json.dumps(content))
+        self._publish(content)
 
         if self._is_stopped():
             self.pub_end()
@@ -398,7 +425,7 @@ class PubHandler:
                 }
             }
 
-            redis_client.publish(self._channel, json.dumps(content))
+            self._publish(content)
 
         if self._is_stopped():
             self.pub_end()
@@ -422,7 +449,7 @@ class PubHandler:
                 }
             }
 
-            redis_client.publish(self._channel, json.dumps(content))
+            self._publish(content)
 
         if self._is_stopped():
             self.pub_end()
@@ -440,7 +467,7 @@ class PubHandler:
         }
         if retriever_resource:
             content['data']['retriever_resources'] = retriever_resource
-        redis_client.publish(self._channel, json.dumps(content))
+        self._publish(content)
 
         if self._is_stopped():
             self.pub_end()
@@ -451,7 +478,50 @@ class PubHandler:
             'event': 'end',
         }
 
-        redis_client.publish(self._channel, json.dumps(content))
+        self._publish(content)
+
+        logging.debug(f"{self._channel} published {self._stats['publishes']} messages "
+                      f"for {self._stats['texts']} texts, checked stop flag {self._stats['stop_checks']} times")
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _flush_text(self):
+        with self._lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            if not self._text_buffer:
+                return
+
+            text = ''.join(self._text_buffer)
+            self._text_buffer = []
+            self._text_buffer_size = 0
+            self._last_flushed_at = time.perf_counter()
+
+            content = {
+                'event': 'message',
+                'data': {
+                    'task_id': self._task_id,
+                    'message_id': str(self._message.id),
+                    'text': text,
+                    'mode': self._conversation.mode,
+                    'conversation_id': str(self._conversation.id)
+                }
+            }
+
+            self._stats['publishes'] += 1
+            generation_transport.publish(self._channel, content)
+
+    def _publish(self, content: dict):
+        with self._lock:
+            # keep the event order, the buffered text goes out before any other event
+            self._flush_text()
+            self._stats['publishes'] += 1
+            generation_transport.publish(self._channel, content)
 
     @classmethod
     def pub_error(cls, user: Union[Account | EndUser], task_id: str, e):
@@ -461,9 +531,23 @@ class PubHandler:
         }
 
         channel = cls.generate_channel_name(user, task_id)
-        redis_client.publish(channel, json.dumps(content))
+        pub_handler = cls._handlers.get(channel)
+        if pub_handler:
+            # the text streamed before the error goes out ahead of the error event
+            pub_handler._flush_text()
+
+        generation_transport.publish(channel, content)
+
+    def _is_stopped(self, force: bool = True):
+        if generation_transport.is_stopped_locally(self._channel):
+            return True
 
-    def _is_stopped(self):
+        now = time.perf_counter()
+        if not force and now - self._last_stop_checked_at < self._stop_check_interval:
+            return False
+
+        self._last_stop_checked_at = now
+        self._stats['stop_checks'] += 1
         return redis_client.get(self._stopped_cache_key) is not None
 
     @classmethod
@@ -473,14 +557,33 @@ class PubHandler:
         }
 
         channel = cls.generate_channel_name(user, task_id)
-        redis_client.publish(channel, json.dumps(content))
+        generation_transport.publish(channel, content)
 
     @classmethod
     def stop(cls, user: Union[Account | EndUser], task_id: str):
+        # the stop flag in redis reaches generations in any process, the local flag stops them right away
+        generation_transport.stop_local(cls.generate_channel_name(user, task_id))
         stopped_cache_key = cls.generate_stopped_cache_key(user, task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
 
 
+_text_flush_timer_wheel: Optional[TimerWheel] = None
+_text_flush_timer_wheel_lock = threading.Lock()
+
+
+def get_text_flush_timer_wheel() -> TimerWheel:
+    global _text_flush_timer_wheel
+    if _text_flush_timer_wheel is None:
+        with _text_flush_timer_wheel_lock:
+            if _text_flush_timer_wheel is None:
+                _text_flush_timer_wheel = TimerWheel(
+                    tick=int(current_app.config.get('STREAM_TEXT_FLUSH_INTERVAL_MS', 30)) / 1000,
+                    name='stream-text-flush-timer-wheel'
+                )
+
+    return _text_flush_timer_wheel
+
+
 class ConversationTaskStoppedException(Exception):
     pass
 
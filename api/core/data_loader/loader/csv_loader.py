@@ -1,6 +1,6 @@
 import logging
 import csv
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterator
 
 from langchain.document_loaders import CSVLoader as LCCSVLoader
 from langchain.document_loaders.helpers import detect_file_encodings
@@ -26,27 +26,38 @@ class CSVLoader(LCCSVLoader):
 
     def load(self) -> List[Document]:
         """Load data into document objects."""
+        return list(self.lazy_load())
+
+    def lazy_load(self) -> Iterator[Document]:
+        """Lazy load rows as document objects."""
+        encoding = self._detect_encoding()
+        with open(self.file_path, newline="", encoding=encoding) as csvfile:
+            yield from self._read_from_file(csvfile)
+
+    def _detect_encoding(self) -> Optional[str]:
+        """Find an encoding which decodes the whole file, reading it in chunks to keep memory bounded."""
         try:
-            with open(self.file_path, newline="", encoding=self.encoding) as csvfile:
-                docs = self._read_from_file(csvfile)
+            self._check_encoding(self.encoding)
+            return self.encoding
         except UnicodeDecodeError as e:
             if self.autodetect_encoding:
                 detected_encodings = detect_file_encodings(self.file_path)
                 for encoding in detected_encodings:
                     logger.debug("Trying encoding: ", encoding.encoding)
                     try:
-                        with open(self.file_path, newline="", encoding=encoding.encoding) as csvfile:
-                            docs = self._read_from_file(csvfile)
-                        break
+                        self._check_encoding(encoding.encoding)
+                        return encoding.encoding
                     except UnicodeDecodeError:
                         continue
-            else:
-                raise RuntimeError(f"Error loading {self.file_path}") from e
 
-        return docs
+            raise RuntimeError(f"Error loading {self.file_path}") from e
 
-    def _read_from_file(self, csvfile):
-        docs = []
+    def _check_encoding(self, encoding: Optional[str]) -> None:
+        with open(self.file_path, newline="", encoding=encoding) as csvfile:
+            while csvfile.read(1024 * 1024):
+                pass
+
+    def _read_from_file(self, csvfile) -> Iterator[Document]:
         csv_reader = csv.DictReader(csvfile, **self.csv_args)  # type: ignore
         for i, row in enumerate(csv_reader):
             content = "\n".join(f"{k.strip()}: {v.strip()}" for k, v in row.items())
@@ -61,7 +72,4 @@ class CSVLoader(LCCSVLoader):
                     f"Source column '{self.source_column}' not found in CSV file."
                 )
             metadata = {"source": source, "row": i}
-            doc = Document(page_content=content, metadata=metadata)
-            docs.append(doc)
-
-        return docs
+            yield Document(page_content=content, metadata=metadata)
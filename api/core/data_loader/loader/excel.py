@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import List
+from typing import List, Iterator
 
 from langchain.document_loaders.base import BaseLoader
 from langchain.schema import Document
@@ -25,23 +25,25 @@ class ExcelLoader(BaseLoader):
         self._file_path = file_path
 
     def load(self) -> List[Document]:
-        data = []
+        return list(self.lazy_load())
+
+    def lazy_load(self) -> Iterator[Document]:
         keys = []
         wb = load_workbook(filename=self._file_path, read_only=True)
-        # loop over all sheets
-        for sheet in wb:
-            if 'A1:A1' == sheet.calculate_dimension():
-                sheet.reset_dimensions()
-            for row in sheet.iter_rows(values_only=True):
-                if all(v is None for v in row):
-                    continue
-                if keys == []:
-                    keys = list(map(str, row))
-                else:
-                    row_dict = dict(zip(keys, list(map(str, row))))
-                    row_dict = {k: v for k, v in row_dict.items() if v}
-                    item = ''.join(f'{k}:{v};' for k, v in row_dict.items())
-                    document = Document(page_content=item, metadata={'source': self._file_path})
-                    data.append(document)
-
-        return data
+        try:
+            # loop over all sheets
+            for sheet in wb:
+                if 'A1:A1' == sheet.calculate_dimension():
+                    sheet.reset_dimensions()
+                for row in sheet.iter_rows(values_only=True):
+                    if all(v is None for v in row):
+                        continue
+                    if keys == []:
+                        keys = list(map(str, row))
+                    else:
+                        row_dict = dict(zip(keys, list(map(str, row))))
+                        row_dict = {k: v for k, v in row_dict.items() if v}
+                        item = ''.join(f'{k}:{v};' for k, v in row_dict.items())
+                        yield Document(page_content=item, metadata={'source': self._file_path})
+        finally:
+            wb.close()
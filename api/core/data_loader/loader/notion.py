@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 
 import requests
 from flask import current_app
@@ -68,31 +68,28 @@ class NotionLoader(BaseLoader):
         )
 
     def load(self) -> List[Document]:
+        return list(self.lazy_load())
+
+    def lazy_load(self) -> Iterator[Document]:
+        """Yield the blocks of a page as each page of the block children is fetched."""
         self.update_last_edited_time(
             self._document_model
         )
 
-        text_docs = self._load_data_as_documents(self._notion_obj_id, self._notion_page_type)
-
-        return text_docs
+        yield from self._load_data_as_documents(self._notion_obj_id, self._notion_page_type)
 
     def _load_data_as_documents(
             self, notion_obj_id: str, notion_page_type: str
-    ) -> List[Document]:
-        docs = []
+    ) -> Iterator[Document]:
         if notion_page_type == 'database':
             # get all the pages in the database
-            page_text_documents = self._get_notion_database_data(notion_obj_id)
-            docs.extend(page_text_documents)
+            yield from self._get_notion_database_data(notion_obj_id)
         elif notion_page_type == 'page':
-            page_text_list = self._get_notion_block_data(notion_obj_id)
-            for page_text in page_text_list:
-                docs.append(Document(page_content=page_text))
+            for page_text in self._iter_notion_block_data(notion_obj_id):
+                yield Document(page_content=page_text)
         else:
             raise ValueError("notion page type not supported")
 
-        return docs
-
     def _get_notion_database_data(
             self, database_id: str, query_dict: Dict[str, Any] = {}
     ) -> List[Document]:
@@ -149,8 +146,7 @@ class NotionLoader(BaseLoader):
 
         return database_content_list
 
-    def _get_notion_block_data(self, page_id: str) -> List[str]:
-        result_lines_arr = []
+    def _iter_notion_block_data(self, page_id: str) -> Iterator[str]:
         cur_block_id = page_id
         while True:
             block_url = BLOCK_CHILD_URL_TMPL.format(block_id=cur_block_id)
@@ -177,7 +173,7 @@ class NotionLoader(BaseLoader):
                     result_block_id = result["id"]
                     text = self._read_table_rows(result_block_id)
                     text += "\n\n"
-                    result_lines_arr.append(text)
+                    yield text
                 else:
                     if "rich_text" in result_obj:
                         for rich_text in result_obj["rich_text"]:
@@ -200,15 +196,14 @@ class NotionLoader(BaseLoader):
                     cur_result_text = "\n".join(cur_result_text_arr)
                     cur_result_text += "\n\n"
                     if result_type in HEADING_TYPE:
-                        result_lines_arr.append(cur_result_text)
+                        yield cur_result_text
                     else:
-                        result_lines_arr.append(f'{heading}\n{cur_result_text}')
+                        yield f'{heading}\n{cur_result_text}'
 
             if data["next_cursor"] is None:
                 break
             else:
                 cur_block_id = data["next_cursor"]
-        return result_lines_arr
 
     def _read_block(self, block_id: str, num_tabs: int = 0) -> str:
         """Read a block."""
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Optional
+from typing import List, Optional, Iterator
 
 from langchain.document_loaders import PyPDFium2Loader
 from langchain.document_loaders.base import BaseLoader
@@ -53,3 +53,16 @@ class PdfLoader(BaseLoader):
 
         return documents
 
+    def lazy_load(self) -> Iterator[Document]:
+        """Yield the pdf page by page, the plaintext cache is read but not written in this mode."""
+        if self._upload_file and self._upload_file.hash:
+            plaintext_file_key = 'upload_files/' + self._upload_file.tenant_id + '/' \
+                                 + self._upload_file.hash + '.0625.plaintext'
+            try:
+                text = storage.load(plaintext_file_key).decode('utf-8')
+                yield Document(page_content=text)
+                return
+            except FileNotFoundError:
+                pass
+
+        yield from PyPDFium2Loader(file_path=self._file_path).lazy_load()
@@ -1,15 +1,19 @@
 import logging
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 from langchain.embeddings.base import Embeddings
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
 
+from core.embedding.query_embedding_cache import get_query_embedding_cache
 from core.model_providers.models.embedding.base import BaseEmbedding
 from extensions.ext_database import db
 from libs import helper
 from models.dataset import Embedding
 
+# max number of hashes sent in a single `hash IN (...)` lookup
+EMBEDDING_CACHE_LOOKUP_BATCH_SIZE = 1000
+
 
 class CacheEmbedding(Embeddings):
     def __init__(self, embeddings: BaseEmbedding):
@@ -18,53 +22,55 @@ class CacheEmbedding(Embeddings):
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed search docs."""
         # use doc embedding cache or store if not exists
-        text_embeddings = []
-        embedding_queue_texts = []
-        for text in texts:
-            hash = helper.generate_text_hash(text)
-            embedding = db.session.query(Embedding).filter_by(model_name=self._embeddings.name, hash=hash).first()
-            if embedding:
-                text_embeddings.append(embedding.get_embedding())
+        text_hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._get_cached_embeddings(text_hashes)
+
+        text_embeddings: List[Optional[List[float]]] = [None for _ in range(len(texts))]
+        # hash -> indices of the texts which are not cached yet, texts with the same hash are embedded once
+        embedding_queue: dict[str, list[int]] = {}
+        for i, hash in enumerate(text_hashes):
+            if hash in cached_embeddings:
+                text_embeddings[i] = cached_embeddings[hash]
             else:
-                embedding_queue_texts.append(text)
+                embedding_queue.setdefault(hash, []).append(i)
 
-        if embedding_queue_texts:
+        if embedding_queue:
+            embedding_queue_hashes = list(embedding_queue.keys())
+            embedding_queue_texts = [texts[embedding_queue[hash][0]] for hash in embedding_queue_hashes]
             try:
                 embedding_results = self._embeddings.client.embed_documents(embedding_queue_texts)
             except Exception as ex:
                 raise self._embeddings.handle_exceptions(ex)
-            i = 0
-            normalized_embedding_results = []
-            for text in embedding_queue_texts:
-                hash = helper.generate_text_hash(text)
-
-                try:
-                    embedding = Embedding(model_name=self._embeddings.name, hash=hash)
-                    vector = embedding_results[i]
-                    normalized_embedding = (vector / np.linalg.norm(vector)).tolist()
-                    normalized_embedding_results.append(normalized_embedding)
-                    embedding.set_embedding(normalized_embedding)
-                    db.session.add(embedding)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
-                    continue
-                except:
-                    logging.exception('Failed to add embedding to db')
-                    continue
-                finally:
-                    i += 1
-
-            text_embeddings.extend(normalized_embedding_results)
+
+            new_embeddings = []
+            for hash, vector in zip(embedding_queue_hashes, embedding_results):
+                normalized_embedding = (vector / np.linalg.norm(vector)).tolist()
+                for i in embedding_queue[hash]:
+                    text_embeddings[i] = normalized_embedding
+
+                embedding = Embedding(model_name=self._embeddings.name, hash=hash)
+                embedding.set_embedding(normalized_embedding)
+                new_embeddings.append(embedding)
+
+            self._save_embeddings(new_embeddings)
+
         return text_embeddings
 
     def embed_query(self, text: str) -> List[float]:
         """Embed query text."""
-        # use doc embedding cache or store if not exists
+        # use the in-process and redis query cache first, then the doc embedding cache, or store if not exists
         hash = helper.generate_text_hash(text)
+        query_embedding_cache = get_query_embedding_cache()
+        embedding_results = query_embedding_cache.get(self._embeddings.name, hash)
+        if embedding_results is not None:
+            return embedding_results
+
         embedding = db.session.query(Embedding).filter_by(model_name=self._embeddings.name, hash=hash).first()
+        query_embedding_cache.record_db_lookup(hit=embedding is not None)
         if embedding:
-            return embedding.get_embedding()
+            embedding_results = embedding.get_embedding()
+            query_embedding_cache.set(self._embeddings.name, hash, embedding_results)
+            return embedding_results
 
         try:
             embedding_results = self._embeddings.client.embed_query(text)
@@ -72,15 +78,46 @@ class CacheEmbedding(Embeddings):
         except Exception as ex:
             raise self._embeddings.handle_exceptions(ex)
 
-        try:
-            embedding = Embedding(model_name=self._embeddings.name, hash=hash)
-            embedding.set_embedding(embedding_results)
-            db.session.add(embedding)
-            db.session.commit()
-        except IntegrityError:
-            db.session.rollback()
-        except:
-            logging.exception('Failed to add embedding to db')
+        embedding = Embedding(model_name=self._embeddings.name, hash=hash)
+        embedding.set_embedding(embedding_results)
+        self._save_embeddings([embedding])
+        query_embedding_cache.set(self._embeddings.name, hash, embedding_results)
 
         return embedding_results
 
+    def _get_cached_embeddings(self, text_hashes: List[str]) -> dict[str, List[float]]:
+        """Load the cached embeddings of the given hashes with one `hash IN (...)` query per batch."""
+        unique_hashes = list(dict.fromkeys(text_hashes))
+        cached_embeddings = {}
+        for i in range(0, len(unique_hashes), EMBEDDING_CACHE_LOOKUP_BATCH_SIZE):
+            batch_hashes = unique_hashes[i:i + EMBEDDING_CACHE_LOOKUP_BATCH_SIZE]
+            embeddings = db.session.query(Embedding.hash, Embedding.embedding).filter(
+                Embedding.model_name == self._embeddings.name,
+                Embedding.hash.in_(batch_hashes)
+            ).all()
+
+            for hash, embedding_data in embeddings:
+                cached_embeddings[hash] = Embedding.decode_embedding(embedding_data).tolist()
+
+        return cached_embeddings
+
+    @staticmethod
+    def _save_embeddings(embeddings: List[Embedding]):
+        """Store the embeddings with a single multi-row upsert, rows that already exist are left untouched."""
+        if not embeddings:
+            return
+
+        try:
+            stmt = insert(Embedding).values([
+                {
+                    'model_name': embedding.model_name,
+                    'hash': embedding.hash,
+                    'embedding': embedding.embedding
+                }
+                for embedding in embeddings
+            ]).on_conflict_do_nothing(index_elements=['model_name', 'hash'])
+            db.session.execute(stmt)
+            db.session.commit()
+        except:
+            db.session.rollback()
+            logging.exception('Failed to add embeddings to db')
@@ -0,0 +1,102 @@
+import logging
+import threading
+from typing import List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+from flask import current_app
+
+from extensions.ext_redis import redis_client
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache for query embeddings which sits in front of the `embeddings` table:
+    a bounded in-process LRU, then Redis with a TTL holding the vector as compact float32 bytes.
+    The lookups of the table behind it are counted too, see `record_db_lookup`.
+    """
+
+    TIERS = ('memory', 'redis', 'db')
+
+    def __init__(self, max_size: int, redis_ttl: int):
+        self._lru = LRUCache(maxsize=max_size)
+        self._redis_ttl = redis_ttl
+        self._lock = threading.Lock()
+        self._counters = {f'{tier}_{kind}': 0 for tier in self.TIERS for kind in ('hits', 'misses')}
+
+    def get(self, model_name: str, hash: str) -> Optional[List[float]]:
+        key = self._cache_key(model_name, hash)
+        with self._lock:
+            embedding = self._lru.get(key)
+
+        if embedding is not None:
+            self._incr('memory_hits')
+            return embedding
+        self._incr('memory_misses')
+
+        try:
+            data = redis_client.get(key)
+        except Exception:
+            logging.exception('Failed to get query embedding from redis')
+            data = None
+
+        if data is None:
+            self._incr('redis_misses')
+            return None
+        self._incr('redis_hits')
+
+        embedding = np.frombuffer(data, dtype='<f4').tolist()
+        with self._lock:
+            self._lru[key] = embedding
+
+        return embedding
+
+    def set(self, model_name: str, hash: str, embedding: List[float]):
+        key = self._cache_key(model_name, hash)
+        with self._lock:
+            self._lru[key] = embedding
+
+        try:
+            redis_client.setex(key, self._redis_ttl, np.asarray(embedding, dtype='<f4').tobytes())
+        except Exception:
+            logging.exception('Failed to set query embedding to redis')
+
+    def record_db_lookup(self, hit: bool):
+        """Count a lookup of the `embeddings` table after both tiers missed."""
+        self._incr('db_hits' if hit else 'db_misses')
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_size'] = len(self._lru)
+
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    def _incr(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    @staticmethod
+    def _cache_key(model_name: str, hash: str) -> str:
+        return f'query_embedding:{model_name}:{hash}'
+
+
+_query_embedding_cache: Optional[QueryEmbeddingCache] = None
+_query_embedding_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        with _query_embedding_cache_lock:
+            if _query_embedding_cache is None:
+                _query_embedding_cache = QueryEmbeddingCache(
+                    max_size=int(current_app.config.get('QUERY_EMBEDDING_CACHE_SIZE', 10000)),
+                    redis_ttl=int(current_app.config.get('QUERY_EMBEDDING_CACHE_REDIS_TTL', 86400))
+                )
+
+    return _query_embedding_cache
@@ -0,0 +1,120 @@
+import json
+import queue
+import threading
+from typing import Iterator, Dict
+
+from flask import current_app
+
+from extensions.ext_redis import redis_client
+
+
+class GenerationSubscription:
+    """Subscription of a response to the events of a generation, events are yielded as dicts."""
+
+    def __init__(self, channel: str):
+        self.channel = channel
+
+    def listen(self) -> Iterator[dict]:
+        raise NotImplementedError
+
+    def unsubscribe(self):
+        """Stop receiving events, called by the response once it is done."""
+        raise NotImplementedError
+
+    def close(self):
+        """Make `listen` fail, called when the generation times out."""
+        raise NotImplementedError
+
+
+class RedisGenerationSubscription(GenerationSubscription):
+    """Subscription over redis pub/sub, works when the generation runs in another process."""
+
+    def __init__(self, channel: str):
+        super().__init__(channel)
+        self._pubsub = redis_client.pubsub()
+        self._pubsub.subscribe(channel)
+
+    def listen(self) -> Iterator[dict]:
+        for message in self._pubsub.listen():
+            if message["type"] == "message":
+                yield json.loads(message["data"].decode('utf-8'))
+
+    def unsubscribe(self):
+        try:
+            self._pubsub.unsubscribe(self.channel)
+        except ConnectionError:
+            pass
+
+    def close(self):
+        self._pubsub.close()
+
+
+class LocalGenerationSubscription(GenerationSubscription):
+    """Subscription over an in-memory queue, events published in this process skip redis and json entirely."""
+
+    _CLOSED = object()
+
+    def __init__(self, channel: str):
+        super().__init__(channel)
+        self.stopped = False
+        self._queue = queue.Queue()
+
+        with _local_subscriptions_lock:
+            _local_subscriptions[channel] = self
+
+    def put(self, content: dict):
+        self._queue.put(content)
+
+    def listen(self) -> Iterator[dict]:
+        while True:
+            content = self._queue.get()
+            if content is self._CLOSED:
+                # fail the same way as a closed redis pubsub
+                raise ValueError("I/O operation on closed file.")
+
+            yield content
+
+    def unsubscribe(self):
+        with _local_subscriptions_lock:
+            if _local_subscriptions.get(self.channel) is self:
+                del _local_subscriptions[self.channel]
+
+    def close(self):
+        self.unsubscribe()
+        self._queue.put(self._CLOSED)
+
+
+_local_subscriptions: Dict[str, LocalGenerationSubscription] = {}
+_local_subscriptions_lock = threading.Lock()
+
+
+def subscribe(channel: str) -> GenerationSubscription:
+    """
+    Subscribe to the events of a generation, with an in-memory queue when GENERATION_TRANSPORT is `local`
+    and with redis pub/sub when it is `redis`.
+    """
+    if current_app.config.get('GENERATION_TRANSPORT', 'local') == 'local':
+        return LocalGenerationSubscription(channel)
+
+    return RedisGenerationSubscription(channel)
+
+
+def publish(channel: str, content: dict):
+    """Publish an event to the local subscription of the channel, or to redis when it has none in this process."""
+    subscription = _local_subscriptions.get(channel)
+    if subscription:
+        subscription.put(content)
+    else:
+        redis_client.publish(channel, json.dumps(content))
+
+
+def stop_local(channel: str):
+    """Flag the local subscription of the channel as stopped, so the generation stops without asking redis."""
+    subscription = _local_subscriptions.get(channel)
+    if subscription:
+        subscription.stopped = True
+
+
+def is_stopped_locally(channel: str) -> bool:
+    subscription = _local_subscriptions.get(channel)
+    return subscription is not None and subscription.stopped
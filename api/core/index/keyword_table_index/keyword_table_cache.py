@@ -0,0 +1,78 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+from cachetools import LRUCache
+from flask import current_app
+
+from extensions.ext_redis import redis_client
+
+
+class KeywordTableCache:
+    """
+    Process-local cache of parsed dataset keyword tables. Each entry is tagged with the dataset keyword table
+    version kept in Redis, which is bumped on every save, so stale entries of all processes are invalidated.
+    """
+
+    def __init__(self, max_size: int):
+        self._tables = LRUCache(maxsize=max_size)
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id: str, loader: Callable[[], dict]) -> dict:
+        """
+        Get the keyword table of the dataset, `loader` is called on a cache miss.
+        The returned table is shared and must not be mutated.
+        """
+        # read the version before loading, a concurrent save will bump it and invalidate what is loaded here
+        version = self._get_version(dataset_id)
+        if version is not None:
+            with self._lock:
+                entry = self._tables.get(dataset_id)
+
+            if entry and entry[0] == version:
+                return entry[1]
+
+        keyword_table = loader()
+        if version is not None:
+            with self._lock:
+                self._tables[dataset_id] = (version, keyword_table)
+
+        return keyword_table
+
+    def invalidate(self, dataset_id: str):
+        with self._lock:
+            self._tables.pop(dataset_id, None)
+
+        try:
+            redis_client.incr(self._version_cache_key(dataset_id))
+        except Exception:
+            logging.exception('Failed to bump keyword table version')
+
+    def _get_version(self, dataset_id: str) -> Optional[int]:
+        try:
+            version = redis_client.get(self._version_cache_key(dataset_id))
+        except Exception:
+            logging.exception('Failed to get keyword table version')
+            return None
+
+        return int(version) if version is not None else 0
+
+    @staticmethod
+    def _version_cache_key(dataset_id: str) -> str:
+        return f'dataset_keyword_table_version:{dataset_id}'
+
+
+_keyword_table_cache: Optional[KeywordTableCache] = None
+_keyword_table_cache_lock = threading.Lock()
+
+
+def get_keyword_table_cache() -> KeywordTableCache:
+    global _keyword_table_cache
+    if _keyword_table_cache is None:
+        with _keyword_table_cache_lock:
+            if _keyword_table_cache is None:
+                _keyword_table_cache = KeywordTableCache(
+                    max_size=int(current_app.config.get('KEYWORD_TABLE_CACHE_SIZE', 100))
+                )
+
+    return _keyword_table_cache
@@ -2,13 +2,21 @@ import json
 from collections import defaultdict
 from typing import Any, List, Optional, Dict
 
+from flask import current_app
 from langchain.schema import Document, BaseRetriever
 from pydantic import BaseModel, Field, Extra
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
 
 from core.index.base import BaseIndex
 from core.index.keyword_table_index.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.index.keyword_table_index.keyword_table_cache import get_keyword_table_cache
+from core.index.segment_hydrator import SegmentHydrator
 from extensions.ext_database import db
-from models.dataset import Dataset, DocumentSegment, DatasetKeywordTable
+from models.dataset import Dataset, DocumentSegment, DatasetKeywordTable, DatasetKeywordPosting
+
+# max number of postings written in a single insert
+KEYWORD_POSTING_INSERT_BATCH_SIZE = 1000
 
 
 class KeywordTableConfig(BaseModel):
@@ -21,73 +29,38 @@ class KeywordTableIndex(BaseIndex):
         self._config = config
 
     def create(self, texts: list[Document], **kwargs) -> BaseIndex:
-        keyword_table_handler = JiebaKeywordTableHandler()
-        keyword_table = {}
-        for text in texts:
-            keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
-            self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
-            keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
+        keyword_table = self._extract_keyword_table(texts)
 
-        dataset_keyword_table = DatasetKeywordTable(
-            dataset_id=self.dataset.id,
-            keyword_table=json.dumps({
-                '__type__': 'keyword_table',
-                '__data__': {
-                    "index_id": self.dataset.id,
-                    "summary": None,
-                    "table": {}
-                }
-            }, cls=SetEncoder)
-        )
+        dataset_keyword_table = self._new_dataset_keyword_table()
         db.session.add(dataset_keyword_table)
         db.session.commit()
 
-        self._save_dataset_keyword_table(keyword_table)
+        self._add_to_dataset_keyword_table(keyword_table)
 
         return self
 
     def create_with_collection_name(self, texts: list[Document], collection_name: str, **kwargs) -> BaseIndex:
-        keyword_table_handler = JiebaKeywordTableHandler()
-        keyword_table = {}
-        for text in texts:
-            keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
-            self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
-            keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
-
-        dataset_keyword_table = DatasetKeywordTable(
-            dataset_id=self.dataset.id,
-            keyword_table=json.dumps({
-                '__type__': 'keyword_table',
-                '__data__': {
-                    "index_id": self.dataset.id,
-                    "summary": None,
-                    "table": {}
-                }
-            }, cls=SetEncoder)
-        )
-        db.session.add(dataset_keyword_table)
-        db.session.commit()
-
-        self._save_dataset_keyword_table(keyword_table)
-
-        return self
+        return self.create(texts, **kwargs)
 
     def add_texts(self, texts: list[Document], **kwargs):
-        keyword_table_handler = JiebaKeywordTableHandler()
-
-        keyword_table = self._get_dataset_keyword_table()
-        for text in texts:
-            keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
-            self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
-            keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
-
-        self._save_dataset_keyword_table(keyword_table)
+        keyword_table = self._extract_keyword_table(texts)
+        self._add_to_dataset_keyword_table(keyword_table)
 
     def text_exists(self, id: str) -> bool:
+        if self._is_inverted_index_storage():
+            return db.session.query(DatasetKeywordPosting.id).filter(
+                DatasetKeywordPosting.dataset_id == self.dataset.id,
+                DatasetKeywordPosting.index_node_id == id
+            ).first() is not None
+
         keyword_table = self._get_dataset_keyword_table()
         return id in set.union(*keyword_table.values())
 
     def delete_by_ids(self, ids: list[str]) -> None:
+        if self._is_inverted_index_storage():
+            self._delete_keyword_postings(ids)
+            return
+
         keyword_table = self._get_dataset_keyword_table()
         keyword_table = self._delete_ids_from_keyword_table(keyword_table, ids)
 
@@ -102,10 +75,7 @@ class KeywordTableIndex(BaseIndex):
 
         ids = [segment.index_node_id for segment in segments]
 
-        keyword_table = self._get_dataset_keyword_table()
-        keyword_table = self._delete_ids_from_keyword_table(keyword_table, ids)
-
-        self._save_dataset_keyword_table(keyword_table)
+        self.delete_by_ids(ids)
 
     def get_retriever(self, **kwargs: Any) -> BaseRetriever:
         return KeywordTableRetriever(index=self, **kwargs)
@@ -114,29 +84,27 @@ class KeywordTableIndex(BaseIndex):
             self, query: str,
             **kwargs: Any
     ) -> List[Document]:
-        keyword_table = self._get_dataset_keyword_table()
-
         search_kwargs = kwargs.get('search_kwargs') if kwargs.get('search_kwargs') else {}
         k = search_kwargs.get('k') if search_kwargs.get('k') else 4
 
-        sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table, query, k)
+        if self._is_inverted_index_storage():
+            sorted_chunk_indices = self._retrieve_ids_by_query_from_postings(query, k)
+        else:
+            keyword_table = get_keyword_table_cache().get(self.dataset.id, self._get_dataset_keyword_table)
+            sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table, query, k)
+
+        segments = SegmentHydrator.get_segments(sorted_chunk_indices, dataset_id=self.dataset.id)
 
         documents = []
-        for chunk_index in sorted_chunk_indices:
-            segment = db.session.query(DocumentSegment).filter(
-                DocumentSegment.dataset_id == self.dataset.id,
-                DocumentSegment.index_node_id == chunk_index
-            ).first()
-
-            if segment:
-                documents.append(Document(
-                    page_content=segment.content,
-                    metadata={
-                        "doc_id": chunk_index,
-                        "document_id": segment.document_id,
-                        "dataset_id": segment.dataset_id,
-                    }
-                ))
+        for segment in segments:
+            documents.append(Document(
+                page_content=segment.content,
+                metadata={
+                    "doc_id": segment.index_node_id,
+                    "document_id": segment.document_id,
+                    "dataset_id": segment.dataset_id,
+                }
+            ))
 
         return documents
 
@@ -144,13 +112,112 @@ class KeywordTableIndex(BaseIndex):
         dataset_keyword_table = self.dataset.dataset_keyword_table
         if dataset_keyword_table:
             db.session.delete(dataset_keyword_table)
-            db.session.commit()
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id
+        ).delete()
+        db.session.commit()
+        get_keyword_table_cache().invalidate(self.dataset.id)
 
     def delete_by_group_id(self, group_id: str) -> None:
-        dataset_keyword_table = self.dataset.dataset_keyword_table
-        if dataset_keyword_table:
-            db.session.delete(dataset_keyword_table)
+        self.delete()
+
+    def _extract_keyword_table(self, texts: list[Document]) -> dict:
+        """
+        Extract the keywords of the texts, update the segment keywords and return them as a keyword table.
+        """
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keyword_table = {}
+        for text in texts:
+            keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
+            self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
+            keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
+
+        return keyword_table
+
+    def _add_to_dataset_keyword_table(self, keyword_table: dict):
+        """
+        Merge the keyword table into the dataset keyword table, as postings rows for the inverted index storage
+        or by rewriting the whole json table.
+        """
+        if self._is_inverted_index_storage():
+            self._add_keyword_postings(keyword_table)
+            return
+
+        dataset_keyword_table = self._get_dataset_keyword_table()
+        for keyword, node_idxs in keyword_table.items():
+            dataset_keyword_table.setdefault(keyword, set()).update(node_idxs)
+
+        self._save_dataset_keyword_table(dataset_keyword_table)
+
+    def _is_inverted_index_storage(self) -> bool:
+        # only the storage type column is loaded, the json table may be megabytes large
+        storage_type = db.session.query(DatasetKeywordTable.storage_type).filter(
+            DatasetKeywordTable.dataset_id == self.dataset.id
+        ).scalar()
+        if storage_type is None:
+            dataset_keyword_table = self._new_dataset_keyword_table()
+            db.session.add(dataset_keyword_table)
             db.session.commit()
+            storage_type = dataset_keyword_table.storage_type
+
+        return storage_type == 'inverted_index'
+
+    def _new_dataset_keyword_table(self) -> DatasetKeywordTable:
+        return DatasetKeywordTable(
+            dataset_id=self.dataset.id,
+            keyword_table=json.dumps({
+                '__type__': 'keyword_table',
+                '__data__': {
+                    "index_id": self.dataset.id,
+                    "summary": None,
+                    "table": {}
+                }
+            }, cls=SetEncoder),
+            storage_type=current_app.config.get('KEYWORD_TABLE_STORAGE_TYPE', 'json')
+        )
+
+    def _add_keyword_postings(self, keyword_table: dict):
+        postings = [
+            {
+                'dataset_id': self.dataset.id,
+                'keyword': keyword,
+                'index_node_id': node_idx
+            }
+            for keyword, node_idxs in keyword_table.items() if len(keyword) <= 255
+            for node_idx in node_idxs
+        ]
+
+        for i in range(0, len(postings), KEYWORD_POSTING_INSERT_BATCH_SIZE):
+            stmt = insert(DatasetKeywordPosting).values(
+                postings[i:i + KEYWORD_POSTING_INSERT_BATCH_SIZE]
+            ).on_conflict_do_nothing(index_elements=['dataset_id', 'keyword', 'index_node_id'])
+            db.session.execute(stmt)
+        db.session.commit()
+
+    def _delete_keyword_postings(self, ids: list[str]):
+        if not ids:
+            return
+
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.index_node_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def _retrieve_ids_by_query_from_postings(self, query: str, k: int = 4):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = keyword_table_handler.extract_keywords(query)
+        if not keywords:
+            return []
+
+        # go through text chunks in order of most matching keywords
+        match_count = func.count(DatasetKeywordPosting.keyword)
+        results = db.session.query(DatasetKeywordPosting.index_node_id, match_count).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.keyword.in_(list(keywords))
+        ).group_by(DatasetKeywordPosting.index_node_id).order_by(match_count.desc()).limit(k).all()
+
+        return [index_node_id for index_node_id, _ in results]
 
     def _save_dataset_keyword_table(self, keyword_table):
         keyword_table_dict = {
@@ -163,24 +230,16 @@ class KeywordTableIndex(BaseIndex):
         }
         self.dataset.dataset_keyword_table.keyword_table = json.dumps(keyword_table_dict, cls=SetEncoder)
         db.session.commit()
+        get_keyword_table_cache().invalidate(self.dataset.id)
 
     def _get_dataset_keyword_table(self) -> Optional[dict]:
         dataset_keyword_table = self.dataset.dataset_keyword_table
         if dataset_keyword_table:
-            if dataset_keyword_table.keyword_table_dict:
-                return dataset_keyword_table.keyword_table_dict['__data__']['table']
+            keyword_table_dict = dataset_keyword_table.keyword_table_dict
+            if keyword_table_dict:
+                return keyword_table_dict['__data__']['table']
         else:
-            dataset_keyword_table = DatasetKeywordTable(
-                dataset_id=self.dataset.id,
-                keyword_table=json.dumps({
-                    '__type__': 'keyword_table',
-                    '__data__': {
-                        "index_id": self.dataset.id,
-                        "summary": None,
-                        "table": {}
-                    }
-                }, cls=SetEncoder)
-            )
+            dataset_keyword_table = self._new_dataset_keyword_table()
             db.session.add(dataset_keyword_table)
             db.session.commit()
 
@@ -218,7 +277,7 @@ class KeywordTableIndex(BaseIndex):
 
         # go through text chunks in order of most matching keywords
         chunk_indices_count: Dict[str, int] = defaultdict(int)
-        keywords = [keyword for keyword in keywords if keyword in set(keyword_table.keys())]
+        keywords = [keyword for keyword in keywords if keyword in keyword_table]
         for keyword in keywords:
             for node_id in keyword_table[keyword]:
                 chunk_indices_count[node_id] += 1
@@ -241,14 +300,13 @@ class KeywordTableIndex(BaseIndex):
             db.session.commit()
 
     def create_segment_keywords(self, node_id: str, keywords: List[str]):
-        keyword_table = self._get_dataset_keyword_table()
         self._update_segment_keywords(self.dataset.id, node_id, keywords)
-        keyword_table = self._add_text_to_keyword_table(keyword_table, node_id, keywords)
-        self._save_dataset_keyword_table(keyword_table)
+        keyword_table = self._add_text_to_keyword_table({}, node_id, keywords)
+        self._add_to_dataset_keyword_table(keyword_table)
 
     def multi_create_segment_keywords(self, pre_segment_data_list: list):
         keyword_table_handler = JiebaKeywordTableHandler()
-        keyword_table = self._get_dataset_keyword_table()
+        keyword_table = {}
         for pre_segment_data in pre_segment_data_list:
             segment = pre_segment_data['segment']
             if pre_segment_data['keywords']:
@@ -260,12 +318,11 @@ class KeywordTableIndex(BaseIndex):
                                                                   self._config.max_keywords_per_chunk)
                 segment.keywords = list(keywords)
                 keyword_table = self._add_text_to_keyword_table(keyword_table, segment.index_node_id, list(keywords))
-        self._save_dataset_keyword_table(keyword_table)
+        self._add_to_dataset_keyword_table(keyword_table)
 
     def update_segment_keywords_index(self, node_id: str, keywords: List[str]):
-        keyword_table = self._get_dataset_keyword_table()
-        keyword_table = self._add_text_to_keyword_table(keyword_table, node_id, keywords)
-        self._save_dataset_keyword_table(keyword_table)
+        keyword_table = self._add_text_to_keyword_table({}, node_id, keywords)
+        self._add_to_dataset_keyword_table(keyword_table)
 
 
 class KeywordTableRetriever(BaseRetriever, BaseModel):
@@ -0,0 +1,95 @@
+from typing import List, Optional, Dict, Tuple
+
+from extensions.ext_database import db
+from models.dataset import Dataset, DocumentSegment, Document
+
+
+class SegmentHydrator:
+    """
+    Load the segments, documents and datasets of a retrieval result set in a constant number of queries.
+    """
+
+    @classmethod
+    def get_segment_map(cls, index_node_ids: List[str], dataset_id: Optional[str] = None,
+                        available_only: bool = False) -> Dict[str, DocumentSegment]:
+        """
+        Get the segments of the index node ids with one query, keyed by index node id.
+
+        :param index_node_ids: index node ids of the retrieved documents
+        :param dataset_id: restrict the segments to the dataset
+        :param available_only: only return completed and enabled segments
+        """
+        if not index_node_ids:
+            return {}
+
+        filters = [DocumentSegment.index_node_id.in_(list(set(index_node_ids)))]
+        if dataset_id:
+            filters.append(DocumentSegment.dataset_id == dataset_id)
+        if available_only:
+            filters.extend([
+                DocumentSegment.completed_at.isnot(None),
+                DocumentSegment.status == 'completed',
+                DocumentSegment.enabled == True
+            ])
+
+        segment_map = {}
+        for segment in db.session.query(DocumentSegment).filter(*filters).all():
+            segment_map.setdefault(segment.index_node_id, segment)
+
+        return segment_map
+
+    @classmethod
+    def get_segments(cls, index_node_ids: List[str], dataset_id: Optional[str] = None,
+                     available_only: bool = False) -> List[DocumentSegment]:
+        """
+        Get the segments of the index node ids with one query, in the order of the index node ids.
+        Index node ids without a matching segment are skipped.
+        """
+        segment_map = cls.get_segment_map(index_node_ids, dataset_id, available_only)
+
+        return [segment_map[index_node_id] for index_node_id in dict.fromkeys(index_node_ids)
+                if index_node_id in segment_map]
+
+    @classmethod
+    def get_documents(cls, segments: List[DocumentSegment], available_only: bool = True) -> Dict[str, Document]:
+        """
+        Get the documents of the segments with one query, keyed by document id.
+
+        :param segments: segments of the retrieved documents
+        :param available_only: only return enabled and not archived documents
+        """
+        document_ids = list({segment.document_id for segment in segments})
+        if not document_ids:
+            return {}
+
+        filters = [Document.id.in_(document_ids)]
+        if available_only:
+            filters.extend([
+                Document.enabled == True,
+                Document.archived == False
+            ])
+
+        documents = db.session.query(Document).filter(*filters).all()
+
+        return {document.id: document for document in documents}
+
+    @classmethod
+    def get_datasets(cls, segments: List[DocumentSegment]) -> Dict[str, Dataset]:
+        """
+        Get the datasets of the segments with one query, keyed by dataset id.
+        """
+        dataset_ids = list({segment.dataset_id for segment in segments})
+        if not dataset_ids:
+            return {}
+
+        datasets = db.session.query(Dataset).filter(Dataset.id.in_(dataset_ids)).all()
+
+        return {dataset.id: dataset for dataset in datasets}
+
+    @classmethod
+    def get_segment_sources(cls, segments: List[DocumentSegment]) \
+            -> Tuple[Dict[str, Dataset], Dict[str, Document]]:
+        """
+        Get the datasets and the documents of the segments with one query each.
+        """
+        return cls.get_datasets(segments), cls.get_documents(segments)
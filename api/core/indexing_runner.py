@@ -5,7 +5,10 @@ import re
 import threading
 import time
 import uuid
-from typing import Optional, List, cast
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from itertools import islice
+from typing import Optional, List, cast, Tuple, Iterable, Iterator, Callable
 
 from flask import current_app, Flask
 from flask_login import current_user
@@ -16,10 +19,12 @@ from sqlalchemy.orm.exc import ObjectDeletedError
 from core.data_loader.file_extractor import FileExtractor
 from core.data_loader.loader.notion import NotionLoader
 from core.docstore.dataset_docstore import DatesetDocumentStore
+from core.embedding.cached_embedding import CacheEmbedding
 from core.generator.llm_generator import LLMGenerator
 from core.index.index import IndexBuilder
 from core.model_providers.error import ProviderTokenNotInitError
 from core.model_providers.model_factory import ModelFactory
+from core.model_providers.models.embedding.base import BaseEmbedding
 from core.model_providers.models.entity.message import MessageType
 from core.spiltter.fixed_text_splitter import FixedRecursiveCharacterTextSplitter
 from extensions.ext_database import db
@@ -30,6 +35,8 @@ from models.dataset import Document as DatasetDocument
 from models.dataset import Dataset, DocumentSegment, DatasetProcessRule
 from models.model import UploadFile
 from models.source import DataSourceBinding
+from services.dataset_counter_service import DatasetCounterService
+from services.document_progress_service import DocumentProgressService
 
 
 class IndexingRunner:
@@ -54,12 +61,22 @@ class IndexingRunner:
                     filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id). \
                     first()
 
-                # load file
-                text_docs = self._load_data(dataset_document)
-
                 # get splitter
                 splitter = self._get_splitter(processing_rule)
 
+                if current_app.config.get('INDEXING_STREAMING_ENABLED'):
+                    # load, split and index the file as a stream
+                    self._step_split_and_build_index_lazily(
+                        splitter=splitter,
+                        dataset=dataset,
+                        dataset_document=dataset_document,
+                        processing_rule=processing_rule
+                    )
+                    continue
+
+                # load file
+                text_docs = self._load_data(dataset_document)
+
                 # split to documents
                 documents = self._step_split(
                     text_docs=text_docs,
@@ -109,9 +126,6 @@ class IndexingRunner:
             db.session.delete(document_segments)
             db.session.commit()
 
-            # load file
-            text_docs = self._load_data(dataset_document)
-
             # get the process rule
             processing_rule = db.session.query(DatasetProcessRule). \
                 filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id). \
@@ -120,6 +134,19 @@ class IndexingRunner:
             # get splitter
             splitter = self._get_splitter(processing_rule)
 
+            if current_app.config.get('INDEXING_STREAMING_ENABLED'):
+                # load, split and index the file as a stream
+                self._step_split_and_build_index_lazily(
+                    splitter=splitter,
+                    dataset=dataset,
+                    dataset_document=dataset_document,
+                    processing_rule=processing_rule
+                )
+                return
+
+            # load file
+            text_docs = self._load_data(dataset_document)
+
             # split to documents
             documents = self._step_split(
                 text_docs=text_docs,
@@ -421,6 +448,38 @@ class IndexingRunner:
 
         return text_docs
 
+    def _load_data_lazily(self, dataset_document: DatasetDocument, load_stats: dict) -> Iterator[Document]:
+        """
+        Yield the text documents of the data source as they are loaded, `load_stats['word_count']`
+        is accumulated along the way.
+        """
+        if dataset_document.data_source_type not in ["upload_file", "notion_import"]:
+            return
+
+        data_source_info = dataset_document.data_source_info_dict
+        text_docs = []
+        if dataset_document.data_source_type == 'upload_file':
+            if not data_source_info or 'upload_file_id' not in data_source_info:
+                raise ValueError("no upload file found")
+
+            file_detail = db.session.query(UploadFile). \
+                filter(UploadFile.id == data_source_info['upload_file_id']). \
+                one_or_none()
+
+            if file_detail:
+                text_docs = FileExtractor.lazy_load(file_detail, is_automatic=False)
+        elif dataset_document.data_source_type == 'notion_import':
+            loader = NotionLoader.from_document(dataset_document)
+            text_docs = loader.lazy_load()
+
+        for text_doc in text_docs:
+            load_stats['word_count'] += len(text_doc.page_content)
+            # remove invalid symbol
+            text_doc.page_content = self.filter_string(text_doc.page_content)
+            text_doc.metadata['document_id'] = dataset_document.id
+            text_doc.metadata['dataset_id'] = dataset_document.dataset_id
+            yield text_doc
+
     def filter_string(self, text):
         text = re.sub(r'<\|', '<', text)
         text = re.sub(r'\|>', '>', text)
@@ -502,17 +561,112 @@ class IndexingRunner:
                 DocumentSegment.indexing_at: datetime.datetime.utcnow()
             }
         )
+        DocumentProgressService.refresh_progress(dataset_document.id)
 
         return documents
 
+    def _step_split_and_build_index_lazily(self, splitter: TextSplitter, dataset: Dataset,
+                                           dataset_document: DatasetDocument,
+                                           processing_rule: DatasetProcessRule) -> None:
+        """
+        Load, clean, split and index the document as a stream. Segments flow into the docstore and the index
+        in bounded chunks, so peak memory is proportional to the chunk size instead of the document size.
+        """
+        load_stats = {'word_count': 0}
+        text_docs = self._load_data_lazily(dataset_document, load_stats)
+        documents = self._split_to_documents_lazily(
+            text_docs=text_docs,
+            splitter=splitter,
+            processing_rule=processing_rule,
+            tenant_id=dataset.tenant_id,
+            document_form=dataset_document.doc_form,
+            document_language=dataset_document.doc_language
+        )
+
+        doc_store = DatesetDocumentStore(
+            dataset=dataset,
+            user_id=dataset_document.created_by,
+            document_id=dataset_document.id
+        )
+
+        def prepare_chunk(chunk_documents: List[Document]):
+            # add document segments and update their status to indexing
+            doc_store.add_documents(chunk_documents)
+
+            document_ids = [document.metadata['doc_id'] for document in chunk_documents]
+            db.session.query(DocumentSegment).filter(
+                DocumentSegment.document_id == dataset_document.id,
+                DocumentSegment.index_node_id.in_(document_ids)
+            ).update({
+                DocumentSegment.status: "indexing",
+                DocumentSegment.indexing_at: datetime.datetime.utcnow()
+            })
+            db.session.commit()
+            DocumentProgressService.refresh_progress(dataset_document.id)
+
+        # update document status to indexing, parsing, cleaning and splitting run along with the indexing
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="indexing"
+        )
+
+        indexing_start_at = time.perf_counter()
+        tokens = self._index_documents(
+            dataset=dataset,
+            dataset_document=dataset_document,
+            documents=documents,
+            prepare_chunk=prepare_chunk
+        )
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        cur_time = datetime.datetime.utcnow()
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.word_count: load_stats['word_count'],
+                DatasetDocument.parsing_completed_at: cur_time,
+                DatasetDocument.cleaning_completed_at: cur_time,
+                DatasetDocument.splitting_completed_at: cur_time,
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: cur_time,
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+            }
+        )
+
     def _split_to_documents(self, text_docs: List[Document], splitter: TextSplitter,
                             processing_rule: DatasetProcessRule, tenant_id: str,
                             document_form: str, document_language: str) -> List[Document]:
         """
         Split the text documents into nodes.
         """
-        all_documents = []
-        all_qa_documents = []
+        all_documents = list(self._split_text_documents(text_docs, splitter, processing_rule))
+        # processing qa document
+        if document_form == 'qa_model':
+            all_qa_documents = []
+            for i in range(0, len(all_documents), 10):
+                all_qa_documents.extend(
+                    self._format_qa_documents(tenant_id, all_documents[i:i + 10], document_language)
+                )
+            return all_qa_documents
+        return all_documents
+
+    def _split_to_documents_lazily(self, text_docs: Iterable[Document], splitter: TextSplitter,
+                                   processing_rule: DatasetProcessRule, tenant_id: str,
+                                   document_form: str, document_language: str) -> Iterator[Document]:
+        """
+        Split the text documents into nodes as they are loaded.
+        """
+        split_documents = self._split_text_documents(text_docs, splitter, processing_rule)
+        if document_form == 'qa_model':
+            for sub_documents in self._batch_documents(split_documents, 10):
+                yield from self._format_qa_documents(tenant_id, sub_documents, document_language)
+        else:
+            yield from split_documents
+
+    def _split_text_documents(self, text_docs: Iterable[Document], splitter: TextSplitter,
+                              processing_rule: DatasetProcessRule) -> Iterator[Document]:
         for text_doc in text_docs:
             # document clean
             document_text = self._document_clean(text_doc.page_content, processing_rule)
@@ -520,7 +674,6 @@ class IndexingRunner:
 
             # parse document to nodes
             documents = splitter.split_documents([text_doc])
-            split_documents = []
             for document_node in documents:
 
                 if document_node.page_content.strip():
@@ -528,24 +681,22 @@ class IndexingRunner:
                     hash = helper.generate_text_hash(document_node.page_content)
                     document_node.metadata['doc_id'] = doc_id
                     document_node.metadata['doc_hash'] = hash
-                    split_documents.append(document_node)
-            all_documents.extend(split_documents)
-        # processing qa document
-        if document_form == 'qa_model':
-            for i in range(0, len(all_documents), 10):
-                threads = []
-                sub_documents = all_documents[i:i + 10]
-                for doc in sub_documents:
-                    document_format_thread = threading.Thread(target=self.format_qa_document, kwargs={
-                        'flask_app': current_app._get_current_object(),
-                        'tenant_id': tenant_id, 'document_node': doc, 'all_qa_documents': all_qa_documents,
-                        'document_language': document_language})
-                    threads.append(document_format_thread)
-                    document_format_thread.start()
-                for thread in threads:
-                    thread.join()
-            return all_qa_documents
-        return all_documents
+                    yield document_node
+
+    def _format_qa_documents(self, tenant_id: str, documents: List[Document],
+                             document_language: str) -> List[Document]:
+        all_qa_documents = []
+        threads = []
+        for doc in documents:
+            document_format_thread = threading.Thread(target=self.format_qa_document, kwargs={
+                'flask_app': current_app._get_current_object(),
+                'tenant_id': tenant_id, 'document_node': doc, 'all_qa_documents': all_qa_documents,
+                'document_language': document_language})
+            threads.append(document_format_thread)
+            document_format_thread.start()
+        for thread in threads:
+            thread.join()
+        return all_qa_documents
 
     def format_qa_document(self, flask_app: Flask, tenant_id: str, document_node, all_qa_documents, document_language):
         format_documents = []
@@ -646,6 +797,31 @@ class IndexingRunner:
         """
         Build the index for the document.
         """
+        indexing_start_at = time.perf_counter()
+        tokens = self._index_documents(
+            dataset=dataset,
+            dataset_document=dataset_document,
+            documents=documents
+        )
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.utcnow(),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+            }
+        )
+
+    def _index_documents(self, dataset: Dataset, dataset_document: DatasetDocument, documents: Iterable[Document],
+                         prepare_chunk: Optional[Callable[[List[Document]], None]] = None) -> int:
+        """
+        Write the documents to the vector index and keyword table chunk by chunk, return the embedding tokens.
+        `documents` may be a lazy iterable, `prepare_chunk` is called on each chunk before it is embedded.
+        """
         vector_index = IndexBuilder.get_index(dataset, 'high_quality')
         keyword_table_index = IndexBuilder.get_index(dataset, 'economy')
         embedding_model = None
@@ -656,52 +832,109 @@ class IndexingRunner:
                 model_name=dataset.embedding_model
             )
 
-        # chunk nodes by chunk size
-        indexing_start_at = time.perf_counter()
+        # chunk nodes by chunk size, embedding of the next chunks runs in the worker pool
+        # while the current chunk is written to the vector store and keyword table
+        max_workers, chunk_size = self._get_indexing_concurrency(embedding_model)
         tokens = 0
-        chunk_size = 100
-        for i in range(0, len(documents), chunk_size):
-            # check document is paused
-            self._check_document_paused_status(dataset_document.id)
-            chunk_documents = documents[i:i + chunk_size]
-            if dataset.indexing_technique == 'high_quality' or embedding_model:
-                tokens += sum(
-                    embedding_model.get_num_tokens(document.page_content)
-                    for document in chunk_documents
-                )
+        flask_app = current_app._get_current_object()
+        chunks = self._batch_documents(documents, chunk_size)
+        pending_chunks: deque[Tuple[List[Document], Future]] = deque()
 
-            # save vector index
-            if vector_index:
-                vector_index.add_texts(chunk_documents)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def submit_next_chunk():
+                next_chunk_documents = next(chunks, None)
+                if next_chunk_documents is not None:
+                    if prepare_chunk:
+                        prepare_chunk(next_chunk_documents)
 
-            # save keyword index
-            keyword_table_index.add_texts(chunk_documents)
+                    pending_chunks.append((next_chunk_documents, executor.submit(
+                        self._embed_chunk, flask_app, embedding_model, next_chunk_documents
+                    )))
 
-            document_ids = [document.metadata['doc_id'] for document in chunk_documents]
-            db.session.query(DocumentSegment).filter(
-                DocumentSegment.document_id == dataset_document.id,
-                DocumentSegment.index_node_id.in_(document_ids),
-                DocumentSegment.status == "indexing"
-            ).update({
-                DocumentSegment.status: "completed",
-                DocumentSegment.enabled: True,
-                DocumentSegment.completed_at: datetime.datetime.utcnow()
-            })
+            try:
+                # backpressure: at most `max_workers` chunks are embedded ahead of the chunk being written
+                for _ in range(max_workers):
+                    submit_next_chunk()
+
+                while pending_chunks:
+                    # check document is paused
+                    self._check_document_paused_status(dataset_document.id)
+                    chunk_documents, future = pending_chunks.popleft()
+                    tokens += future.result()
+                    submit_next_chunk()
+
+                    # save vector index
+                    if vector_index:
+                        vector_index.add_texts(chunk_documents)
+
+                    # save keyword index
+                    keyword_table_index.add_texts(chunk_documents)
+
+                    document_ids = [document.metadata['doc_id'] for document in chunk_documents]
+                    db.session.query(DocumentSegment).filter(
+                        DocumentSegment.document_id == dataset_document.id,
+                        DocumentSegment.index_node_id.in_(document_ids),
+                        DocumentSegment.status == "indexing"
+                    ).update({
+                        DocumentSegment.status: "completed",
+                        DocumentSegment.enabled: True,
+                        DocumentSegment.completed_at: datetime.datetime.utcnow()
+                    })
+
+                    db.session.commit()
+                    DocumentProgressService.refresh_progress(dataset_document.id)
+            except BaseException:
+                for _, future in pending_chunks:
+                    future.cancel()
+                raise
+
+        return tokens
+
+    @staticmethod
+    def _batch_documents(documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+        iterator = iter(documents)
+        while batch := list(islice(iterator, batch_size)):
+            yield batch
+
+    def _embed_chunk(self, flask_app: Flask, embedding_model: Optional[BaseEmbedding],
+                     chunk_documents: List[Document]) -> int:
+        """
+        Embed the chunk into the embedding cache ahead of the vector store write, return the chunk tokens.
+        """
+        if not embedding_model:
+            return 0
 
-            db.session.commit()
+        with flask_app.app_context():
+            CacheEmbedding(embedding_model).embed_documents([document.page_content for document in chunk_documents])
 
-        indexing_end_at = time.perf_counter()
+            return sum(
+                embedding_model.get_num_tokens(document.page_content)
+                for document in chunk_documents
+            )
 
-        # update document status to completed
-        self._update_document_index_status(
-            document_id=dataset_document.id,
-            after_indexing_status="completed",
-            extra_update_params={
-                DatasetDocument.tokens: tokens,
-                DatasetDocument.completed_at: datetime.datetime.utcnow(),
-                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
-            }
-        )
+    def _get_indexing_concurrency(self, embedding_model: Optional[BaseEmbedding]) -> Tuple[int, int]:
+        """
+        Get the embedding worker count and chunk size, which can be overridden per model provider
+        by INDEXING_EMBEDDING_PROVIDER_SETTINGS, e.g. `openai:8:200,xinference:2:32`.
+        """
+        max_workers = int(current_app.config.get('INDEXING_EMBEDDING_MAX_WORKERS', 4))
+        chunk_size = int(current_app.config.get('INDEXING_EMBEDDING_BATCH_SIZE', 100))
+
+        provider_settings = current_app.config.get('INDEXING_EMBEDDING_PROVIDER_SETTINGS')
+        if embedding_model and provider_settings:
+            for provider_setting in provider_settings.split(','):
+                try:
+                    provider_name, provider_max_workers, provider_chunk_size = provider_setting.strip().split(':')
+                    provider_max_workers, provider_chunk_size = int(provider_max_workers), int(provider_chunk_size)
+                except ValueError:
+                    logging.warning('Invalid indexing embedding provider setting: {}'.format(provider_setting))
+                    continue
+
+                if provider_name == embedding_model.model_provider.provider_name:
+                    max_workers, chunk_size = provider_max_workers, provider_chunk_size
+                    break
+
+        return max(max_workers, 1), max(chunk_size, 1)
 
     def _check_document_paused_status(self, document_id: str):
         indexing_cache_key = 'document_{}_is_paused'.format(document_id)
@@ -731,6 +964,9 @@ class IndexingRunner:
         DatasetDocument.query.filter_by(id=document_id).update(update_params)
         db.session.commit()
 
+        if after_indexing_status == 'completed':
+            DatasetCounterService.refresh_counters(document.dataset_id)
+
     def _update_segments_by_document(self, dataset_document_id: str, update_params: dict) -> None:
         """
         Update the document segment by document id.
@@ -0,0 +1,117 @@
+import bisect
+import itertools
+import logging
+from typing import List, Tuple, Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from core.model_providers.models.entity.message import PromptMessage
+from core.model_providers.models.llm.base import BaseLLM
+from extensions.ext_database import db
+from models.model import Message
+
+
+class HistoryTokenPruner:
+    """
+    Prune the oldest messages of a conversation history to fit a token limit.
+
+    Each prompt message is tokenized once, on its own, and the counts of the messages generated by the same model
+    are kept on `Message`, so later turns of the conversation do not tokenize them again.
+    The cut point is found by a binary search over the prefix sums of the counts.
+    """
+
+    def __init__(self, model_instance: BaseLLM):
+        self.model_instance = model_instance
+        self._num_base_tokens: Optional[int] = None
+
+    @property
+    def num_base_tokens(self) -> int:
+        """Tokens of a prompt without messages, e.g. the reply priming of chat models."""
+        if self._num_base_tokens is None:
+            self._num_base_tokens = self.model_instance.get_num_tokens([])
+
+        return self._num_base_tokens
+
+    def get_num_message_tokens(self, prompt_message: PromptMessage) -> int:
+        """Tokens a message adds to a prompt."""
+        return max(self.model_instance.get_num_tokens([prompt_message]) - self.num_base_tokens, 0)
+
+    def get_history_token_counts(self, history: List[Tuple[Message, PromptMessage, PromptMessage]]) -> List[int]:
+        """
+        Get the token counts of the query and answer prompt messages of each message, in order.
+
+        :param history: messages with their query and answer prompt messages
+        """
+        token_counts = []
+        counted_message_tokens = {}
+        for message, query_prompt_message, answer_prompt_message in history:
+            is_message_model = self._is_message_model(message)
+            if is_message_model and message.history_query_tokens is not None \
+                    and message.history_answer_tokens is not None:
+                token_counts.extend([message.history_query_tokens, message.history_answer_tokens])
+                continue
+
+            query_tokens = self.get_num_message_tokens(query_prompt_message)
+            answer_tokens = self.get_num_message_tokens(answer_prompt_message)
+            token_counts.extend([query_tokens, answer_tokens])
+
+            if is_message_model:
+                counted_message_tokens[message.id] = (query_tokens, answer_tokens)
+
+        if counted_message_tokens:
+            self._save_history_token_counts(history, counted_message_tokens)
+
+        return token_counts
+
+    def prune(self, prompt_messages: List[PromptMessage], token_counts: List[int],
+              max_token_limit: int) -> List[PromptMessage]:
+        """
+        Drop the oldest prompt messages until the rest fits `max_token_limit`.
+
+        :param prompt_messages: prompt messages, oldest first
+        :param token_counts: token counts of the prompt messages
+        :param max_token_limit: max tokens of the kept prompt messages
+        """
+        prefix_sums = list(itertools.accumulate(token_counts, initial=0))
+        excess_tokens = self.num_base_tokens + prefix_sums[-1] - max_token_limit
+        if excess_tokens <= 0:
+            return prompt_messages
+
+        # the first cut dropping at least the excess tokens, all messages are dropped when none does
+        cut = bisect.bisect_left(prefix_sums, excess_tokens)
+        return prompt_messages[cut:]
+
+    def _save_history_token_counts(self, history: List[Tuple[Message, PromptMessage, PromptMessage]],
+                                   counted_message_tokens: dict):
+        """
+        Keep the counted tokens on the messages with one UPDATE on a short transaction of its own,
+        so no row locks are held by the request while the answer is generated.
+        The loaded messages get the counts without being marked dirty.
+        """
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(update(Message).where(Message.id.in_(list(counted_message_tokens))).values(
+                    history_query_tokens=case(
+                        {message_id: tokens[0] for message_id, tokens in counted_message_tokens.items()},
+                        value=Message.id
+                    ),
+                    history_answer_tokens=case(
+                        {message_id: tokens[1] for message_id, tokens in counted_message_tokens.items()},
+                        value=Message.id
+                    )
+                ))
+        except Exception:
+            # the counts are only kept to skip tokenizing, they are counted again on the next turn
+            logging.exception('Failed to save history token counts')
+            return
+
+        for message, _, _ in history:
+            if message.id in counted_message_tokens:
+                query_tokens, answer_tokens = counted_message_tokens[message.id]
+                set_committed_value(message, 'history_query_tokens', query_tokens)
+                set_committed_value(message, 'history_answer_tokens', answer_tokens)
+
+    def _is_message_model(self, message: Message) -> bool:
+        return message.model_provider == self.model_instance.model_provider.provider_name \
+            and message.model_id == self.model_instance.name
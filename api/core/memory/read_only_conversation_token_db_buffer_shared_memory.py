@@ -4,6 +4,7 @@ from langchain.memory.chat_memory import BaseChatMemory
 from langchain.schema import get_buffer_string, BaseMessage
 
 from core.file.message_file_parser import MessageFileParser
+from core.memory.history_token_pruner import HistoryTokenPruner
 from core.model_providers.models.entity.message import PromptMessage, MessageType, to_lc_messages
 from core.model_providers.models.llm.base import BaseLLM
 from extensions.ext_database import db
@@ -33,7 +34,7 @@ class ReadOnlyConversationTokenDBBufferSharedMemory(BaseChatMemory):
         messages = list(reversed(messages))
         message_file_parser = MessageFileParser(tenant_id=app_model.tenant_id, app_id=self.conversation.app_id)
 
-        chat_messages: List[PromptMessage] = []
+        history = []
         for message in messages:
             files = message.message_files
             if files:
@@ -42,26 +43,31 @@ class ReadOnlyConversationTokenDBBufferSharedMemory(BaseChatMemory):
                 )
 
                 prompt_message_files = [file_obj.prompt_message_file for file_obj in file_objs]
-                chat_messages.append(PromptMessage(
+                query_message = PromptMessage(
                     content=message.query,
                     type=MessageType.USER,
                     files=prompt_message_files
-                ))
+                )
             else:
-                chat_messages.append(PromptMessage(content=message.query, type=MessageType.USER))
+                query_message = PromptMessage(content=message.query, type=MessageType.USER)
 
-            chat_messages.append(PromptMessage(content=message.answer, type=MessageType.ASSISTANT))
+            answer_message = PromptMessage(content=message.answer, type=MessageType.ASSISTANT)
+            history.append((message, query_message, answer_message))
 
-        if not chat_messages:
+        if not history:
             return []
 
+        chat_messages: List[PromptMessage] = []
+        for _, query_message, answer_message in history:
+            chat_messages.extend([query_message, answer_message])
+
         # prune the chat message if it exceeds the max token limit
-        curr_buffer_length = self.model_instance.get_num_tokens(chat_messages)
-        if curr_buffer_length > self.max_token_limit:
-            pruned_memory = []
-            while curr_buffer_length > self.max_token_limit and chat_messages:
-                pruned_memory.append(chat_messages.pop(0))
-                curr_buffer_length = self.model_instance.get_num_tokens(chat_messages)
+        pruner = HistoryTokenPruner(self.model_instance)
+        chat_messages = pruner.prune(
+            prompt_messages=chat_messages,
+            token_counts=pruner.get_history_token_counts(history),
+            max_token_limit=self.max_token_limit
+        )
 
         return to_lc_messages(chat_messages)
 
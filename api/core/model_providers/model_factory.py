@@ -4,6 +4,7 @@ from langchain.callbacks.base import Callbacks
 
 from core.model_providers.error import ProviderTokenNotInitError, LLMBadRequestError
 from core.model_providers.model_provider_factory import ModelProviderFactory, DEFAULT_MODELS
+from core.model_providers.model_resolution_cache import ModelResolutionCache
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.embedding.base import BaseEmbedding
 from core.model_providers.models.entity.model_params import ModelKwargs, ModelType
@@ -251,6 +252,14 @@ class ModelFactory:
         :param model_type:
         :return:
         """
+        return ModelResolutionCache.get_or_resolve(
+            tenant_id,
+            ('default_model', model_type.value),
+            lambda: cls._get_default_model(tenant_id, model_type)
+        )
+
+    @classmethod
+    def _get_default_model(cls, tenant_id: str, model_type: ModelType) -> TenantDefaultModel:
         # get default model
         default_model = db.session.query(TenantDefaultModel) \
             .filter(
@@ -332,4 +341,6 @@ class ModelFactory:
             db.session.add(default_model)
             db.session.commit()
 
+        ModelResolutionCache.invalidate(tenant_id)
+
         return default_model
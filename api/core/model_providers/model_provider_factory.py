@@ -1,8 +1,11 @@
+import logging
 from typing import Type
 
 from sqlalchemy.exc import IntegrityError
 
+from core.model_providers.model_resolution_cache import ModelResolutionCache
 from core.model_providers.models.entity.model_params import ModelType
+from core.model_providers.provider_usage_accounting import ProviderUsageAccounting
 from core.model_providers.providers.base import BaseModelProvider
 from core.model_providers.rules import provider_rules
 from extensions.ext_database import db
@@ -113,14 +116,18 @@ class ModelProviderFactory:
         :param model_provider_name:
         :return:
         """
-        # get preferred provider
-        preferred_provider = cls._get_preferred_provider(tenant_id, model_provider_name)
-        if not preferred_provider or not preferred_provider.is_valid:
-            return None
+        def resolve():
+            # get preferred provider
+            preferred_provider = cls._get_preferred_provider(tenant_id, model_provider_name)
+            if not preferred_provider or not preferred_provider.is_valid:
+                return None
 
-        # init model provider
-        model_provider_class = ModelProviderFactory.get_model_provider_class(model_provider_name)
-        return model_provider_class(provider=preferred_provider)
+            # init model provider
+            model_provider_class = ModelProviderFactory.get_model_provider_class(model_provider_name)
+            return model_provider_class(provider=preferred_provider)
+
+        # resolved once per request, the model provider instance also memoizes its credentials
+        return ModelResolutionCache.get_or_resolve(tenant_id, ('model_provider', model_provider_name), resolve)
 
     @classmethod
     def get_preferred_type_by_preferred_model_provider(cls,
@@ -192,7 +199,8 @@ class ModelProviderFactory:
                 if quota_type in model_provider_rules['system_config']['supported_quota_types']:
                     if quota_type in quota_type_to_provider_dict.keys():
                         provider = quota_type_to_provider_dict[quota_type]
-                        if provider.is_valid and provider.quota_limit > provider.quota_used:
+                        if provider.is_valid and provider.quota_limit > provider.quota_used \
+                                + cls._get_pending_quota(provider):
                             return provider
                     elif quota_type == ProviderQuotaType.TRIAL.value:
                         try:
@@ -274,3 +282,17 @@ class ModelProviderFactory:
         ).first()
 
         return cls.get_preferred_type_by_preferred_model_provider(tenant_id, model_provider_name, preferred_model_provider)
+
+    @staticmethod
+    def _get_pending_quota(provider: Provider) -> int:
+        """
+        get the used quota of provider not flushed to the providers table yet.
+
+        :param provider:
+        :return:
+        """
+        try:
+            return ProviderUsageAccounting.get_pending_quota(provider.id)
+        except Exception:
+            logging.exception('Failed to get pending provider quota from redis')
+            return 0
@@ -0,0 +1,45 @@
+from typing import Any, Callable, Hashable
+
+from flask import g, has_app_context
+
+
+class ModelResolutionCache:
+    """
+    Per-request cache of the model providers and default models resolved for tenants.
+
+    One chat turn resolves the same providers several times, for the main model, the agent, the conversation
+    name, the embeddings and the reranking, and each resolution queries the provider tables and decrypts
+    the credentials. The cache lives on `flask.g`, so it only spans one request or one celery task and is
+    not shared between threads. Writes to the provider configuration of a tenant invalidate its entries.
+    """
+
+    @classmethod
+    def get_or_resolve(cls, tenant_id: str, key: Hashable, resolve: Callable[[], Any]) -> Any:
+        """
+        Get a resolved value of a tenant, resolving and caching it on a miss.
+
+        :param tenant_id: tenant id
+        :param key: key of the value in the tenant entries, e.g. `('model_provider', 'openai')`
+        :param resolve: resolves the value, None results are cached too
+        """
+        if not has_app_context():
+            return resolve()
+
+        tenant_cache = cls._get_cache().setdefault(tenant_id, {})
+        if key not in tenant_cache:
+            tenant_cache[key] = resolve()
+
+        return tenant_cache[key]
+
+    @classmethod
+    def invalidate(cls, tenant_id: str):
+        """Drop the resolved values of a tenant."""
+        if has_app_context():
+            cls._get_cache().pop(tenant_id, None)
+
+    @staticmethod
+    def _get_cache() -> dict:
+        if 'model_resolution_cache' not in g:
+            g.model_resolution_cache = {}
+
+        return g.model_resolution_cache
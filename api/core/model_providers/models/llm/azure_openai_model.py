@@ -13,6 +13,7 @@ from core.third_party.langchain.llms.azure_open_ai import EnhanceAzureOpenAI
 from core.model_providers.error import LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError, \
     LLMRateLimitError, LLMAuthorizationError
 from core.model_providers.models.llm.base import BaseLLM
+from core.model_providers.models.llm.token_counter import get_tiktoken_encoding
 from core.model_providers.models.entity.message import PromptMessage, MessageType
 from core.model_providers.models.entity.model_params import ModelMode, ModelKwargs
 
@@ -125,6 +126,12 @@ class AzureOpenAIModel(BaseLLM):
         else:
             return max(self._client.get_num_tokens_from_messages(prompts) - len(prompts), 0)
 
+    def get_num_text_tokens(self, text: str) -> int:
+        return len(get_tiktoken_encoding(self.base_model_name).encode(text, disallowed_special=()))
+
+    def has_local_tokenizer(self) -> bool:
+        return True
+
     def _set_model_kwargs(self, model_kwargs: ModelKwargs):
         provider_model_kwargs = self._to_model_kwargs_input(self.model_rules, model_kwargs)
         if self.name == 'text-davinci-003':
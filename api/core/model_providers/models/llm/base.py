@@ -7,10 +7,12 @@ from langchain.callbacks.manager import Callbacks
 from langchain.schema import LLMResult, BaseMessage, ChatGeneration
 
 from core.callback_handler.std_out_callback_handler import DifyStreamingStdOutCallbackHandler, DifyStdOutCallbackHandler
+from core.callback_handler.token_counter_callback_handler import TokenCounterCallbackHandler
 from core.helper import moderation
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.entity.message import PromptMessage, MessageType, LLMRunResult, to_lc_messages
 from core.model_providers.models.entity.model_params import ModelType, ModelKwargs, ModelMode, ModelKwargsRules
+from core.model_providers.models.llm.token_counter import StreamTokenCounter
 from core.model_providers.providers.base import BaseModelProvider
 from core.third_party.langchain.llms.fake import FakeLLM
 
@@ -128,6 +130,17 @@ class BaseLLM(BaseProviderModel):
         else:
             callbacks.extend(self.callbacks)
 
+        token_counter = None
+        if self.streaming:
+            # count the streamed tokens once, with the counter of the caller when it has one
+            token_counter_callback = next((callback for callback in callbacks
+                                           if isinstance(callback, TokenCounterCallbackHandler)), None)
+            if not token_counter_callback:
+                token_counter_callback = TokenCounterCallbackHandler(self.get_token_counter())
+                callbacks = callbacks + [token_counter_callback]
+
+            token_counter = token_counter_callback.token_counter
+
         if 'fake_response' in kwargs and kwargs['fake_response']:
             prompts = self._get_prompt_from_messages(messages, ModelMode.CHAT)
             fake_llm = FakeLLM(
@@ -173,8 +186,11 @@ class BaseLLM(BaseProviderModel):
             total_tokens = result.llm_output['token_usage']['total_tokens']
         else:
             prompt_tokens = self.get_num_tokens(messages)
-            completion_tokens = self.get_num_tokens(
-                [PromptMessage(content=completion_content, type=MessageType.ASSISTANT)])
+            if token_counter and token_counter.text == completion_content:
+                completion_tokens = token_counter.num_tokens
+            else:
+                completion_tokens = self.get_num_tokens(
+                    [PromptMessage(content=completion_content, type=MessageType.ASSISTANT)])
             total_tokens = prompt_tokens + completion_tokens
 
         self.model_provider.update_last_used()
@@ -214,6 +230,55 @@ class BaseLLM(BaseProviderModel):
         """
         raise NotImplementedError
 
+    def get_num_text_tokens(self, text: str) -> int:
+        """
+        get num tokens of a text, without the tokens added by wrapping it in a message.
+        providers with a local tokenizer override it and `has_local_tokenizer` to skip building messages.
+
+        :param text:
+        :return:
+        """
+        if not text:
+            return 0
+
+        num_tokens = self.get_num_tokens([PromptMessage(content=text, type=MessageType.ASSISTANT)])
+        return max(num_tokens - self._get_num_message_tokens(), 0)
+
+    def has_local_tokenizer(self) -> bool:
+        """
+        whether the tokens are counted with a tokenizer loaded once in the process,
+        which makes counting the streamed chunks as they arrive cheap.
+
+        :return:
+        """
+        return False
+
+    def get_token_counter(self) -> StreamTokenCounter:
+        """
+        get a counter of the tokens of a streamed completion,
+        its count matches `get_num_tokens` of the completion as an assistant message.
+
+        :return:
+        """
+        if not self.has_local_tokenizer():
+            # most clients load a tokenizer on each count, so the completion is counted once when it is read
+            return StreamTokenCounter(
+                count_text_tokens=lambda text: self.get_num_tokens(
+                    [PromptMessage(content=text, type=MessageType.ASSISTANT)]),
+                incremental=False
+            )
+
+        return StreamTokenCounter(
+            count_text_tokens=self.get_num_text_tokens,
+            message_tokens=self._get_num_message_tokens()
+        )
+
+    def _get_num_message_tokens(self) -> int:
+        if not hasattr(self, '_num_message_tokens'):
+            self._num_message_tokens = self.get_num_tokens([PromptMessage(content='', type=MessageType.ASSISTANT)])
+
+        return self._num_message_tokens
+
     def calc_tokens_price(self, tokens: int, message_type: MessageType) -> decimal.Decimal:
         """
         calc tokens total price.
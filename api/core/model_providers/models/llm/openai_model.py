@@ -11,6 +11,7 @@ from core.model_providers.error import LLMBadRequestError, LLMAPIConnectionError
     LLMRateLimitError, LLMAuthorizationError, ModelCurrentlyNotSupportError
 from core.third_party.langchain.llms.open_ai import EnhanceOpenAI
 from core.model_providers.models.llm.base import BaseLLM
+from core.model_providers.models.llm.token_counter import get_tiktoken_encoding
 from core.model_providers.models.entity.message import PromptMessage, MessageType
 from core.model_providers.models.entity.model_params import ModelMode, ModelKwargs
 from models.provider import ProviderType, ProviderQuotaType
@@ -147,6 +148,12 @@ class OpenAIModel(BaseLLM):
         else:
             return max(self._client.get_num_tokens_from_messages(prompts) - len(prompts), 0)
 
+    def get_num_text_tokens(self, text: str) -> int:
+        return len(get_tiktoken_encoding(self.name).encode(text, disallowed_special=()))
+
+    def has_local_tokenizer(self) -> bool:
+        return True
+
     def _set_model_kwargs(self, model_kwargs: ModelKwargs):
         provider_model_kwargs = self._to_model_kwargs_input(self.model_rules, model_kwargs)
         if self.name in COMPLETION_MODELS:
@@ -0,0 +1,86 @@
+import re
+from functools import lru_cache
+from typing import Callable, List
+
+import tiktoken
+
+# position of the last space preceded by a non space character in a text
+_LAST_WORD_BOUNDARY = re.compile(r'.*\S(?= )', re.DOTALL)
+
+
+@lru_cache(maxsize=None)
+def get_tiktoken_encoding(model_name: str) -> tiktoken.Encoding:
+    """
+    Get the tiktoken encoding of a model, loaded once per model.
+    Unknown models use cl100k_base like the gpt-3.5 and gpt-4 models.
+    """
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+class StreamTokenCounter:
+    """
+    Count the tokens of a streamed completion as its chunks arrive.
+
+    The text is tokenized up to its last word boundary on each chunk and only the trailing word stays pending,
+    so the completion is tokenized once instead of every time its token count is needed.
+    Byte pair tokenizers never merge a word with the space before the next one,
+    so for them the count matches tokenizing the whole text.
+
+    Counters which are not incremental only collect the chunks and tokenize the whole text when its count is read,
+    for the models without a local tokenizer, where each count may load a tokenizer or build messages.
+    """
+
+    # pending text is counted when it grows past this length without a word boundary, e.g. for CJK text
+    MAX_PENDING_LENGTH = 512
+
+    def __init__(self, count_text_tokens: Callable[[str], int], message_tokens: int = 0, incremental: bool = True):
+        """
+        :param count_text_tokens: count the tokens of a text, without any message overhead
+        :param message_tokens: tokens added by wrapping the text in a message
+        :param incremental: tokenize the text as the chunks arrive
+        """
+        self._count_text_tokens = count_text_tokens
+        self._message_tokens = message_tokens
+        self._incremental = incremental
+        self._chunks: List[str] = []
+        self._pending = ''
+        self._committed_tokens = 0
+        self._pending_tokens = None
+
+    def append(self, chunk: str):
+        if not chunk:
+            return
+
+        self._chunks.append(chunk)
+        self._pending += chunk
+        self._pending_tokens = None
+
+        if not self._incremental:
+            return
+
+        if len(self._pending) > self.MAX_PENDING_LENGTH:
+            self._commit(len(self._pending))
+        elif ' ' in chunk:
+            match = _LAST_WORD_BOUNDARY.match(self._pending)
+            if match:
+                self._commit(match.end())
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._chunks)
+
+    @property
+    def num_tokens(self) -> int:
+        """Tokens of the text counted so far, including the message overhead."""
+        if self._pending_tokens is None:
+            self._pending_tokens = self._count_text_tokens(self._pending) \
+                if self._pending or not self._incremental else 0
+
+        return self._message_tokens + self._committed_tokens + self._pending_tokens
+
+    def _commit(self, end: int):
+        self._committed_tokens += self._count_text_tokens(self._pending[:end])
+        self._pending = self._pending[end:]
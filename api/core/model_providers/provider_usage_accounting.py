@@ -0,0 +1,209 @@
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import current_app
+from redis import ResponseError
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.provider import Provider, ProviderUsageFlush
+
+QUOTA_PENDING_KEY = 'provider_usage:quota_pending'
+LAST_USED_PENDING_KEY = 'provider_usage:last_used_pending'
+FLUSHING_SUFFIX = ':flushing'
+BATCH_SUFFIX = ':batch'
+FLUSH_LOCK_KEY = 'provider_usage:flush_lock'
+FLUSH_LOCK_TIMEOUT = 600
+FLUSH_RECORD_RETENTION = timedelta(days=1)
+
+
+class ProviderUsageAccounting:
+    """
+    Write-behind accounting of the quota used and the last used time of model providers.
+
+    Every LLM call used to check the quota of the provider and update its `quota_used` and `last_used`
+    with an `UPDATE providers ... COMMIT`, and the calls of a tenant contended on the same rows.
+    The used quota and the last used times are now accumulated in redis hashes with atomic increments,
+    and a periodic task flushes the aggregated deltas to the `providers` table.
+
+    Quota checks read the limit and used quota of the provider from a snapshot cached in redis for
+    `PROVIDER_QUOTA_CACHE_TTL` seconds and add the deltas not flushed yet. The table lags behind by at most
+    `PROVIDER_USAGE_FLUSH_INTERVAL` seconds; `flask reconcile-provider-usage` flushes the deltas at once
+    and drops the snapshots, e.g. before changing the quota of providers by hand.
+    """
+
+    @classmethod
+    def record_quota(cls, provider_id: str, used_quota: int):
+        """Add used quota of a provider to the deltas to flush."""
+        if used_quota:
+            redis_client.hincrby(QUOTA_PENDING_KEY, provider_id, used_quota)
+
+    @classmethod
+    def record_last_used(cls, tenant_id: str, provider_name: str):
+        """Record the last used time of the providers of a tenant to flush."""
+        redis_client.hset(LAST_USED_PENDING_KEY, f'{tenant_id}:{provider_name}', time.time())
+
+    @classmethod
+    def get_pending_quota(cls, provider_id: str) -> int:
+        """Get the used quota of a provider not flushed to the `providers` table yet."""
+        pipe = redis_client.pipeline(transaction=False)
+        cls._queue_pending_quota(pipe, provider_id)
+        return sum(int(value or 0) for value in pipe.execute())
+
+    @classmethod
+    def is_quota_over_limit(cls, provider_id: str) -> bool:
+        """
+        Check the quota of a provider against the cached snapshot and the deltas not flushed yet.
+
+        :param provider_id: provider id
+        :return: True when the provider is invalid, missing or its quota is used up
+        """
+        # one round trip for the snapshot and the deltas
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(cls._quota_snapshot_key(provider_id))
+        cls._queue_pending_quota(pipe, provider_id)
+        snapshot, *pending = pipe.execute()
+
+        if snapshot is None:
+            snapshot = cls._load_quota_snapshot(provider_id)
+        if not snapshot:
+            return True
+
+        quota_limit, quota_used = (int(value) for value in snapshot.split(b':'))
+        return quota_limit <= quota_used + sum(int(value or 0) for value in pending)
+
+    @classmethod
+    def invalidate_quota(cls, provider_id: str):
+        """Drop the cached quota snapshot of a provider, after its quota was changed in the table."""
+        redis_client.delete(cls._quota_snapshot_key(provider_id))
+
+    @classmethod
+    def flush(cls, blocking: bool = False) -> tuple[int, int]:
+        """
+        Flush the accumulated quota deltas and last used times to the `providers` table.
+
+        The pending hashes are renamed before they are read, so that calls during the flush accumulate into new
+        hashes. A failed flush leaves the renamed hash in place, and the next flush applies it first.
+
+        Flushes are serialized by a redis lock. Each renamed hash is tagged with a batch id which is recorded in
+        `provider_usage_flushes` by the transaction applying it, so a batch is never applied twice, e.g. when
+        the flush crashed after the commit or when the lock expired during a flush.
+
+        :param blocking: wait for a running flush instead of skipping
+        :return: numbers of the flushed quota deltas and last used times
+        """
+        lock = redis_client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT)
+        if not lock.acquire(blocking=blocking, blocking_timeout=FLUSH_LOCK_TIMEOUT):
+            logging.info('Provider usage is being flushed by another worker, skipped')
+            return 0, 0
+
+        try:
+            quota_count = cls._flush_pending(QUOTA_PENDING_KEY, cls._apply_quota_deltas)
+            last_used_count = cls._flush_pending(LAST_USED_PENDING_KEY, cls._apply_last_used)
+
+            db.session.query(ProviderUsageFlush) \
+                .filter(ProviderUsageFlush.created_at < datetime.utcnow() - FLUSH_RECORD_RETENTION) \
+                .delete(synchronize_session=False)
+            db.session.commit()
+        finally:
+            lock.release()
+
+        return quota_count, last_used_count
+
+    @classmethod
+    def reconcile(cls) -> tuple[int, int]:
+        """
+        Flush the accumulated deltas and drop the quota snapshots of all providers,
+        so that the next quota checks read the `providers` table.
+
+        :return: numbers of the flushed quota deltas and last used times
+        """
+        counts = cls.flush(blocking=True)
+        for key in redis_client.scan_iter(cls._quota_snapshot_key('*')):
+            redis_client.delete(key)
+
+        return counts
+
+    @classmethod
+    def _flush_pending(cls, pending_key: str, apply) -> int:
+        flushing_key = pending_key + FLUSHING_SUFFIX
+        batch_key = flushing_key + BATCH_SUFFIX
+        if not redis_client.exists(flushing_key):
+            try:
+                redis_client.rename(pending_key, flushing_key)
+            except ResponseError:
+                # nothing accumulated since the last flush
+                return 0
+            batch_id = None
+        else:
+            # retry the batch left by a failed flush
+            batch_id = redis_client.get(batch_key)
+
+        if batch_id is None:
+            batch_id = str(uuid.uuid4())
+            redis_client.set(batch_key, batch_id)
+        elif isinstance(batch_id, bytes):
+            batch_id = batch_id.decode('utf-8')
+
+        pending = redis_client.hgetall(flushing_key)
+        try:
+            applied = db.session.query(ProviderUsageFlush).filter(ProviderUsageFlush.id == batch_id).first()
+            if not applied:
+                apply(pending)
+                db.session.add(ProviderUsageFlush(id=batch_id))
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        pipe = redis_client.pipeline()
+        pipe.delete(flushing_key)
+        pipe.delete(batch_key)
+        if pending_key == QUOTA_PENDING_KEY:
+            # drop the flushed deltas and the snapshots missing them together
+            for provider_id in pending:
+                pipe.delete(cls._quota_snapshot_key(provider_id.decode('utf-8')))
+        pipe.execute()
+
+        return len(pending)
+
+    @staticmethod
+    def _apply_quota_deltas(pending: dict):
+        for provider_id, used_quota in pending.items():
+            db.session.query(Provider).filter(Provider.id == provider_id.decode('utf-8')) \
+                .update({'quota_used': Provider.quota_used + int(used_quota)}, synchronize_session=False)
+
+    @staticmethod
+    def _apply_last_used(pending: dict):
+        for field, last_used in pending.items():
+            tenant_id, provider_name = field.decode('utf-8').split(':', 1)
+            db.session.query(Provider).filter(
+                Provider.tenant_id == tenant_id,
+                Provider.provider_name == provider_name
+            ).update({'last_used': datetime.utcfromtimestamp(float(last_used))}, synchronize_session=False)
+
+    @classmethod
+    def _load_quota_snapshot(cls, provider_id: str) -> Optional[bytes]:
+        provider = db.session.query(Provider).filter(
+            Provider.id == provider_id,
+            Provider.is_valid == True
+        ).first()
+
+        # invalid providers are cached with an empty snapshot
+        snapshot = f'{provider.quota_limit or 0}:{provider.quota_used or 0}'.encode('utf-8') if provider else b''
+        redis_client.setex(cls._quota_snapshot_key(provider_id),
+                           int(current_app.config.get('PROVIDER_QUOTA_CACHE_TTL', 60)), snapshot)
+        return snapshot
+
+    @staticmethod
+    def _queue_pending_quota(pipe, provider_id: str):
+        # the deltas being flushed are not in the table until the flush commits
+        pipe.hget(QUOTA_PENDING_KEY, provider_id)
+        pipe.hget(QUOTA_PENDING_KEY + FLUSHING_SUFFIX, provider_id)
+
+    @staticmethod
+    def _quota_snapshot_key(provider_id: str) -> str:
+        return f'provider_usage:quota:{provider_id}'
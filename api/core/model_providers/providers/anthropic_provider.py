@@ -13,7 +13,8 @@ from core.model_providers.models.entity.model_params import ModelKwargsRules, Kw
 from core.model_providers.models.entity.provider import ModelFeature
 from core.model_providers.models.llm.anthropic_model import AnthropicModel
 from core.model_providers.models.llm.base import ModelType
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from core.model_providers.providers.hosted import hosted_model_providers
 from core.third_party.langchain.llms.anthropic_llm import AnthropicLLM
 from models.provider import ProviderType
@@ -139,6 +140,7 @@ class AnthropicProvider(BaseModelProvider):
         credentials['anthropic_api_key'] = encrypter.encrypt_token(tenant_id, credentials['anthropic_api_key'])
         return credentials
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         if self.provider.provider_type == ProviderType.CUSTOM.value:
             try:
@@ -233,6 +235,7 @@ class AnthropicProvider(BaseModelProvider):
         """
         return {}
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
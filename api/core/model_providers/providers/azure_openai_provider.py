@@ -15,7 +15,8 @@ from core.model_providers.models.embedding.azure_openai_embedding import AzureOp
 from core.model_providers.models.entity.model_params import ModelType, ModelKwargsRules, KwargRule, ModelMode
 from core.model_providers.models.entity.provider import ModelFeature
 from core.model_providers.models.llm.azure_openai_model import AzureOpenAIModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from core.model_providers.providers.hosted import hosted_model_providers
 from core.third_party.langchain.llms.azure_chat_open_ai import EnhanceAzureChatOpenAI
 from extensions.ext_database import db
@@ -266,6 +267,7 @@ class AzureOpenAIProvider(BaseModelProvider):
         credentials['openai_api_key'] = encrypter.encrypt_token(tenant_id, credentials['openai_api_key'])
         return credentials
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -342,6 +344,7 @@ class AzureOpenAIProvider(BaseModelProvider):
     def encrypt_provider_credentials(cls, tenant_id: str, credentials: dict) -> dict:
         return {}
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         return {}
 
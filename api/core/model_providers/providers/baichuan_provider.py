@@ -8,7 +8,8 @@ from core.helper import encrypter
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.entity.model_params import ModelKwargsRules, KwargRule, ModelType, ModelMode
 from core.model_providers.models.llm.baichuan_model import BaichuanModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from core.third_party.langchain.llms.baichuan_llm import BaichuanChatLLM
 from models.provider import ProviderType
 
@@ -99,6 +100,7 @@ class BaichuanProvider(BaseModelProvider):
         credentials['secret_key'] = encrypter.encrypt_token(tenant_id, credentials['secret_key'])
         return credentials
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         if self.provider.provider_type == ProviderType.CUSTOM.value:
             try:
@@ -159,6 +161,7 @@ class BaichuanProvider(BaseModelProvider):
         """
         return {}
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -1,11 +1,15 @@
+import functools
+import inspect
+import logging
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Type, Optional
 
 from flask import current_app
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from core.model_providers.error import QuotaExceededError, LLMBadRequestError
+from core.model_providers.provider_usage_accounting import ProviderUsageAccounting
 from extensions.ext_database import db
 from core.model_providers.models.entity.model_params import ModelType, ModelKwargsRules
 from core.model_providers.models.entity.provider import ProviderQuotaUnit
@@ -13,9 +17,32 @@ from core.model_providers.rules import provider_rules
 from models.provider import Provider, ProviderType, ProviderModel
 
 
+def memoize_credentials(func):
+    """
+    Memoize the credentials returned by a model provider instance, keyed by the call arguments.
+    The instance is shared by a request through the model resolution cache, so its credentials are decrypted once.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        # bind the arguments, so that positional, keyword and default arguments share a key
+        bound_arguments = signature.bind(self, *args, **kwargs)
+        bound_arguments.apply_defaults()
+        key = (func.__name__, tuple(bound_arguments.arguments.items())[1:])
+        if key not in self._credentials_cache:
+            self._credentials_cache[key] = func(self, *args, **kwargs)
+
+        # callers may modify the returned credentials
+        return dict(self._credentials_cache[key])
+
+    return wrapper
+
+
 class BaseModelProvider(BaseModel, ABC):
 
     provider: Provider
+    _credentials_cache: dict = PrivateAttr(default_factory=dict)
 
     class Config:
         """Configuration for this pydantic object."""
@@ -204,15 +231,19 @@ class BaseModelProvider(BaseModel, ABC):
         if 'system' not in rules['support_provider_types']:
             return
 
-        provider = db.session.query(Provider).filter(
-            db.and_(
-                Provider.id == self.provider.id,
-                Provider.is_valid == True,
-                Provider.quota_limit > Provider.quota_used
-            )
-        ).first()
-
-        if not provider:
+        try:
+            over_limit = ProviderUsageAccounting.is_quota_over_limit(self.provider.id)
+        except Exception:
+            logging.exception('Failed to check provider quota from redis')
+            over_limit = not db.session.query(Provider).filter(
+                db.and_(
+                    Provider.id == self.provider.id,
+                    Provider.is_valid == True,
+                    Provider.quota_limit > Provider.quota_used
+                )
+            ).first()
+
+        if over_limit:
             raise QuotaExceededError()
 
     def deduct_quota(self, used_tokens: int = 0) -> None:
@@ -243,6 +274,12 @@ class BaseModelProvider(BaseModel, ABC):
         else:
             used_quota = 1
 
+        try:
+            ProviderUsageAccounting.record_quota(self.provider.id, used_quota)
+            return
+        except Exception:
+            logging.exception('Failed to record provider quota to redis')
+
         db.session.query(Provider).filter(
             Provider.tenant_id == self.provider.tenant_id,
             Provider.provider_name == self.provider.provider_name,
@@ -261,6 +298,12 @@ class BaseModelProvider(BaseModel, ABC):
 
         :return:
         """
+        try:
+            ProviderUsageAccounting.record_last_used(self.provider.tenant_id, self.provider.provider_name)
+            return
+        except Exception:
+            logging.exception('Failed to record provider last used time to redis')
+
         db.session.query(Provider).filter(
             Provider.tenant_id == self.provider.tenant_id,
             Provider.provider_name == self.provider.provider_name
@@ -9,7 +9,8 @@ from core.helper import encrypter
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.entity.model_params import ModelKwargsRules, KwargRule, ModelType, ModelMode
 from core.model_providers.models.llm.chatglm_model import ChatGLMModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from models.provider import ProviderType
 
 
@@ -106,6 +107,7 @@ class ChatGLMProvider(BaseModelProvider):
         credentials['api_base'] = encrypter.encrypt_token(tenant_id, credentials['api_base'])
         return credentials
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         if self.provider.provider_type == ProviderType.CUSTOM.value:
             try:
@@ -153,6 +155,7 @@ class ChatGLMProvider(BaseModelProvider):
         """
         return {}
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -8,7 +8,8 @@ from core.helper import encrypter
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.entity.model_params import ModelKwargsRules, KwargRule, ModelType, ModelMode
 from core.model_providers.models.reranking.cohere_reranking import CohereReranking
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from models.provider import ProviderType
 
 
@@ -90,6 +91,7 @@ class CohereProvider(BaseModelProvider):
         credentials['api_key'] = encrypter.encrypt_token(tenant_id, credentials['api_key'])
         return credentials
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         if self.provider.provider_type == ProviderType.CUSTOM.value:
             try:
@@ -140,6 +142,7 @@ class CohereProvider(BaseModelProvider):
         """
         return {}
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -7,7 +7,8 @@ from huggingface_hub import HfApi
 from core.helper import encrypter
 from core.model_providers.models.entity.model_params import KwargRule, ModelKwargsRules, ModelType, ModelMode
 from core.model_providers.models.llm.huggingface_hub_model import HuggingfaceHubModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 
 from core.model_providers.models.base import BaseProviderModel
 from core.third_party.langchain.llms.huggingface_endpoint_llm import HuggingFaceEndpointLLM
@@ -203,6 +204,7 @@ class HuggingfaceHubProvider(BaseModelProvider):
 
         return credentials
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -247,5 +249,6 @@ class HuggingfaceHubProvider(BaseModelProvider):
     def encrypt_provider_credentials(cls, tenant_id: str, credentials: dict) -> dict:
         return {}
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         return {}
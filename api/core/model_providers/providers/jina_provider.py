@@ -6,7 +6,8 @@ from core.helper import encrypter
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.embedding.jina_embedding import JinaEmbedding
 from core.model_providers.models.entity.model_params import ModelType, ModelKwargsRules
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from core.third_party.langchain.embeddings.jina_embedding import JinaEmbeddings
 from models.provider import ProviderType
 
@@ -76,6 +77,7 @@ class JinaProvider(BaseModelProvider):
         credentials['api_key'] = encrypter.encrypt_token(tenant_id, credentials['api_key'])
         return credentials
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         if self.provider.provider_type == ProviderType.CUSTOM.value:
             try:
@@ -123,6 +125,7 @@ class JinaProvider(BaseModelProvider):
         """
         return {}
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -8,7 +8,8 @@ from core.helper import encrypter
 from core.model_providers.models.embedding.localai_embedding import LocalAIEmbedding
 from core.model_providers.models.entity.model_params import ModelKwargsRules, ModelType, KwargRule, ModelMode
 from core.model_providers.models.llm.localai_model import LocalAIModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 
 from core.model_providers.models.base import BaseProviderModel
 from core.third_party.langchain.llms.chat_open_ai import EnhanceChatOpenAI
@@ -128,6 +129,7 @@ class LocalAIProvider(BaseModelProvider):
         credentials['server_url'] = encrypter.encrypt_token(tenant_id, credentials['server_url'])
         return credentials
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -167,5 +169,6 @@ class LocalAIProvider(BaseModelProvider):
     def encrypt_provider_credentials(cls, tenant_id: str, credentials: dict) -> dict:
         return {}
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         return {}
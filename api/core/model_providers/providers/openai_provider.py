@@ -16,7 +16,8 @@ from core.model_providers.models.embedding.openai_embedding import OpenAIEmbeddi
 from core.model_providers.models.entity.model_params import ModelKwargsRules, KwargRule, ModelType, ModelMode
 from core.model_providers.models.llm.openai_model import OpenAIModel, COMPLETION_MODELS
 from core.model_providers.models.moderation.openai_moderation import OpenAIModeration
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from core.model_providers.providers.hosted import hosted_model_providers
 from models.provider import ProviderType, ProviderQuotaType
 
@@ -222,6 +223,7 @@ class OpenAIProvider(BaseModelProvider):
         credentials['openai_api_key'] = encrypter.encrypt_token(tenant_id, credentials['openai_api_key'])
         return credentials
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         if self.provider.provider_type == ProviderType.CUSTOM.value:
             try:
@@ -321,6 +323,7 @@ class OpenAIProvider(BaseModelProvider):
         """
         return {}
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
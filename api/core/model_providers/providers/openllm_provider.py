@@ -5,7 +5,8 @@ from core.helper import encrypter
 from core.model_providers.models.embedding.openllm_embedding import OpenLLMEmbedding
 from core.model_providers.models.entity.model_params import KwargRule, ModelKwargsRules, ModelType, ModelMode
 from core.model_providers.models.llm.openllm_model import OpenLLMModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 
 from core.model_providers.models.base import BaseProviderModel
 from core.third_party.langchain.embeddings.openllm_embedding import OpenLLMEmbeddings
@@ -109,6 +110,7 @@ class OpenLLMProvider(BaseModelProvider):
         credentials['server_url'] = encrypter.encrypt_token(tenant_id, credentials['server_url'])
         return credentials
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -148,5 +150,6 @@ class OpenLLMProvider(BaseModelProvider):
     def encrypt_provider_credentials(cls, tenant_id: str, credentials: dict) -> dict:
         return {}
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         return {}
@@ -9,7 +9,8 @@ from core.helper import encrypter
 from core.model_providers.models.entity.model_params import KwargRule, KwargRuleType, ModelKwargsRules, ModelType, \
     ModelMode
 from core.model_providers.models.llm.replicate_model import ReplicateModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.embedding.replicate_embedding import ReplicateEmbedding
@@ -148,6 +149,7 @@ class ReplicateProvider(BaseModelProvider):
         credentials['replicate_api_token'] = encrypter.encrypt_token(tenant_id, credentials['replicate_api_token'])
         return credentials
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -187,5 +189,6 @@ class ReplicateProvider(BaseModelProvider):
     def encrypt_provider_credentials(cls, tenant_id: str, credentials: dict) -> dict:
         return {}
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         return {}
@@ -9,7 +9,8 @@ from core.helper import encrypter
 from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.entity.model_params import ModelKwargsRules, KwargRule, ModelType, ModelMode
 from core.model_providers.models.llm.spark_model import SparkModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from core.third_party.langchain.llms.spark import ChatSpark
 from core.third_party.spark.spark_llm import SparkError
 from models.provider import ProviderType, ProviderQuotaType
@@ -163,6 +164,7 @@ class SparkProvider(BaseModelProvider):
         credentials['api_secret'] = encrypter.encrypt_token(tenant_id, credentials['api_secret'])
         return credentials
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         if self.provider.provider_type == ProviderType.CUSTOM.value \
                 or (self.provider.provider_type == ProviderType.SYSTEM.value
@@ -230,6 +232,7 @@ class SparkProvider(BaseModelProvider):
         """
         return {}
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
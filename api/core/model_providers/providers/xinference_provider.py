@@ -9,7 +9,8 @@ from core.model_providers.models.embedding.xinference_embedding import Xinferenc
 from core.model_providers.models.entity.model_params import KwargRule, ModelKwargsRules, ModelType, ModelMode
 from core.model_providers.models.llm.xinference_model import XinferenceModel
 from core.model_providers.models.reranking.xinference_reranking import XinferenceReranking
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 
 from core.model_providers.models.base import BaseProviderModel
 from core.third_party.langchain.embeddings.xinference_embedding import XinferenceEmbeddings
@@ -144,6 +145,7 @@ class XinferenceProvider(BaseModelProvider):
 
         return credentials
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -208,5 +210,6 @@ class XinferenceProvider(BaseModelProvider):
     def encrypt_provider_credentials(cls, tenant_id: str, credentials: dict) -> dict:
         return {}
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         return {}
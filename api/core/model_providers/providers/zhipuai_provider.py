@@ -9,7 +9,8 @@ from core.model_providers.models.base import BaseProviderModel
 from core.model_providers.models.embedding.zhipuai_embedding import ZhipuAIEmbedding
 from core.model_providers.models.entity.model_params import ModelKwargsRules, KwargRule, ModelType, ModelMode
 from core.model_providers.models.llm.zhipuai_model import ZhipuAIModel
-from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError
+from core.model_providers.providers.base import BaseModelProvider, CredentialsValidateFailedError, \
+    memoize_credentials
 from core.third_party.langchain.llms.zhipuai_llm import ZhipuAIChatLLM
 from models.provider import ProviderType, ProviderQuotaType
 
@@ -124,6 +125,7 @@ class ZhipuAIProvider(BaseModelProvider):
         credentials['api_key'] = encrypter.encrypt_token(tenant_id, credentials['api_key'])
         return credentials
 
+    @memoize_credentials
     def get_provider_credentials(self, obfuscated: bool = False) -> dict:
         if self.provider.provider_type == ProviderType.CUSTOM.value \
                 or (self.provider.provider_type == ProviderType.SYSTEM.value
@@ -176,6 +178,7 @@ class ZhipuAIProvider(BaseModelProvider):
         """
         return {}
 
+    @memoize_credentials
     def get_model_credentials(self, model_name: str, model_type: ModelType, obfuscated: bool = False) -> dict:
         """
         get credentials for llm use.
@@ -0,0 +1,74 @@
+import logging
+import math
+import threading
+import time
+from typing import Callable
+
+
+class Timer:
+    def __init__(self, callback: Callable[[], None], rounds: int):
+        self.callback = callback
+        self.rounds = rounds
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel, a single thread advances it one slot per tick and runs the callbacks of the due timers.
+    Callbacks run on the wheel thread, so they must be short.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, name: str = 'timer-wheel'):
+        self._tick = tick
+        self._name = name
+        self._slots = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> Timer:
+        ticks = max(1, math.ceil(delay / self._tick))
+        timer = Timer(callback, rounds=(ticks - 1) // len(self._slots))
+
+        with self._lock:
+            self._slots[(self._cursor + ticks) % len(self._slots)].append(timer)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+        return timer
+
+    def advance(self):
+        with self._lock:
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            slot = self._slots[self._cursor]
+
+            due_timers = []
+            pending_timers = []
+            for timer in slot:
+                if timer.cancelled:
+                    continue
+
+                if timer.rounds == 0:
+                    due_timers.append(timer)
+                else:
+                    timer.rounds -= 1
+                    pending_timers.append(timer)
+
+            self._slots[self._cursor] = pending_timers
+
+        for timer in due_timers:
+            try:
+                timer.callback()
+            except Exception:
+                logging.exception('Timer callback failed')
+
+    def _run(self):
+        next_tick_at = time.monotonic()
+        while True:
+            next_tick_at += self._tick
+            time.sleep(max(0.0, next_tick_at - time.monotonic()))
+            self.advance()
@@ -1,8 +1,8 @@
+import functools
 import json
-import threading
-from typing import Type, Optional, List
+from typing import Type, Optional, List, Callable
 
-from flask import current_app, Flask
+from langchain.schema import Document
 from langchain.tools import BaseTool
 from pydantic import Field, BaseModel
 
@@ -10,10 +10,12 @@ from core.callback_handler.index_tool_callback_handler import DatasetIndexToolCa
 from core.conversation_message_task import ConversationMessageTask
 from core.embedding.cached_embedding import CacheEmbedding
 from core.index.keyword_table_index.keyword_table_index import KeywordTableIndex, KeywordTableConfig
+from core.index.segment_hydrator import SegmentHydrator
 from core.model_providers.error import LLMBadRequestError, ProviderTokenNotInitError
 from core.model_providers.model_factory import ModelFactory
 from extensions.ext_database import db
-from models.dataset import Dataset, DocumentSegment, Document
+from models.dataset import Dataset
+from services.retrieval_executor import get_retrieval_executor
 from services.retrieval_service import RetrievalService
 
 default_retrieval_model = {
@@ -57,19 +59,20 @@ class DatasetMultiRetrieverTool(BaseTool):
         )
 
     def _run(self, query: str) -> str:
-        threads = []
+        datasets = db.session.query(Dataset).filter(
+            Dataset.tenant_id == self.tenant_id,
+            Dataset.id.in_(self.dataset_ids)
+        ).all()
+
+        # the searches of all datasets run in one batch, so a slow dataset is cut off by the retrieval timeout
+        tasks = []
+        for dataset in datasets:
+            tasks.extend(self._retrieval_tasks(dataset, query))
+
         all_documents = []
-        for dataset_id in self.dataset_ids:
-            retrieval_thread = threading.Thread(target=self._retriever, kwargs={
-                'flask_app': current_app._get_current_object(),
-                'dataset_id': dataset_id,
-                'query': query,
-                'all_documents': all_documents
-            })
-            threads.append(retrieval_thread)
-            retrieval_thread.start()
-        for thread in threads:
-            thread.join()
+        for documents in get_retrieval_executor().run(tasks):
+            all_documents.extend(documents)
+
         # do rerank for searched documents
         rerank = ModelFactory.get_reranking_model(
             tenant_id=self.tenant_id,
@@ -86,34 +89,21 @@ class DatasetMultiRetrieverTool(BaseTool):
 
         document_context_list = []
         index_node_ids = [document.metadata['doc_id'] for document in all_documents]
-        segments = DocumentSegment.query.filter(
-            DocumentSegment.completed_at.isnot(None),
-            DocumentSegment.status == 'completed',
-            DocumentSegment.enabled == True,
-            DocumentSegment.index_node_id.in_(index_node_ids)
-        ).all()
+        sorted_segments = SegmentHydrator.get_segments(index_node_ids, available_only=True)
 
-        if segments:
-            index_node_id_to_position = {id: position for position, id in enumerate(index_node_ids)}
-            sorted_segments = sorted(segments,
-                                     key=lambda segment: index_node_id_to_position.get(segment.index_node_id,
-                                                                                       float('inf')))
+        if sorted_segments:
             for segment in sorted_segments:
                 if segment.answer:
                     document_context_list.append(f'question:{segment.content} answer:{segment.answer}')
                 else:
                     document_context_list.append(segment.content)
             if self.return_resource:
+                datasets_by_id, documents_by_id = SegmentHydrator.get_segment_sources(sorted_segments)
                 context_list = []
                 resource_number = 1
                 for segment in sorted_segments:
-                    dataset = Dataset.query.filter_by(
-                        id=segment.dataset_id
-                    ).first()
-                    document = Document.query.filter(Document.id == segment.document_id,
-                                                     Document.enabled == True,
-                                                     Document.archived == False,
-                                                     ).first()
+                    dataset = datasets_by_id.get(segment.dataset_id)
+                    document = documents_by_id.get(segment.document_id)
                     if dataset and document:
                         source = {
                             'position': resource_number,
@@ -145,88 +135,51 @@ class DatasetMultiRetrieverTool(BaseTool):
     async def _arun(self, tool_input: str) -> str:
         raise NotImplementedError()
 
-    def _retriever(self, flask_app: Flask, dataset_id: str, query: str, all_documents: List):
-        with flask_app.app_context():
-            dataset = db.session.query(Dataset).filter(
-                Dataset.tenant_id == self.tenant_id,
-                Dataset.id == dataset_id
-            ).first()
-
-            if not dataset:
-                return []
-            # get retrieval model , if the model is not setting , using default
-            retrieval_model = dataset.retrieval_model if dataset.retrieval_model else default_retrieval_model
-
-            if dataset.indexing_technique == "economy":
-                # use keyword table query
-                kw_table_index = KeywordTableIndex(
-                    dataset=dataset,
-                    config=KeywordTableConfig(
-                        max_keywords_per_chunk=5
-                    )
-                )
-
-                documents = kw_table_index.search(query, search_kwargs={'k': self.top_k})
-                if documents:
-                    all_documents.extend(documents)
-            else:
-
-                try:
-                    embedding_model = ModelFactory.get_embedding_model(
-                        tenant_id=dataset.tenant_id,
-                        model_provider_name=dataset.embedding_model_provider,
-                        model_name=dataset.embedding_model
-                    )
-                except LLMBadRequestError:
-                    return []
-                except ProviderTokenNotInitError:
-                    return []
-
-                embeddings = CacheEmbedding(embedding_model)
-
-                documents = []
-                threads = []
-                if self.top_k > 0:
-                    # retrieval_model source with semantic
-                    if retrieval_model['search_method'] == 'semantic_search' or retrieval_model[
-                        'search_method'] == 'hybrid_search':
-                        embedding_thread = threading.Thread(target=RetrievalService.embedding_search, kwargs={
-                            'flask_app': current_app._get_current_object(),
-                            'dataset_id': str(dataset.id),
-                            'query': query,
-                            'top_k': self.top_k,
-                            'score_threshold': self.score_threshold,
-                            'reranking_model': None,
-                            'all_documents': documents,
-                            'search_method': 'hybrid_search',
-                            'embeddings': embeddings
-                        })
-                        threads.append(embedding_thread)
-                        embedding_thread.start()
-
-                    # retrieval_model source with full text
-                    if retrieval_model['search_method'] == 'full_text_search' or retrieval_model[
-                        'search_method'] == 'hybrid_search':
-                        full_text_index_thread = threading.Thread(target=RetrievalService.full_text_index_search,
-                                                                  kwargs={
-                                                                      'flask_app': current_app._get_current_object(),
-                                                                      'dataset_id': str(dataset.id),
-                                                                      'query': query,
-                                                                      'search_method': 'hybrid_search',
-                                                                      'embeddings': embeddings,
-                                                                      'score_threshold': retrieval_model[
-                                                                          'score_threshold'] if retrieval_model[
-                                                                          'score_threshold_enabled'] else None,
-                                                                      'top_k': self.top_k,
-                                                                      'reranking_model': retrieval_model[
-                                                                          'reranking_model'] if retrieval_model[
-                                                                          'reranking_enable'] else None,
-                                                                      'all_documents': documents
-                                                                  })
-                        threads.append(full_text_index_thread)
-                        full_text_index_thread.start()
-
-                    for thread in threads:
-                        thread.join()
-
-                    all_documents.extend(documents)
+    def _retrieval_tasks(self, dataset: Dataset, query: str) -> List[Callable[[], List[Document]]]:
+        if dataset.indexing_technique == "economy":
+            # use keyword table query
+            return [functools.partial(self._keyword_search, dataset_id=dataset.id, query=query)]
+
+        if self.top_k <= 0:
+            return []
+
+        # get retrieval model , if the model is not setting , using default
+        retrieval_model = dataset.retrieval_model if dataset.retrieval_model else default_retrieval_model
+
+        try:
+            embedding_model = ModelFactory.get_embedding_model(
+                tenant_id=dataset.tenant_id,
+                model_provider_name=dataset.embedding_model_provider,
+                model_name=dataset.embedding_model
+            )
+        except LLMBadRequestError:
+            return []
+        except ProviderTokenNotInitError:
+            return []
+
+        # searched documents are reranked together, skip the rerank of each search
+        tasks = RetrievalService.search_tasks(
+            dataset_id=str(dataset.id),
+            query=query,
+            search_method=retrieval_model['search_method'],
+            top_k=self.top_k,
+            score_threshold=self.score_threshold,
+            reranking_model=None,
+            embeddings=CacheEmbedding(embedding_model)
+        )
+
+        return list(tasks.values())
+
+    def _keyword_search(self, dataset_id: str, query: str) -> List[Document]:
+        dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
+        if not dataset:
+            return []
+
+        kw_table_index = KeywordTableIndex(
+            dataset=dataset,
+            config=KeywordTableConfig(
+                max_keywords_per_chunk=5
+            )
+        )
+
+        return kw_table_index.search(query, search_kwargs={'k': self.top_k})
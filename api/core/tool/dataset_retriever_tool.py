@@ -1,8 +1,6 @@
 import json
-import threading
 from typing import Type, Optional, List
 
-from flask import current_app
 from langchain.tools import BaseTool
 from pydantic import Field, BaseModel
 
@@ -10,11 +8,12 @@ from core.callback_handler.index_tool_callback_handler import DatasetIndexToolCa
 from core.conversation_message_task import ConversationMessageTask
 from core.embedding.cached_embedding import CacheEmbedding
 from core.index.keyword_table_index.keyword_table_index import KeywordTableIndex, KeywordTableConfig
+from core.index.segment_hydrator import SegmentHydrator
 from core.index.vector_index.vector_index import VectorIndex
 from core.model_providers.error import LLMBadRequestError, ProviderTokenNotInitError
 from core.model_providers.model_factory import ModelFactory
 from extensions.ext_database import db
-from models.dataset import Dataset, DocumentSegment, Document
+from models.dataset import Dataset
 from services.retrieval_service import RetrievalService
 
 default_retrieval_model = {
@@ -100,58 +99,14 @@ class DatasetRetrieverTool(BaseTool):
             embeddings = CacheEmbedding(embedding_model)
 
             documents = []
-            threads = []
             if self.top_k > 0:
-                # retrieval source with semantic
-                if retrieval_model['search_method'] == 'semantic_search' or retrieval_model['search_method'] == 'hybrid_search':
-                    embedding_thread = threading.Thread(target=RetrievalService.embedding_search, kwargs={
-                        'flask_app': current_app._get_current_object(),
-                        'dataset_id': str(dataset.id),
-                        'query': query,
-                        'top_k': self.top_k,
-                        'score_threshold': retrieval_model['score_threshold'] if retrieval_model[
-                            'score_threshold_enabled'] else None,
-                        'reranking_model': retrieval_model['reranking_model'] if retrieval_model[
-                            'reranking_enable'] else None,
-                        'all_documents': documents,
-                        'search_method': retrieval_model['search_method'],
-                        'embeddings': embeddings
-                    })
-                    threads.append(embedding_thread)
-                    embedding_thread.start()
-
-                # retrieval_model source with full text
-                if retrieval_model['search_method'] == 'full_text_search' or retrieval_model['search_method'] == 'hybrid_search':
-                    full_text_index_thread = threading.Thread(target=RetrievalService.full_text_index_search, kwargs={
-                        'flask_app': current_app._get_current_object(),
-                        'dataset_id': str(dataset.id),
-                        'query': query,
-                        'search_method': retrieval_model['search_method'],
-                        'embeddings': embeddings,
-                        'score_threshold': retrieval_model['score_threshold'] if retrieval_model[
-                            'score_threshold_enabled'] else None,
-                        'top_k': self.top_k,
-                        'reranking_model': retrieval_model['reranking_model'] if retrieval_model[
-                            'reranking_enable'] else None,
-                        'all_documents': documents
-                    })
-                    threads.append(full_text_index_thread)
-                    full_text_index_thread.start()
-
-                for thread in threads:
-                    thread.join()
-                # hybrid search: rerank after all documents have been searched
-                if retrieval_model['search_method'] == 'hybrid_search':
-                    hybrid_rerank = ModelFactory.get_reranking_model(
-                        tenant_id=dataset.tenant_id,
-                        model_provider_name=retrieval_model['reranking_model']['reranking_provider_name'],
-                        model_name=retrieval_model['reranking_model']['reranking_model_name']
-                    )
-                    documents = hybrid_rerank.rerank(query, documents,
-                                                     retrieval_model['score_threshold'] if retrieval_model['score_threshold_enabled'] else None,
-                                                     self.top_k)
-            else:
-                documents = []
+                documents = RetrievalService.retrieve(
+                    dataset=dataset,
+                    query=query,
+                    retrieval_model=retrieval_model,
+                    top_k=self.top_k,
+                    embeddings=embeddings
+                )
 
             hit_callback = DatasetIndexToolCallbackHandler(self.conversation_message_task)
             hit_callback.on_tool_end(documents)
@@ -161,32 +116,22 @@ class DatasetRetrieverTool(BaseTool):
                     document_score_list[item.metadata['doc_id']] = item.metadata['score']
             document_context_list = []
             index_node_ids = [document.metadata['doc_id'] for document in documents]
-            segments = DocumentSegment.query.filter(DocumentSegment.dataset_id == self.dataset_id,
-                                                    DocumentSegment.completed_at.isnot(None),
-                                                    DocumentSegment.status == 'completed',
-                                                    DocumentSegment.enabled == True,
-                                                    DocumentSegment.index_node_id.in_(index_node_ids)
-                                                    ).all()
-
-            if segments:
-                index_node_id_to_position = {id: position for position, id in enumerate(index_node_ids)}
-                sorted_segments = sorted(segments,
-                                         key=lambda segment: index_node_id_to_position.get(segment.index_node_id,
-                                                                                           float('inf')))
+            sorted_segments = SegmentHydrator.get_segments(index_node_ids, dataset_id=self.dataset_id,
+                                                           available_only=True)
+
+            if sorted_segments:
                 for segment in sorted_segments:
                     if segment.answer:
                         document_context_list.append(f'question:{segment.content} answer:{segment.answer}')
                     else:
                         document_context_list.append(segment.content)
                 if self.return_resource:
+                    documents_by_id = SegmentHydrator.get_documents(sorted_segments)
                     context_list = []
                     resource_number = 1
                     for segment in sorted_segments:
                         context = {}
-                        document = Document.query.filter(Document.id == segment.document_id,
-                                                         Document.enabled == True,
-                                                         Document.archived == False,
-                                                         ).first()
+                        document = documents_by_id.get(segment.document_id)
                         if dataset and document:
                             source = {
                                 'position': resource_number,
@@ -2,6 +2,7 @@ from events.app_event import app_model_config_was_updated
 from extensions.ext_database import db
 from models.dataset import AppDatasetJoin
 from models.model import AppModelConfig
+from services.dataset_counter_service import DatasetCounterService
 
 
 @app_model_config_was_updated.connect
@@ -42,6 +43,7 @@ def handle(sender, **kwargs):
             db.session.add(app_dataset_join)
 
     db.session.commit()
+    DatasetCounterService.refresh_counters(list(added_dataset_ids | set(removed_dataset_ids)))
 
 
 def get_dataset_ids_from_model_config(app_model_config: AppModelConfig) -> set:
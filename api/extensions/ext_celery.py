@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from celery import Task, Celery
 from flask import Flask
 
@@ -28,6 +30,26 @@ def init_app(app: Flask) -> Celery:
         result_backend=app.config["CELERY_RESULT_BACKEND"],
     )
 
+    # periodic tasks, run by `celery -A app.celery beat` and consumed from the schedule queue
+    celery_app.conf.update(
+        imports=['tasks.app_statistic_rollup_task', 'tasks.provider_usage_flush_task',
+                 'tasks.api_token_last_used_flush_task'],
+        beat_schedule={
+            'app_statistic_rollup_task': {
+                'task': 'tasks.app_statistic_rollup_task.app_statistic_rollup_task',
+                'schedule': timedelta(seconds=int(app.config["APP_STATISTIC_ROLLUP_INTERVAL"])),
+            },
+            'provider_usage_flush_task': {
+                'task': 'tasks.provider_usage_flush_task.provider_usage_flush_task',
+                'schedule': timedelta(seconds=int(app.config["PROVIDER_USAGE_FLUSH_INTERVAL"])),
+            },
+            'api_token_last_used_flush_task': {
+                'task': 'tasks.api_token_last_used_flush_task.api_token_last_used_flush_task',
+                'schedule': timedelta(seconds=int(app.config["API_TOKEN_LAST_USED_FLUSH_INTERVAL"])),
+            }
+        }
+    )
+
     if app.config["BROKER_USE_SSL"]:
         celery_app.conf.update(
             broker_use_ssl=ssl_options,  # Add the SSL options to the broker configuration
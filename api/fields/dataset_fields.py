@@ -21,6 +21,8 @@ dataset_retrieval_model_fields = {
     'search_method': fields.String,
     'reranking_enable': fields.Boolean,
     'reranking_model': fields.Nested(reranking_model_fields),
+    'fusion_method': fields.String,
+    'semantic_weight': fields.Float,
     'top_k': fields.Integer,
     'score_threshold_enabled': fields.Boolean,
     'score_threshold': fields.Float
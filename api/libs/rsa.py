@@ -1,9 +1,13 @@
 # -*- coding:utf-8 -*-
 import hashlib
+import threading
+from typing import Optional
 
+from cachetools import TTLCache
 from Crypto.Cipher import PKCS1_OAEP, AES
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
+from flask import current_app
 
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
@@ -19,6 +23,7 @@ def generate_key_pair(tenant_id):
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
     storage.save(filepath, pem_private)
+    purge_decryption_cache(tenant_id)
 
     return pem_public.decode()
 
@@ -46,9 +51,52 @@ def encrypt(text, public_key):
 
 
 def decrypt(encrypted_text, tenant_id):
+    decryption_cache = get_decryption_cache()
+    text_cache_key = (tenant_id, hashlib.sha256(encrypted_text).digest())
+    decrypted_text = decryption_cache.get_text(text_cache_key)
+    if decrypted_text is not None:
+        return decrypted_text
+
+    rsa_key = decryption_cache.get_key(tenant_id)
+    if rsa_key is None:
+        rsa_key = _load_private_key(tenant_id)
+        decrypted_text = _decrypt_with_key(encrypted_text, rsa_key)
+    else:
+        try:
+            decrypted_text = _decrypt_with_key(encrypted_text, rsa_key)
+        except ValueError:
+            # the key pair was reset by another process, load the new private key
+            decryption_cache.purge(tenant_id)
+            rsa_key = _load_private_key(tenant_id)
+            decrypted_text = _decrypt_with_key(encrypted_text, rsa_key)
+
+    decryption_cache.set_key(tenant_id, rsa_key)
+    decryption_cache.set_text(text_cache_key, decrypted_text)
+
+    return decrypted_text
+
+
+def purge_decryption_cache(tenant_id: Optional[str] = None):
+    """
+    Purge the private keys and decrypted texts cached in this process, and the private key cached in redis.
+
+    :param tenant_id: tenant whose cache is purged, all tenants when None
+    """
+    get_decryption_cache().purge(tenant_id)
+
+    if tenant_id:
+        redis_client.delete(_private_key_cache_key(tenant_id))
+
+
+def _private_key_cache_key(tenant_id: str) -> str:
+    filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
+    return 'tenant_privkey:{hash}'.format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
+
+
+def _load_private_key(tenant_id: str) -> RSA.RsaKey:
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
-    cache_key = 'tenant_privkey:{hash}'.format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
+    cache_key = _private_key_cache_key(tenant_id)
     private_key = redis_client.get(cache_key)
     if not private_key:
         try:
@@ -58,7 +106,10 @@ def decrypt(encrypted_text, tenant_id):
 
         redis_client.setex(cache_key, 120, private_key)
 
-    rsa_key = RSA.import_key(private_key)
+    return RSA.import_key(private_key)
+
+
+def _decrypt_with_key(encrypted_text: bytes, rsa_key: RSA.RsaKey) -> str:
     cipher_rsa = PKCS1_OAEP.new(rsa_key)
 
     if encrypted_text.startswith(prefix_hybrid):
@@ -79,5 +130,77 @@ def decrypt(encrypted_text, tenant_id):
     return decrypted_text.decode()
 
 
+class DecryptionCache:
+    """
+    Process-local cache of the parsed private keys of tenants and of the texts decrypted with them,
+    both expiring after a short TTL, so that decrypting the same credentials skips the key import and the OAEP.
+    """
+
+    KINDS = ('key', 'text')
+
+    def __init__(self, max_size: int, ttl: int):
+        self._keys = TTLCache(maxsize=max_size, ttl=ttl)
+        self._texts = TTLCache(maxsize=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self._counters = {f'{kind}_{result}': 0 for kind in self.KINDS for result in ('hits', 'misses')}
+
+    def get_key(self, tenant_id: str) -> Optional[RSA.RsaKey]:
+        return self._get('key', self._keys, tenant_id)
+
+    def set_key(self, tenant_id: str, rsa_key: RSA.RsaKey):
+        with self._lock:
+            self._keys[tenant_id] = rsa_key
+
+    def get_text(self, cache_key: tuple) -> Optional[str]:
+        return self._get('text', self._texts, cache_key)
+
+    def set_text(self, cache_key: tuple, decrypted_text: str):
+        with self._lock:
+            self._texts[cache_key] = decrypted_text
+
+    def purge(self, tenant_id: Optional[str] = None):
+        with self._lock:
+            if tenant_id is None:
+                self._keys.clear()
+                self._texts.clear()
+                return
+
+            self._keys.pop(tenant_id, None)
+            for cache_key in [cache_key for cache_key in self._texts.keys() if cache_key[0] == tenant_id]:
+                self._texts.pop(cache_key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['key_size'] = len(self._keys)
+            stats['text_size'] = len(self._texts)
+
+        return stats
+
+    def _get(self, kind: str, cache: TTLCache, cache_key):
+        with self._lock:
+            value = cache.get(cache_key)
+            self._counters[f'{kind}_hits' if value is not None else f'{kind}_misses'] += 1
+
+        return value
+
+
+_decryption_cache: Optional[DecryptionCache] = None
+_decryption_cache_lock = threading.Lock()
+
+
+def get_decryption_cache() -> DecryptionCache:
+    global _decryption_cache
+    if _decryption_cache is None:
+        with _decryption_cache_lock:
+            if _decryption_cache is None:
+                _decryption_cache = DecryptionCache(
+                    max_size=int(current_app.config.get('RSA_DECRYPTION_CACHE_SIZE', 1000)),
+                    ttl=int(current_app.config.get('RSA_DECRYPTION_CACHE_TTL', 120))
+                )
+
+    return _decryption_cache
+
+
 class PrivkeyNotFoundError(Exception):
     pass
@@ -2,6 +2,7 @@ import json
 import pickle
 from json import JSONDecodeError
 
+import numpy as np
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 
@@ -41,6 +42,12 @@ class Dataset(db.Model):
     embedding_model_provider = db.Column(db.String(255), nullable=True)
     collection_binding_id = db.Column(UUID, nullable=True)
     retrieval_model = db.Column(JSONB, nullable=True)
+    # counters refreshed by DatasetCounterService, null until they are first computed
+    _app_count = db.Column('app_count', db.Integer, nullable=True)
+    _document_count = db.Column('document_count', db.Integer, nullable=True)
+    _available_document_count = db.Column('available_document_count', db.Integer, nullable=True)
+    _available_segment_count = db.Column('available_segment_count', db.Integer, nullable=True)
+    _word_count = db.Column('word_count', db.BigInteger, nullable=True)
 
     @property
     def dataset_keyword_table(self):
@@ -66,14 +73,23 @@ class Dataset(db.Model):
 
     @property
     def app_count(self):
+        if self._app_count is not None:
+            return self._app_count
+
         return db.session.query(func.count(AppDatasetJoin.id)).filter(AppDatasetJoin.dataset_id == self.id).scalar()
 
     @property
     def document_count(self):
+        if self._document_count is not None:
+            return self._document_count
+
         return db.session.query(func.count(Document.id)).filter(Document.dataset_id == self.id).scalar()
 
     @property
     def available_document_count(self):
+        if self._available_document_count is not None:
+            return self._available_document_count
+
         return db.session.query(func.count(Document.id)).filter(
             Document.dataset_id == self.id,
             Document.indexing_status == 'completed',
@@ -83,6 +99,9 @@ class Dataset(db.Model):
 
     @property
     def available_segment_count(self):
+        if self._available_segment_count is not None:
+            return self._available_segment_count
+
         return db.session.query(func.count(DocumentSegment.id)).filter(
             DocumentSegment.dataset_id == self.id,
             DocumentSegment.status == 'completed',
@@ -91,6 +110,9 @@ class Dataset(db.Model):
 
     @property
     def word_count(self):
+        if self._word_count is not None:
+            return self._word_count
+
         return Document.query.with_entities(func.coalesce(func.sum(Document.word_count))) \
             .filter(Document.dataset_id == self.id).scalar()
 
@@ -361,11 +383,11 @@ class DocumentSegment(db.Model):
 
     @property
     def dataset(self):
-        return db.session.query(Dataset).filter(Dataset.id == self.dataset_id).first()
+        return db.session.get(Dataset, self.dataset_id)
 
     @property
     def document(self):
-        return db.session.query(Document).filter(Document.id == self.document_id).first()
+        return db.session.get(Document, self.document_id)
 
     @property
     def previous_segment(self):
@@ -426,6 +448,8 @@ class DatasetKeywordTable(db.Model):
     id = db.Column(UUID, primary_key=True, server_default=db.text('uuid_generate_v4()'))
     dataset_id = db.Column(UUID, nullable=False, unique=True)
     keyword_table = db.Column(db.Text, nullable=False)
+    # json: the whole table is kept in `keyword_table`, inverted_index: rows of `dataset_keyword_postings`
+    storage_type = db.Column(db.String(255), nullable=False, server_default=db.text("'json'::character varying"))
 
     @property
     def keyword_table_dict(self):
@@ -443,6 +467,21 @@ class DatasetKeywordTable(db.Model):
         return json.loads(self.keyword_table, cls=SetDecoder) if self.keyword_table else None
 
 
+class DatasetKeywordPosting(db.Model):
+    __tablename__ = 'dataset_keyword_postings'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('id', name='dataset_keyword_posting_pkey'),
+        db.UniqueConstraint('dataset_id', 'keyword', 'index_node_id', name='dataset_keyword_posting_keyword_idx'),
+        db.Index('dataset_keyword_posting_node_idx', 'dataset_id', 'index_node_id'),
+    )
+
+    id = db.Column(UUID, primary_key=True, server_default=db.text('uuid_generate_v4()'))
+    dataset_id = db.Column(UUID, nullable=False)
+    keyword = db.Column(db.String(255), nullable=False)
+    index_node_id = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
+
+
 class Embedding(db.Model):
     __tablename__ = 'embeddings'
     __table_args__ = (
@@ -457,11 +496,54 @@ class Embedding(db.Model):
     embedding = db.Column(db.LargeBinary, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
 
-    def set_embedding(self, embedding_data: list[float]):
-        self.embedding = pickle.dumps(embedding_data, protocol=pickle.HIGHEST_PROTOCOL)
+    # compact storage format: magic (2 bytes) + version (1 byte) + dtype code (1 byte) + little-endian vector.
+    # rows written before the compact format are pickled python lists, which never start with the magic bytes.
+    STORAGE_MAGIC = b'\xdb\xe5'
+    STORAGE_VERSION = 1
+    STORAGE_HEADER_SIZE = 4
+    STORAGE_DTYPES = {
+        0: np.dtype('<f4'),
+        1: np.dtype('<f2'),
+    }
+
+    def set_embedding(self, embedding_data: list[float], dtype: str = 'float32'):
+        self.embedding = self.encode_embedding(embedding_data, dtype)
 
     def get_embedding(self) -> list[float]:
-        return pickle.loads(self.embedding)
+        return self.decode_embedding(self.embedding).tolist()
+
+    def get_embedding_array(self) -> np.ndarray:
+        return self.decode_embedding(self.embedding)
+
+    def is_compact_embedding(self) -> bool:
+        return self.is_compact_format(self.embedding)
+
+    @classmethod
+    def encode_embedding(cls, embedding_data: list[float], dtype: str = 'float32') -> bytes:
+        dtype_code = next((code for code, storage_dtype in cls.STORAGE_DTYPES.items()
+                           if storage_dtype.name == dtype), None)
+        if dtype_code is None:
+            raise ValueError(f'Unsupported embedding storage dtype: {dtype}')
+
+        header = cls.STORAGE_MAGIC + bytes([cls.STORAGE_VERSION, dtype_code])
+        return header + np.asarray(embedding_data, dtype=cls.STORAGE_DTYPES[dtype_code]).tobytes()
+
+    @classmethod
+    def decode_embedding(cls, data: bytes) -> np.ndarray:
+        """Decode an embedding, float32 vectors are returned as a read-only view over `data` without copying."""
+        if not cls.is_compact_format(data):
+            return np.asarray(pickle.loads(data), dtype=np.float64)
+
+        version, dtype_code = data[2], data[3]
+        if version != cls.STORAGE_VERSION or dtype_code not in cls.STORAGE_DTYPES:
+            raise ValueError(f'Unsupported embedding storage format: version {version}, dtype {dtype_code}')
+
+        vector = np.frombuffer(data, dtype=cls.STORAGE_DTYPES[dtype_code], offset=cls.STORAGE_HEADER_SIZE)
+        return vector if vector.dtype == np.float32 else vector.astype(np.float32)
+
+    @classmethod
+    def is_compact_format(cls, data: bytes) -> bool:
+        return data is not None and bytes(data[:2]) == cls.STORAGE_MAGIC
 
 
 class DatasetCollectionBinding(db.Model):
@@ -10,6 +10,25 @@ from extensions.ext_database import db
 from .account import Account, Tenant
 
 
+class PreloadedValuesMixin:
+    """
+    Lets a listing attach the values of query backed properties, loaded in a few queries for the whole page.
+    Properties only query the database when their value was not attached.
+    """
+
+    def set_preloaded_value(self, name: str, value):
+        if getattr(self, '_preloaded_values', None) is None:
+            self._preloaded_values = {}
+
+        self._preloaded_values[name] = value
+
+    def has_preloaded_value(self, name: str) -> bool:
+        return name in (getattr(self, '_preloaded_values', None) or {})
+
+    def get_preloaded_value(self, name: str):
+        return self._preloaded_values[name]
+
+
 class DifySetup(db.Model):
     __tablename__ = 'dify_setups'
     __table_args__ = (
@@ -344,7 +363,7 @@ class InstalledApp(db.Model):
         return tenant
 
 
-class Conversation(db.Model):
+class Conversation(PreloadedValuesMixin, db.Model):
     __tablename__ = 'conversations'
     __table_args__ = (
         db.PrimaryKeyConstraint('id', name='conversation_pkey'),
@@ -398,8 +417,11 @@ class Conversation(db.Model):
             else:
                 model_config['configs'] = override_model_configs
         else:
-            app_model_config = db.session.query(AppModelConfig).filter(
-                AppModelConfig.id == self.app_model_config_id).first()
+            if self.has_preloaded_value('app_model_config'):
+                app_model_config = self.get_preloaded_value('app_model_config')
+            else:
+                app_model_config = db.session.query(AppModelConfig).filter(
+                    AppModelConfig.id == self.app_model_config_id).first()
 
             model_config = app_model_config.to_dict()
 
@@ -421,18 +443,30 @@ class Conversation(db.Model):
 
     @property
     def annotated(self):
+        if self.has_preloaded_value('annotation'):
+            return self.get_preloaded_value('annotation') is not None
+
         return db.session.query(MessageAnnotation).filter(MessageAnnotation.conversation_id == self.id).count() > 0
 
     @property
     def annotation(self):
+        if self.has_preloaded_value('annotation'):
+            return self.get_preloaded_value('annotation')
+
         return db.session.query(MessageAnnotation).filter(MessageAnnotation.conversation_id == self.id).first()
 
     @property
     def message_count(self):
+        if self.has_preloaded_value('message_count'):
+            return self.get_preloaded_value('message_count')
+
         return db.session.query(Message).filter(Message.conversation_id == self.id).count()
 
     @property
     def user_feedback_stats(self):
+        if self.has_preloaded_value('user_feedback_stats'):
+            return self.get_preloaded_value('user_feedback_stats')
+
         like = db.session.query(MessageFeedback) \
             .filter(MessageFeedback.conversation_id == self.id,
                     MessageFeedback.from_source == 'user',
@@ -447,6 +481,9 @@ class Conversation(db.Model):
 
     @property
     def admin_feedback_stats(self):
+        if self.has_preloaded_value('admin_feedback_stats'):
+            return self.get_preloaded_value('admin_feedback_stats')
+
         like = db.session.query(MessageFeedback) \
             .filter(MessageFeedback.conversation_id == self.id,
                     MessageFeedback.from_source == 'admin',
@@ -461,17 +498,26 @@ class Conversation(db.Model):
 
     @property
     def first_message(self):
+        if self.has_preloaded_value('first_message'):
+            return self.get_preloaded_value('first_message')
+
         return db.session.query(Message).filter(Message.conversation_id == self.id).first()
 
     @property
     def app(self):
+        if self.has_preloaded_value('app'):
+            return self.get_preloaded_value('app')
+
         return db.session.query(App).filter(App.id == self.app_id).first()
 
     @property
     def from_end_user_session_id(self):
         if self.from_end_user_id:
-            end_user = db.session.query(EndUser).filter(
-                EndUser.id == self.from_end_user_id).first()
+            if self.has_preloaded_value('from_end_user'):
+                end_user = self.get_preloaded_value('from_end_user')
+            else:
+                end_user = db.session.query(EndUser).filter(
+                    EndUser.id == self.from_end_user_id).first()
             if end_user:
                 return end_user.session_id
 
@@ -492,6 +538,7 @@ class Message(db.Model):
                  'from_source', 'from_end_user_id'),
         db.Index('message_account_idx', 'app_id',
                  'from_source', 'from_account_id'),
+        db.Index('message_created_at_idx', 'created_at'),
     )
 
     id = db.Column(UUID, server_default=db.text('uuid_generate_v4()'))
@@ -515,6 +562,9 @@ class Message(db.Model):
     answer_unit_price = db.Column(db.Numeric(10, 4), nullable=False)
     answer_price_unit = db.Column(db.Numeric(
         10, 7), nullable=False, server_default=db.text('0.001'))
+    # tokens of the query and the answer as conversation history, counted with the model of the message
+    history_query_tokens = db.Column(db.Integer)
+    history_answer_tokens = db.Column(db.Integer)
     provider_response_latency = db.Column(
         db.Float, nullable=False, server_default=db.text('0'))
     total_price = db.Column(db.Numeric(10, 7))
@@ -659,7 +709,7 @@ class MessageFile(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
 
 
-class MessageAnnotation(db.Model):
+class MessageAnnotation(PreloadedValuesMixin, db.Model):
     __tablename__ = 'message_annotations'
     __table_args__ = (
         db.PrimaryKeyConstraint('id', name='message_annotation_pkey'),
@@ -682,6 +732,9 @@ class MessageAnnotation(db.Model):
 
     @property
     def account(self):
+        if self.has_preloaded_value('account'):
+            return self.get_preloaded_value('account')
+
         account = db.session.query(Account).filter(
             Account.id == self.account_id).first()
         return account
@@ -931,3 +984,38 @@ class DatasetRetrieverResource(db.Model):
     retriever_from = db.Column(db.Text, nullable=False)
     created_by = db.Column(UUID, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.current_timestamp())
+
+
+class AppHourlyStatistic(db.Model):
+    __tablename__ = 'app_hourly_statistics'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('id', name='app_hourly_statistic_pkey'),
+        db.UniqueConstraint('app_id', 'hour', name='app_hourly_statistic_app_hour_idx')
+    )
+
+    id = db.Column(UUID, nullable=False, server_default=db.text('uuid_generate_v4()'))
+    app_id = db.Column(UUID, nullable=False)
+    # start of the hour in UTC
+    hour = db.Column(db.DateTime, nullable=False)
+    message_count = db.Column(db.Integer, nullable=False, server_default=db.text('0'))
+    message_tokens = db.Column(db.BigInteger, nullable=False, server_default=db.text('0'))
+    answer_tokens = db.Column(db.BigInteger, nullable=False, server_default=db.text('0'))
+    total_price = db.Column(db.Numeric(16, 7), nullable=False, server_default=db.text('0'))
+    provider_response_latency = db.Column(db.Float, nullable=False, server_default=db.text('0'))
+    feedback_count = db.Column(db.Integer, nullable=False, server_default=db.text('0'))
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
+
+
+class AppHourlyConversation(db.Model):
+    __tablename__ = 'app_hourly_conversations'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('id', name='app_hourly_conversation_pkey'),
+        db.UniqueConstraint('app_id', 'hour', 'conversation_id', name='app_hourly_conversation_app_hour_idx')
+    )
+
+    id = db.Column(UUID, nullable=False, server_default=db.text('uuid_generate_v4()'))
+    app_id = db.Column(UUID, nullable=False)
+    # start of the hour in UTC
+    hour = db.Column(db.DateTime, nullable=False)
+    conversation_id = db.Column(UUID, nullable=False)
+    from_end_user_id = db.Column(UUID)
@@ -173,3 +173,18 @@ class ProviderOrder(db.Model):
     refunded_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
     updated_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
+
+
+class ProviderUsageFlush(db.Model):
+    """
+    Batches of provider usage flushed from redis, recorded in the transaction applying them,
+    so that a batch retried after a crash or by a concurrent flush is not applied twice.
+    """
+    __tablename__ = 'provider_usage_flushes'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('id', name='provider_usage_flush_pkey'),
+        db.Index('provider_usage_flush_created_at_idx', 'created_at'),
+    )
+
+    id = db.Column(UUID, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from flask import current_app
+from redis import ResponseError
+from sqlalchemy import case
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.model import ApiToken
+
+LAST_USED_PENDING_KEY = 'api_token:last_used_pending'
+LAST_USED_FLUSHING_KEY = LAST_USED_PENDING_KEY + ':flushing'
+FLUSH_LOCK_KEY = 'api_token:last_used_flush_lock'
+FLUSH_LOCK_TIMEOUT = 600
+
+
+class ApiTokenCache:
+    """
+    Redis cache of the API tokens authenticating the service API, for `API_TOKEN_CACHE_TTL` seconds.
+    Entries are keyed by a digest of the token, so that tokens are not stored as redis keys,
+    and hold the columns of the token as json.
+
+    There is no in-process tier, so that deleting a token drops it for every process at once.
+    """
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0}
+
+    def get(self, scope: str, token: str) -> Optional[dict]:
+        try:
+            data = redis_client.get(self._cache_key(scope, token))
+        except Exception:
+            logging.exception('Failed to get api token from redis')
+            data = None
+
+        if data is None:
+            self._incr('misses')
+            return None
+        self._incr('hits')
+
+        return json.loads(data)
+
+    def set(self, scope: str, token: str, api_token: dict):
+        try:
+            redis_client.setex(self._cache_key(scope, token), self._ttl, json.dumps(api_token))
+        except Exception:
+            logging.exception('Failed to set api token to redis')
+
+    def delete(self, scope: str, token: str):
+        try:
+            redis_client.delete(self._cache_key(scope, token))
+        except Exception:
+            logging.exception('Failed to delete api token from redis')
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def _incr(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    @staticmethod
+    def _cache_key(scope: str, token: str) -> str:
+        return f'api_token:{scope}:{hashlib.sha256(token.encode()).hexdigest()}'
+
+
+_api_token_cache: Optional[ApiTokenCache] = None
+_api_token_cache_lock = threading.Lock()
+
+
+def get_api_token_cache() -> ApiTokenCache:
+    global _api_token_cache
+    if _api_token_cache is None:
+        with _api_token_cache_lock:
+            if _api_token_cache is None:
+                _api_token_cache = ApiTokenCache(
+                    ttl=int(current_app.config.get('API_TOKEN_CACHE_TTL', 60))
+                )
+
+    return _api_token_cache
+
+
+class ApiTokenService:
+    """
+    Authentication of the service API by API tokens without writing to the database.
+
+    Tokens are read through `ApiTokenCache`, and their `last_used_at` is recorded in a redis hash
+    which a periodic task flushes to `api_tokens` every `API_TOKEN_LAST_USED_FLUSH_INTERVAL` seconds.
+    """
+
+    @classmethod
+    def get_api_token(cls, token: str, scope: str) -> Optional[ApiToken]:
+        """
+        Get the API token of a scope, as an ApiToken detached from the session.
+
+        :param token: token value
+        :param scope: token type, `app` or `dataset`
+        """
+        api_token_cache = get_api_token_cache()
+        cached_api_token = api_token_cache.get(scope, token)
+        if cached_api_token is None:
+            api_token = db.session.query(ApiToken).filter(
+                ApiToken.token == token,
+                ApiToken.type == scope,
+            ).first()
+
+            # unknown tokens are not cached, the table stays the source of truth for new tokens
+            if not api_token:
+                return None
+
+            cached_api_token = {
+                'id': api_token.id,
+                'app_id': api_token.app_id,
+                'tenant_id': api_token.tenant_id,
+                'type': api_token.type
+            }
+            api_token_cache.set(scope, token, cached_api_token)
+
+        return ApiToken(token=token, **cached_api_token)
+
+    @classmethod
+    def invalidate(cls, api_token: ApiToken):
+        """Drop a deleted API token from the caches."""
+        get_api_token_cache().delete(api_token.type, api_token.token)
+
+    @classmethod
+    def record_last_used(cls, api_token: ApiToken):
+        """Record the last used time of an API token, flushed to the table later."""
+        try:
+            redis_client.hset(LAST_USED_PENDING_KEY, api_token.id, time.time())
+        except Exception:
+            logging.exception('Failed to record api token last used time to redis')
+
+    @classmethod
+    def flush_last_used(cls) -> int:
+        """
+        Flush the recorded last used times to `api_tokens` with one statement.
+
+        The pending hash is renamed before it is read, so that requests during the flush record into a new hash.
+        A failed flush leaves the renamed hash in place, and the next flush applies it first.
+        Flushes are serialized by a redis lock, an overlapping flush is skipped.
+
+        :return: number of the flushed API tokens
+        """
+        lock = redis_client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT)
+        if not lock.acquire(blocking=False):
+            logging.info('API token last used times are being flushed by another worker, skipped')
+            return 0
+
+        try:
+            return cls._flush_last_used()
+        finally:
+            lock.release()
+
+    @classmethod
+    def _flush_last_used(cls) -> int:
+        if not redis_client.exists(LAST_USED_FLUSHING_KEY):
+            try:
+                redis_client.rename(LAST_USED_PENDING_KEY, LAST_USED_FLUSHING_KEY)
+            except ResponseError:
+                # no API token used since the last flush
+                return 0
+
+        last_used_times = {
+            api_token_id.decode('utf-8'): datetime.utcfromtimestamp(float(last_used))
+            for api_token_id, last_used in redis_client.hgetall(LAST_USED_FLUSHING_KEY).items()
+        }
+
+        if last_used_times:
+            try:
+                db.session.query(ApiToken).filter(ApiToken.id.in_(list(last_used_times))) \
+                    .update({'last_used_at': case(last_used_times, value=ApiToken.id)}, synchronize_session=False)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        redis_client.delete(LAST_USED_FLUSHING_KEY)
+        return len(last_used_times)
@@ -0,0 +1,187 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import pytz
+from flask import current_app
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+
+# end of the rolled up hours, all messages created before it are in the hourly tables
+ROLLUP_WATERMARK_KEY = 'app_statistic_rollup_watermark'
+
+EPOCH = datetime(1970, 1, 1)
+
+# columns of each hourly table and the expression computing them from a single message
+ROLLUP_COLUMNS = {
+    'app_hourly_statistics': {
+        'message_count': '1',
+        'message_tokens': 'messages.message_tokens',
+        'answer_tokens': 'messages.answer_tokens',
+        'total_price': 'COALESCE(messages.total_price, 0)',
+        'provider_response_latency': 'messages.provider_response_latency',
+        'feedback_count': '(SELECT COUNT(*) FROM message_feedbacks mf WHERE mf.message_id = messages.id)',
+    },
+    'app_hourly_conversations': {
+        'conversation_id': 'messages.conversation_id',
+        'from_end_user_id': 'messages.from_end_user_id',
+    }
+}
+
+STATISTICS_ROLLUP_SQL = '''
+INSERT INTO app_hourly_statistics (app_id, hour, message_count, message_tokens, answer_tokens, total_price,
+    provider_response_latency, feedback_count, updated_at)
+SELECT messages.app_id, DATE_TRUNC('hour', messages.created_at) AS hour, COUNT(messages.id),
+    SUM(messages.message_tokens), SUM(messages.answer_tokens), COALESCE(SUM(messages.total_price), 0),
+    SUM(messages.provider_response_latency),
+    SUM((SELECT COUNT(*) FROM message_feedbacks mf WHERE mf.message_id = messages.id)),
+    CURRENT_TIMESTAMP(0)
+FROM messages
+WHERE messages.created_at >= :start AND messages.created_at < :end
+GROUP BY messages.app_id, hour
+ON CONFLICT (app_id, hour) DO UPDATE SET
+    message_count = EXCLUDED.message_count,
+    message_tokens = EXCLUDED.message_tokens,
+    answer_tokens = EXCLUDED.answer_tokens,
+    total_price = EXCLUDED.total_price,
+    provider_response_latency = EXCLUDED.provider_response_latency,
+    feedback_count = EXCLUDED.feedback_count,
+    updated_at = EXCLUDED.updated_at
+'''
+
+CONVERSATIONS_ROLLUP_SQL = '''
+INSERT INTO app_hourly_conversations (app_id, hour, conversation_id, from_end_user_id)
+SELECT messages.app_id, DATE_TRUNC('hour', messages.created_at) AS hour, messages.conversation_id,
+    (ARRAY_AGG(messages.from_end_user_id))[1]
+FROM messages
+WHERE messages.created_at >= :start AND messages.created_at < :end
+GROUP BY messages.app_id, hour, messages.conversation_id
+ON CONFLICT (app_id, hour, conversation_id) DO NOTHING
+'''
+
+
+class AppStatisticService:
+    """
+    Daily app statistics read from hourly per-app rollups of the messages.
+
+    A periodic task rolls up the complete hours into `app_hourly_statistics` and `app_hourly_conversations`
+    and recomputes the last `APP_STATISTIC_ROLLUP_LOOKBACK_HOURS`, so that answers finished
+    and feedbacks given later are counted.
+    Messages after the rollup watermark and the partial hours at the edges of a range are read from `messages`.
+    """
+
+    @classmethod
+    def rollup(cls, now: Optional[datetime] = None):
+        """
+        Roll up the complete hours since the watermark, all hours on the first run, and advance the watermark.
+        """
+        end = cls._floor_hour(now or datetime.utcnow())
+        lookback = timedelta(hours=int(current_app.config.get('APP_STATISTIC_ROLLUP_LOOKBACK_HOURS', 24)))
+
+        watermark = cls.get_rollup_watermark()
+        start = min(watermark, end) - lookback if watermark else EPOCH
+
+        with db.engine.begin() as conn:
+            conn.execute(db.text(STATISTICS_ROLLUP_SQL), {'start': start, 'end': end})
+            conn.execute(db.text(CONVERSATIONS_ROLLUP_SQL), {'start': start, 'end': end})
+
+        redis_client.set(ROLLUP_WATERMARK_KEY, end.isoformat())
+        logging.info(f'Rolled up app statistics from {start} to {end}')
+
+    @staticmethod
+    def get_rollup_watermark() -> Optional[datetime]:
+        watermark = redis_client.get(ROLLUP_WATERMARK_KEY)
+        if not watermark:
+            return None
+
+        return datetime.fromisoformat(watermark.decode('utf-8'))
+
+    @classmethod
+    def get_daily_statistics(cls, app_id: str, timezone: str, start: Optional[datetime], end: Optional[datetime],
+                             table: str, columns: List[str], aggregates: str) -> list:
+        """
+        Aggregate the messages of an app by day in a timezone.
+
+        :param app_id: app id
+        :param timezone: timezone of the days
+        :param start: start of the range in UTC, included
+        :param end: end of the range in UTC, excluded
+        :param table: hourly table holding the columns, `app_hourly_statistics` or `app_hourly_conversations`
+        :param columns: columns of the table used by the aggregates
+        :param aggregates: aggregate expressions over the columns of the `t` rows, e.g. `SUM(t.message_count) AS count`
+        :return: rows with the `date` and the aggregates, ordered by date
+        """
+        start, end = cls._to_naive_utc(start), cls._to_naive_utc(end)
+
+        arg_dict = {'tz': timezone, 'app_id': app_id}
+        message_filters = []
+        if start:
+            message_filters.append('messages.created_at >= :start')
+            arg_dict['start'] = start
+
+        if end:
+            message_filters.append('messages.created_at < :end')
+            arg_dict['end'] = end
+
+        subqueries = []
+        rollup_range = cls.get_rollup_range(timezone, start, end)
+        if rollup_range:
+            arg_dict['rollup_start'], arg_dict['rollup_end'] = rollup_range
+            subqueries.append(f'''
+                SELECT hour, {', '.join(columns)} FROM {table}
+                WHERE app_id = :app_id AND hour >= :rollup_start AND hour < :rollup_end''')
+            message_filters.append('(messages.created_at < :rollup_start OR messages.created_at >= :rollup_end)')
+
+        message_columns = ', '.join(f'{ROLLUP_COLUMNS[table][column]} AS {column}' for column in columns)
+        subqueries.append(f'''
+                SELECT messages.created_at AS hour, {message_columns} FROM messages
+                WHERE {' AND '.join(['messages.app_id = :app_id'] + message_filters)}''')
+
+        sql_query = f'''
+            SELECT date(DATE_TRUNC('day', t.hour AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date, {aggregates}
+            FROM ({' UNION ALL '.join(subqueries)}) t
+            GROUP BY date ORDER BY date'''
+
+        with db.engine.begin() as conn:
+            return list(conn.execute(db.text(sql_query), arg_dict))
+
+    @classmethod
+    def get_rollup_range(cls, timezone: str, start: Optional[datetime],
+                         end: Optional[datetime]) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Get the complete hours of a range that can be read from the hourly tables,
+        None when they are not rolled up or the timezone splits hours between days.
+        """
+        watermark = cls.get_rollup_watermark()
+        if not watermark:
+            return None
+
+        rollup_start = cls._ceil_hour(start) if start else EPOCH
+        rollup_end = min(cls._floor_hour(end), watermark) if end else watermark
+        if rollup_end <= rollup_start:
+            return None
+
+        tz = pytz.timezone(timezone)
+        for utc_datetime in [rollup_start, rollup_end, datetime.utcnow()]:
+            offset = pytz.utc.localize(max(utc_datetime, EPOCH)).astimezone(tz).utcoffset()
+            if offset % timedelta(hours=1):
+                return None
+
+        return rollup_start, rollup_end
+
+    @staticmethod
+    def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+        if value and value.tzinfo:
+            return value.astimezone(pytz.utc).replace(tzinfo=None)
+
+        return value
+
+    @staticmethod
+    def _floor_hour(value: datetime) -> datetime:
+        return value.replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def _ceil_hour(cls, value: datetime) -> datetime:
+        floor = cls._floor_hour(value)
+        return floor if floor == value else floor + timedelta(hours=1)
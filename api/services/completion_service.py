@@ -1,31 +1,32 @@
 import json
 import logging
-import threading
 import time
 import uuid
 from typing import Generator, Union, Any, Optional, List
 
 from flask import current_app, Flask
-from redis.client import PubSub
 from sqlalchemy import and_
 
+from core import generation_transport
 from core.completion import Completion
 from core.conversation_message_task import PubHandler, ConversationTaskStoppedException, \
     ConversationTaskInterruptException
 from core.file.message_file_parser import MessageFileParser
+from core.generation_transport import GenerationSubscription
 from core.model_providers.error import LLMBadRequestError, LLMAPIConnectionError, LLMAPIUnavailableError, \
     LLMRateLimitError, \
     LLMAuthorizationError, ProviderTokenNotInitError, QuotaExceededError, ModelCurrentlyNotSupportError
 from core.model_providers.models.entity.message import PromptMessageFile
 from extensions.ext_database import db
-from extensions.ext_redis import redis_client
 from models.model import Conversation, AppModelConfig, App, Account, EndUser, Message
 from services.app_model_config_service import AppModelConfigService
+from services.completion_stream_encoder import CompletionStreamEncoder
 from services.errors.app import MoreLikeThisDisabledError
 from services.errors.app_model_config import AppModelConfigBrokenError
 from services.errors.completion import CompletionStoppedError
 from services.errors.conversation import ConversationNotExistsError, ConversationCompletedError
 from services.errors.message import MessageNotExistsError
+from services.generation_executor import get_generation_executor
 
 
 class CompletionService:
@@ -147,34 +148,31 @@ class CompletionService:
 
         generate_task_id = str(uuid.uuid4())
 
-        pubsub = redis_client.pubsub()
-        pubsub.subscribe(PubHandler.generate_channel_name(user, generate_task_id))
+        subscription = generation_transport.subscribe(PubHandler.generate_channel_name(user, generate_task_id))
 
         user = cls.get_real_user_instead_of_proxy_obj(user)
 
-        generate_worker_thread = threading.Thread(target=cls.generate_worker, kwargs={
-            'flask_app': current_app._get_current_object(),
-            'generate_task_id': generate_task_id,
-            'detached_app_model': app_model,
-            'app_model_config': app_model_config.copy(),
-            'query': query,
-            'inputs': inputs,
-            'files': file_objs,
-            'detached_user': user,
-            'detached_conversation': conversation,
-            'streaming': streaming,
-            'is_model_config_override': is_model_config_override,
-            'retriever_from': args['retriever_from'] if 'retriever_from' in args else 'dev',
-            'auto_generate_name': auto_generate_name
-        })
-
-        generate_worker_thread.start()
-
-        # wait for 10 minutes to close the thread
-        cls.countdown_and_close(current_app._get_current_object(), generate_worker_thread, pubsub, user,
-                                generate_task_id)
-
-        return cls.compact_response(pubsub, streaming)
+        # the generation is pinged and closed after 10 minutes by the generation executor
+        get_generation_executor().submit(
+            cls.generate_worker,
+            user=user,
+            generate_task_id=generate_task_id,
+            subscription=subscription,
+            flask_app=current_app._get_current_object(),
+            detached_app_model=app_model,
+            app_model_config=app_model_config.copy(),
+            query=query,
+            inputs=inputs,
+            files=file_objs,
+            detached_user=user,
+            detached_conversation=conversation,
+            streaming=streaming,
+            is_model_config_override=is_model_config_override,
+            retriever_from=args['retriever_from'] if 'retriever_from' in args else 'dev',
+            auto_generate_name=auto_generate_name
+        )
+
+        return cls.compact_response(subscription, streaming)
 
     @classmethod
     def get_real_user_instead_of_proxy_obj(cls, user: Union[Account, EndUser]):
@@ -195,9 +193,10 @@ class CompletionService:
                         detached_conversation: Optional[Conversation], streaming: bool, is_model_config_override: bool,
                         retriever_from: str = 'dev', auto_generate_name: bool = True):
         with flask_app.app_context():
-            # fixed the state of the model object when it detached from the original session
-            user = db.session.merge(detached_user)
-            app_model = db.session.merge(detached_app_model)
+            # reload the user and the app instead of merging them, the detached objects may come from
+            # the web app session cache, and merging would write their stale columns back on commit
+            user = cls.get_real_user_instead_of_proxy_obj(detached_user)
+            app_model = db.session.query(App).filter(App.id == detached_app_model.id).first()
 
             if detached_conversation:
                 conversation = db.session.merge(detached_conversation)
@@ -234,39 +233,6 @@ class CompletionService:
             finally:
                 db.session.remove()
 
-    @classmethod
-    def countdown_and_close(cls, flask_app: Flask, worker_thread, pubsub, detached_user,
-                            generate_task_id) -> threading.Thread:
-        # wait for 10 minutes to close the thread
-        timeout = 600
-
-        def close_pubsub():
-            with flask_app.app_context():
-                try:
-                    user = db.session.merge(detached_user)
-
-                    sleep_iterations = 0
-                    while sleep_iterations < timeout and worker_thread.is_alive():
-                        if sleep_iterations > 0 and sleep_iterations % 10 == 0:
-                            PubHandler.ping(user, generate_task_id)
-
-                        time.sleep(1)
-                        sleep_iterations += 1
-
-                    if worker_thread.is_alive():
-                        PubHandler.stop(user, generate_task_id)
-                        try:
-                            pubsub.close()
-                        except Exception:
-                            pass
-                finally:
-                    db.session.remove()
-
-        countdown_thread = threading.Thread(target=close_pubsub)
-        countdown_thread.start()
-
-        return countdown_thread
-
     @classmethod
     def generate_more_like_this(cls, app_model: App, user: Union[Account, EndUser],
                                 message_id: str, streaming: bool = True,
@@ -306,34 +272,31 @@ class CompletionService:
 
         generate_task_id = str(uuid.uuid4())
 
-        pubsub = redis_client.pubsub()
-        pubsub.subscribe(PubHandler.generate_channel_name(user, generate_task_id))
+        subscription = generation_transport.subscribe(PubHandler.generate_channel_name(user, generate_task_id))
 
         user = cls.get_real_user_instead_of_proxy_obj(user)
 
-        generate_worker_thread = threading.Thread(target=cls.generate_worker, kwargs={
-            'flask_app': current_app._get_current_object(),
-            'generate_task_id': generate_task_id,
-            'detached_app_model': app_model,
-            'app_model_config': app_model_config.copy(),
-            'query': message.query,
-            'inputs': message.inputs,
-            'files': file_objs,
-            'detached_user': user,
-            'detached_conversation': None,
-            'streaming': streaming,
-            'is_model_config_override': True,
-            'retriever_from': retriever_from,
-            'auto_generate_name': False
-        })
-
-        generate_worker_thread.start()
-
-        # wait for 10 minutes to close the thread
-        cls.countdown_and_close(current_app._get_current_object(), generate_worker_thread, pubsub, user,
-                                generate_task_id)
-
-        return cls.compact_response(pubsub, streaming)
+        # the generation is pinged and closed after 10 minutes by the generation executor
+        get_generation_executor().submit(
+            cls.generate_worker,
+            user=user,
+            generate_task_id=generate_task_id,
+            subscription=subscription,
+            flask_app=current_app._get_current_object(),
+            detached_app_model=app_model,
+            app_model_config=app_model_config.copy(),
+            query=message.query,
+            inputs=message.inputs,
+            files=file_objs,
+            detached_user=user,
+            detached_conversation=None,
+            streaming=streaming,
+            is_model_config_override=True,
+            retriever_from=retriever_from,
+            auto_generate_name=False
+        )
+
+        return cls.compact_response(subscription, streaming)
 
     @classmethod
     def get_cleaned_inputs(cls, user_inputs: dict, app_model_config: AppModelConfig):
@@ -374,22 +337,19 @@ class CompletionService:
         return filtered_inputs
 
     @classmethod
-    def compact_response(cls, pubsub: PubSub, streaming: bool = False) -> Union[dict, Generator]:
-        generate_channel = list(pubsub.channels.keys())[0].decode('utf-8')
+    def compact_response(cls, subscription: GenerationSubscription, streaming: bool = False) -> Union[dict, Generator]:
+        generate_channel = subscription.channel
         if not streaming:
             try:
                 message_result = {}
-                for message in pubsub.listen():
-                    if message["type"] == "message":
-                        result = message["data"].decode('utf-8')
-                        result = json.loads(result)
-                        if result.get('error'):
-                            cls.handle_error(result)
-                        if result['event'] == 'message' and 'data' in result:
-                            message_result['message'] = result.get('data')
-                        if result['event'] == 'message_end' and 'data' in result:
-                            message_result['message_end'] = result.get('data')
-                            return cls.get_blocking_message_response_data(message_result)
+                for result in subscription.listen():
+                    if result.get('error'):
+                        cls.handle_error(result)
+                    if result['event'] == 'message' and 'data' in result:
+                        message_result['message'] = result.get('data')
+                    if result['event'] == 'message_end' and 'data' in result:
+                        message_result['message_end'] = result.get('data')
+                        return cls.get_blocking_message_response_data(message_result)
             except ValueError as e:
                 if e.args[0] != "I/O operation on closed file.":  # ignore this error
                     raise CompletionStoppedError()
@@ -399,41 +359,33 @@ class CompletionService:
             finally:
                 db.session.remove()
 
-                try:
-                    pubsub.unsubscribe(generate_channel)
-                except ConnectionError:
-                    pass
+                subscription.unsubscribe()
         else:
             def generate() -> Generator:
+                stream_encoder = CompletionStreamEncoder()
                 try:
-                    for message in pubsub.listen():
-                        if message["type"] == "message":
-                            result = message["data"].decode('utf-8')
-                            result = json.loads(result)
-                            if result.get('error'):
-                                cls.handle_error(result)
-
-                            event = result.get('event')
-                            if event == "end":
-                                logging.debug("{} finished".format(generate_channel))
-                                break
-                            if event == 'message':
-                                yield "data: " + json.dumps(cls.get_message_response_data(result.get('data'))) + "\n\n"
-                            elif event == 'message_replace':
-                                yield "data: " + json.dumps(
-                                    cls.get_message_replace_response_data(result.get('data'))) + "\n\n"
-                            elif event == 'chain':
-                                yield "data: " + json.dumps(cls.get_chain_response_data(result.get('data'))) + "\n\n"
-                            elif event == 'agent_thought':
-                                yield "data: " + json.dumps(
-                                    cls.get_agent_thought_response_data(result.get('data'))) + "\n\n"
-                            elif event == 'message_end':
-                                yield "data: " + json.dumps(
-                                    cls.get_message_end_data(result.get('data'))) + "\n\n"
-                            elif event == 'ping':
-                                yield "event: ping\n\n"
-                            else:
-                                yield "data: " + json.dumps(result) + "\n\n"
+                    for result in subscription.listen():
+                        if result.get('error'):
+                            cls.handle_error(result)
+
+                        event = result.get('event')
+                        if event == "end":
+                            logging.debug("{} finished".format(generate_channel))
+                            break
+                        if event == 'message' or event == 'message_replace':
+                            yield stream_encoder.encode_text_event(event, result.get('data'))
+                        elif event == 'chain':
+                            yield "data: " + json.dumps(cls.get_chain_response_data(result.get('data'))) + "\n\n"
+                        elif event == 'agent_thought':
+                            yield "data: " + json.dumps(
+                                cls.get_agent_thought_response_data(result.get('data'))) + "\n\n"
+                        elif event == 'message_end':
+                            yield "data: " + json.dumps(
+                                cls.get_message_end_data(result.get('data'))) + "\n\n"
+                        elif event == 'ping':
+                            yield "event: ping\n\n"
+                        else:
+                            yield "data: " + json.dumps(result) + "\n\n"
                 except ValueError as e:
                     if e.args[0] != "I/O operation on closed file.":  # ignore this error
                         logging.exception(e)
@@ -441,43 +393,10 @@ class CompletionService:
                 finally:
                     db.session.remove()
 
-                    try:
-                        pubsub.unsubscribe(generate_channel)
-                    except ConnectionError:
-                        pass
+                    subscription.unsubscribe()
 
             return generate()
 
-    @classmethod
-    def get_message_response_data(cls, data: dict):
-        response_data = {
-            'event': 'message',
-            'task_id': data.get('task_id'),
-            'id': data.get('message_id'),
-            'answer': data.get('text'),
-            'created_at': int(time.time())
-        }
-
-        if data.get('mode') == 'chat':
-            response_data['conversation_id'] = data.get('conversation_id')
-
-        return response_data
-
-    @classmethod
-    def get_message_replace_response_data(cls, data: dict):
-        response_data = {
-            'event': 'message_replace',
-            'task_id': data.get('task_id'),
-            'id': data.get('message_id'),
-            'answer': data.get('text'),
-            'created_at': int(time.time())
-        }
-
-        if data.get('mode') == 'chat':
-            response_data['conversation_id'] = data.get('conversation_id')
-
-        return response_data
-
     @classmethod
     def get_blocking_message_response_data(cls, data: dict):
         message = data.get('message')
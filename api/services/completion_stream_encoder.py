@@ -0,0 +1,52 @@
+import json
+import time
+from typing import Callable
+
+try:
+    import orjson
+
+    JSON_BACKEND = 'orjson'
+
+    def _dumps_str(value: str) -> str:
+        return orjson.dumps(value).decode('utf-8')
+except ImportError:
+    JSON_BACKEND = 'json'
+    _dumps_str: Callable[[str], str] = json.dumps
+
+
+class CompletionStreamEncoder:
+    """
+    Encode the text events of a completion stream to SSE frames.
+
+    The static part of the frame (task_id, id and conversation_id) is rendered once per stream,
+    each token only escapes its text, with orjson when it is installed.
+    The frames hold the `message` and `message_replace` events: event, task_id, id, answer, created_at
+    and conversation_id for chat apps.
+    """
+
+    def __init__(self):
+        self._templates = {}
+
+    def encode_text_event(self, event: str, data: dict) -> str:
+        """
+        Encode a `message` or `message_replace` event to an SSE frame.
+        """
+        key = (event, data.get('task_id'), data.get('message_id'), data.get('mode'), data.get('conversation_id'))
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = self._build_template(*key)
+
+        prefix, suffix = template
+        return prefix + _dumps_str(data.get('text')) + ', "created_at": ' + str(int(time.time())) + suffix
+
+    @staticmethod
+    def _build_template(event: str, task_id: str, message_id: str, mode: str, conversation_id: str) \
+            -> tuple[str, str]:
+        prefix = (f'data: {{"event": {json.dumps(event)}, "task_id": {json.dumps(task_id)}, '
+                  f'"id": {json.dumps(message_id)}, "answer": ')
+
+        suffix = '}\n\n'
+        if mode == 'chat':
+            suffix = f', "conversation_id": {json.dumps(conversation_id)}' + suffix
+
+        return prefix, suffix
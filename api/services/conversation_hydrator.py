@@ -0,0 +1,122 @@
+from typing import List, Optional
+
+from sqlalchemy import func
+
+from extensions.ext_database import db
+from models.account import Account
+from models.model import Conversation, Message, MessageFeedback, MessageAnnotation, AppModelConfig, EndUser, App
+
+
+class ConversationHydrator:
+    """
+    Load the aggregates and relations shown by the conversation listings for a whole page of conversations,
+    in one grouped query each, and attach them to the conversations before they are marshalled.
+    """
+
+    @classmethod
+    def hydrate(cls, conversations: List[Conversation], app: Optional[App] = None):
+        if not conversations:
+            return
+
+        conversation_ids = [conversation.id for conversation in conversations]
+
+        message_counts = cls._get_message_counts(conversation_ids)
+        feedback_stats = cls._get_feedback_stats(conversation_ids)
+        first_messages = cls._get_first_messages(conversation_ids)
+        annotations = cls._get_annotations(conversation_ids)
+        app_model_configs = cls._get_app_model_configs(conversations)
+        end_users = cls._get_end_users(conversations)
+
+        for conversation in conversations:
+            conversation.set_preloaded_value('message_count', message_counts.get(conversation.id, 0))
+            conversation.set_preloaded_value('user_feedback_stats', feedback_stats.get((conversation.id, 'user'),
+                                                                                       {'like': 0, 'dislike': 0}))
+            conversation.set_preloaded_value('admin_feedback_stats', feedback_stats.get((conversation.id, 'admin'),
+                                                                                        {'like': 0, 'dislike': 0}))
+            conversation.set_preloaded_value('first_message', first_messages.get(conversation.id))
+            conversation.set_preloaded_value('annotation', annotations.get(conversation.id))
+
+            if not conversation.override_model_configs:
+                conversation.set_preloaded_value('app_model_config',
+                                                 app_model_configs.get(conversation.app_model_config_id))
+
+            if conversation.from_end_user_id:
+                conversation.set_preloaded_value('from_end_user', end_users.get(conversation.from_end_user_id))
+
+            if app and conversation.app_id == app.id:
+                conversation.set_preloaded_value('app', app)
+
+    @staticmethod
+    def _get_message_counts(conversation_ids: List[str]) -> dict:
+        rows = db.session.query(Message.conversation_id, func.count(Message.id)) \
+            .filter(Message.conversation_id.in_(conversation_ids)) \
+            .group_by(Message.conversation_id).all()
+
+        return {conversation_id: count for conversation_id, count in rows}
+
+    @staticmethod
+    def _get_feedback_stats(conversation_ids: List[str]) -> dict:
+        """Like and dislike counts keyed by conversation id and feedback source."""
+        rows = db.session.query(MessageFeedback.conversation_id, MessageFeedback.from_source,
+                                MessageFeedback.rating, func.count(MessageFeedback.id)) \
+            .filter(MessageFeedback.conversation_id.in_(conversation_ids)) \
+            .group_by(MessageFeedback.conversation_id, MessageFeedback.from_source, MessageFeedback.rating).all()
+
+        feedback_stats = {}
+        for conversation_id, from_source, rating, count in rows:
+            stats = feedback_stats.setdefault((conversation_id, from_source), {'like': 0, 'dislike': 0})
+            if rating in stats:
+                stats[rating] = count
+
+        return feedback_stats
+
+    @staticmethod
+    def _get_first_messages(conversation_ids: List[str]) -> dict:
+        messages = db.session.query(Message) \
+            .filter(Message.conversation_id.in_(conversation_ids)) \
+            .distinct(Message.conversation_id) \
+            .order_by(Message.conversation_id, Message.created_at.asc()).all()
+
+        return {message.conversation_id: message for message in messages}
+
+    @staticmethod
+    def _get_annotations(conversation_ids: List[str]) -> dict:
+        """First annotation of each conversation, with its account attached."""
+        annotations = db.session.query(MessageAnnotation) \
+            .filter(MessageAnnotation.conversation_id.in_(conversation_ids)) \
+            .distinct(MessageAnnotation.conversation_id) \
+            .order_by(MessageAnnotation.conversation_id, MessageAnnotation.created_at.asc()).all()
+
+        account_ids = {annotation.account_id for annotation in annotations}
+        accounts = {}
+        if account_ids:
+            accounts = {account.id: account
+                        for account in db.session.query(Account).filter(Account.id.in_(account_ids)).all()}
+
+        for annotation in annotations:
+            annotation.set_preloaded_value('account', accounts.get(annotation.account_id))
+
+        return {annotation.conversation_id: annotation for annotation in annotations}
+
+    @staticmethod
+    def _get_app_model_configs(conversations: List[Conversation]) -> dict:
+        app_model_config_ids = {conversation.app_model_config_id for conversation in conversations
+                                if not conversation.override_model_configs}
+        if not app_model_config_ids:
+            return {}
+
+        app_model_configs = db.session.query(AppModelConfig) \
+            .filter(AppModelConfig.id.in_(app_model_config_ids)).all()
+
+        return {app_model_config.id: app_model_config for app_model_config in app_model_configs}
+
+    @staticmethod
+    def _get_end_users(conversations: List[Conversation]) -> dict:
+        end_user_ids = {conversation.from_end_user_id for conversation in conversations
+                        if conversation.from_end_user_id}
+        if not end_user_ids:
+            return {}
+
+        end_users = db.session.query(EndUser).filter(EndUser.id.in_(end_user_ids)).all()
+
+        return {end_user.id: end_user for end_user in end_users}
@@ -0,0 +1,60 @@
+from typing import List, Union
+
+from sqlalchemy import func, select
+
+from extensions.ext_database import db
+from models.dataset import Dataset, AppDatasetJoin, Document, DocumentSegment
+
+
+class DatasetCounterService:
+    """
+    Counters of a dataset shown by the dataset listings and checked before retrieval, kept on the `datasets` row
+    so that reading them does not scan the apps, documents and segments of the dataset.
+
+    The writers of app joins, documents and segments refresh the counters of their dataset once they commit,
+    with one statement recomputing all of them. `flask reconcile-dataset-counters` recomputes the counters of
+    every dataset, for the datasets created before the counters and any drift.
+    """
+
+    @classmethod
+    def refresh_counters(cls, dataset_ids: Union[str, List[str]]):
+        """
+        Recompute the counters of datasets and commit.
+
+        :param dataset_ids: dataset id or ids
+        """
+        if isinstance(dataset_ids, str):
+            dataset_ids = [dataset_ids]
+
+        if not dataset_ids:
+            return
+
+        db.session.query(Dataset).filter(Dataset.id.in_(dataset_ids)) \
+            .update(cls._counter_values(), synchronize_session='fetch')
+        db.session.commit()
+
+    @staticmethod
+    def _counter_values() -> dict:
+        """Correlated subqueries computing each counter of the updated dataset."""
+        return {
+            Dataset._app_count: select(func.count(AppDatasetJoin.id))
+            .where(AppDatasetJoin.dataset_id == Dataset.id)
+            .scalar_subquery(),
+            Dataset._document_count: select(func.count(Document.id))
+            .where(Document.dataset_id == Dataset.id)
+            .scalar_subquery(),
+            Dataset._available_document_count: select(func.count(Document.id))
+            .where(Document.dataset_id == Dataset.id,
+                   Document.indexing_status == 'completed',
+                   Document.enabled == True,
+                   Document.archived == False)
+            .scalar_subquery(),
+            Dataset._available_segment_count: select(func.count(DocumentSegment.id))
+            .where(DocumentSegment.dataset_id == Dataset.id,
+                   DocumentSegment.status == 'completed',
+                   DocumentSegment.enabled == True)
+            .scalar_subquery(),
+            Dataset._word_count: select(func.coalesce(func.sum(Document.word_count), 0))
+            .where(Document.dataset_id == Dataset.id)
+            .scalar_subquery(),
+        }
@@ -24,10 +24,13 @@ from models.dataset import Dataset, Document, DatasetQuery, DatasetProcessRule,
     DatasetCollectionBinding
 from models.model import UploadFile
 from models.source import DataSourceBinding
+from services.dataset_counter_service import DatasetCounterService
+from services.document_progress_service import DocumentProgressService
 from services.errors.account import NoPermissionError
 from services.errors.dataset import DatasetNameDuplicateError
 from services.errors.document import DocumentIndexingError
 from services.errors.file import FileNotExistsError
+from services.retrieval_fusion import RetrievalFusion
 from services.vector_service import VectorService
 from tasks.clean_notion_document_task import clean_notion_document_task
 from tasks.deal_dataset_vector_index_task import deal_dataset_vector_index_task
@@ -141,6 +144,8 @@ class DatasetService:
         filtered_data = {k: v for k, v in data.items() if v is not None or k == 'description'}
         dataset = DatasetService.get_dataset(dataset_id)
         DatasetService.check_dataset_permission(dataset, user)
+        if data.get('retrieval_model'):
+            RetrievalFusion.retrieval_model_args_validate(data['retrieval_model'])
         action = None
         if dataset.indexing_technique != data['indexing_technique']:
             # if update indexing_technique
@@ -393,6 +398,7 @@ class DocumentService:
 
         db.session.delete(document)
         db.session.commit()
+        DatasetCounterService.refresh_counters(document.dataset_id)
 
     @staticmethod
     def pause_document(document):
@@ -600,6 +606,7 @@ class DocumentService:
             # trigger async task
             document_indexing_task.delay(dataset.id, document_ids)
 
+        DatasetCounterService.refresh_counters(dataset.id)
         return documents, batch
 
     @staticmethod
@@ -724,6 +731,7 @@ class DocumentService:
         }
         DocumentSegment.query.filter_by(document_id=document.id).update(update_params)
         db.session.commit()
+        DatasetCounterService.refresh_counters(document.dataset_id)
         # trigger async task
         document_indexing_update_task.delay(document.dataset_id, document.id)
 
@@ -800,6 +808,9 @@ class DocumentService:
 
     @classmethod
     def document_create_args_validate(cls, args: dict):
+        if args.get('retrieval_model'):
+            RetrievalFusion.retrieval_model_args_validate(args['retrieval_model'])
+
         if 'original_document_id' not in args or not args['original_document_id']:
             DocumentService.data_source_args_validate(args)
             DocumentService.process_rule_args_validate(args)
@@ -1032,6 +1043,7 @@ class SegmentService:
 
         db.session.add(segment_document)
         db.session.commit()
+        DocumentProgressService.invalidate_progress(document.id)
 
         # save vector index
         try:
@@ -1043,6 +1055,7 @@ class SegmentService:
             segment_document.status = 'error'
             segment_document.error = str(e)
             db.session.commit()
+        DatasetCounterService.refresh_counters(document.dataset_id)
         segment = db.session.query(DocumentSegment).filter(DocumentSegment.id == segment_document.id).first()
         return segment
 
@@ -1104,6 +1117,8 @@ class SegmentService:
                 segment_document.status = 'error'
                 segment_document.error = str(e)
         db.session.commit()
+        DocumentProgressService.invalidate_progress(document.id)
+        DatasetCounterService.refresh_counters(document.dataset_id)
         return segment_data_list
 
     @classmethod
@@ -1164,6 +1179,7 @@ class SegmentService:
             segment.status = 'error'
             segment.error = str(e)
             db.session.commit()
+        DatasetCounterService.refresh_counters(document.dataset_id)
         segment = db.session.query(DocumentSegment).filter(DocumentSegment.id == segment.id).first()
         return segment
 
@@ -1181,6 +1197,8 @@ class SegmentService:
             delete_segment_from_index_task.delay(segment.id, segment.index_node_id, dataset.id, document.id)
         db.session.delete(segment)
         db.session.commit()
+        DocumentProgressService.invalidate_progress(document.id)
+        DatasetCounterService.refresh_counters(document.dataset_id)
 
 
 class DatasetCollectionBindingService:
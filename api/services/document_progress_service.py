@@ -0,0 +1,101 @@
+import logging
+from typing import Dict, List, Tuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import Document, DocumentSegment
+
+
+class DocumentProgressService:
+    """
+    Completed and total segment counts of documents, shown by the document list and polled by the indexing status
+    endpoints.
+
+    The counts of a whole page or batch are read with one `MGET` from redis, the missing ones with one grouped
+    query over `document_segments`. `IndexingRunner` refreshes the counts of a document as its segments
+    are created and completed, and every entry expires after `DOCUMENT_PROGRESS_CACHE_TTL` seconds.
+    """
+
+    @classmethod
+    def attach_progress(cls, documents: List[Document]):
+        """Set `completed_segments` and `total_segments` on the documents."""
+        progress = cls.get_progress([str(document.id) for document in documents])
+        for document in documents:
+            document.completed_segments, document.total_segments = progress[str(document.id)]
+
+    @classmethod
+    def get_progress(cls, document_ids: List[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        Get the completed and total segment counts keyed by document id.
+
+        :param document_ids: document ids
+        """
+        if not document_ids:
+            return {}
+
+        progress = {}
+        try:
+            values = redis_client.mget([cls._cache_key(document_id) for document_id in document_ids])
+        except Exception:
+            logging.exception('Failed to get document progress from redis')
+            values = [None] * len(document_ids)
+
+        for document_id, value in zip(document_ids, values):
+            if value is not None:
+                completed_segments, total_segments = value.decode('utf-8').split(':')
+                progress[document_id] = (int(completed_segments), int(total_segments))
+
+        missing_document_ids = [document_id for document_id in document_ids if document_id not in progress]
+        if missing_document_ids:
+            counts = cls._count_segments(missing_document_ids)
+            cls._set_cache(counts)
+            progress.update(counts)
+
+        return progress
+
+    @classmethod
+    def refresh_progress(cls, document_id: str):
+        """Count the segments of a document again and cache the counts."""
+        cls._set_cache(cls._count_segments([document_id]))
+
+    @classmethod
+    def invalidate_progress(cls, document_id: str):
+        try:
+            redis_client.delete(cls._cache_key(document_id))
+        except Exception:
+            logging.exception('Failed to delete document progress from redis')
+
+    @staticmethod
+    def _count_segments(document_ids: List[str]) -> Dict[str, Tuple[int, int]]:
+        rows = db.session.query(
+            DocumentSegment.document_id,
+            func.count(DocumentSegment.id).filter(DocumentSegment.completed_at.isnot(None)),
+            func.count(DocumentSegment.id)
+        ).filter(
+            DocumentSegment.document_id.in_(document_ids),
+            DocumentSegment.status != 're_segment'
+        ).group_by(DocumentSegment.document_id).all()
+
+        counts = {document_id: (0, 0) for document_id in document_ids}
+        for document_id, completed_segments, total_segments in rows:
+            counts[str(document_id)] = (completed_segments, total_segments)
+
+        return counts
+
+    @classmethod
+    def _set_cache(cls, counts: Dict[str, Tuple[int, int]]):
+        ttl = int(current_app.config.get('DOCUMENT_PROGRESS_CACHE_TTL', 30))
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for document_id, (completed_segments, total_segments) in counts.items():
+                pipeline.setex(cls._cache_key(document_id), ttl, f'{completed_segments}:{total_segments}')
+            pipeline.execute()
+        except Exception:
+            logging.exception('Failed to set document progress to redis')
+
+    @staticmethod
+    def _cache_key(document_id: str) -> str:
+        return f'document_segment_progress:{document_id}'
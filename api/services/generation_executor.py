@@ -0,0 +1,131 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Optional, Union
+
+from flask import current_app
+
+from core.conversation_message_task import PubHandler
+from core.generation_transport import GenerationSubscription
+from core.timer_wheel import TimerWheel
+from models.model import Account, EndUser
+from services.errors.completion import CompletionQueueFullError
+
+
+class GenerationExecutor:
+    """
+    Process-wide bounded worker pool running the generate workers of completion requests.
+
+    A single timer wheel sends the keep-alive pings of all generations and stops the ones running too long.
+    Requests are rejected when `max_queue_size` generations are already waiting for a worker.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, timeout: float = 600, ping_interval: float = 10,
+                 timer_wheel: Optional[TimerWheel] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='generation')
+        self._max_workers = max_workers
+        self._max_queue_size = max_queue_size
+        self._timeout = timeout
+        self._ping_interval = ping_interval
+        self._timer_wheel = timer_wheel or TimerWheel(name='generation-timer-wheel')
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable, user: Union[Account, EndUser], generate_task_id: str,
+               subscription: GenerationSubscription, **kwargs) -> Future:
+        """
+        Run `fn(generate_task_id=generate_task_id, **kwargs)` on a worker,
+        ping the channel of the task until it is done, and stop it and close its subscription on timeout.
+
+        :raises CompletionQueueFullError: when too many generations are waiting for a worker
+        """
+        with self._lock:
+            if self._queued >= self._max_queue_size:
+                self._rejected += 1
+                logging.warning(f'Generation rejected, {self._queued} generations are waiting for a worker')
+                self._close_subscription(subscription)
+                raise CompletionQueueFullError()
+
+            self._queued += 1
+
+        future = self._executor.submit(self._run, fn, dict(kwargs, generate_task_id=generate_task_id))
+        timers = {}
+
+        def ping():
+            if not future.done():
+                PubHandler.ping(user, generate_task_id)
+                timers['ping'] = self._timer_wheel.schedule(self._ping_interval, ping)
+
+        def close():
+            if future.done():
+                return
+
+            logging.warning(f'Generation {generate_task_id} timed out after {self._timeout}s')
+            PubHandler.stop(user, generate_task_id)
+            # a generation still waiting for a worker is dropped
+            future.cancel()
+            self._close_subscription(subscription)
+
+        timers['ping'] = self._timer_wheel.schedule(self._ping_interval, ping)
+        timers['timeout'] = self._timer_wheel.schedule(self._timeout, close)
+
+        def on_done(done_future: Future):
+            if done_future.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+            for timer in list(timers.values()):
+                timer.cancel()
+
+        future.add_done_callback(on_done)
+
+        return future
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_workers': self._max_workers,
+                'running': self._running,
+                'queued': self._queued,
+                'rejected': self._rejected
+            }
+
+    @staticmethod
+    def _close_subscription(subscription: GenerationSubscription):
+        try:
+            subscription.close()
+        except Exception:
+            pass
+
+    def _run(self, fn: Callable, kwargs: dict):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+        try:
+            return fn(**kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+
+_generation_executor: Optional[GenerationExecutor] = None
+_generation_executor_lock = threading.Lock()
+
+
+def get_generation_executor() -> GenerationExecutor:
+    global _generation_executor
+    if _generation_executor is None:
+        with _generation_executor_lock:
+            if _generation_executor is None:
+                _generation_executor = GenerationExecutor(
+                    max_workers=int(current_app.config.get('GENERATION_MAX_WORKERS', 100)),
+                    max_queue_size=int(current_app.config.get('GENERATION_MAX_QUEUE_SIZE', 200)),
+                    timeout=float(current_app.config.get('GENERATION_TIMEOUT', 600)),
+                    ping_interval=float(current_app.config.get('GENERATION_PING_INTERVAL', 10))
+                )
+
+    return _generation_executor
@@ -1,20 +1,20 @@
 import json
 import logging
-import threading
 import time
 from typing import List
 
 import numpy as np
-from flask import current_app
 from langchain.embeddings.base import Embeddings
 from langchain.schema import Document
 from sklearn.manifold import TSNE
 
 from core.embedding.cached_embedding import CacheEmbedding
+from core.index.segment_hydrator import SegmentHydrator
 from core.model_providers.model_factory import ModelFactory
 from extensions.ext_database import db
 from models.account import Account
-from models.dataset import Dataset, DocumentSegment, DatasetQuery
+from models.dataset import Dataset, DatasetQuery
+from services.retrieval_fusion import RetrievalFusion
 from services.retrieval_service import RetrievalService
 
 default_retrieval_model = {
@@ -54,53 +54,13 @@ class HitTestingService:
         )
         embeddings = CacheEmbedding(embedding_model)
 
-        all_documents = []
-        threads = []
-
-        # retrieval_model source with semantic
-        if retrieval_model['search_method'] == 'semantic_search' or retrieval_model['search_method'] == 'hybrid_search':
-            embedding_thread = threading.Thread(target=RetrievalService.embedding_search, kwargs={
-                'flask_app': current_app._get_current_object(),
-                'dataset_id': str(dataset.id),
-                'query': query,
-                'top_k': retrieval_model['top_k'],
-                'score_threshold': retrieval_model['score_threshold'] if retrieval_model['score_threshold_enabled'] else None,
-                'reranking_model': retrieval_model['reranking_model'] if retrieval_model['reranking_enable'] else None,
-                'all_documents': all_documents,
-                'search_method': retrieval_model['search_method'],
-                'embeddings': embeddings
-            })
-            threads.append(embedding_thread)
-            embedding_thread.start()
-
-        # retrieval source with full text
-        if retrieval_model['search_method'] == 'full_text_search' or retrieval_model['search_method'] == 'hybrid_search':
-            full_text_index_thread = threading.Thread(target=RetrievalService.full_text_index_search, kwargs={
-                'flask_app': current_app._get_current_object(),
-                'dataset_id': str(dataset.id),
-                'query': query,
-                'search_method': retrieval_model['search_method'],
-                'embeddings': embeddings,
-                'score_threshold': retrieval_model['score_threshold'] if retrieval_model['score_threshold_enabled'] else None,
-                'top_k': retrieval_model['top_k'],
-                'reranking_model': retrieval_model['reranking_model'] if retrieval_model['reranking_enable'] else None,
-                'all_documents': all_documents
-            })
-            threads.append(full_text_index_thread)
-            full_text_index_thread.start()
-
-        for thread in threads:
-            thread.join()
-
-        if retrieval_model['search_method'] == 'hybrid_search':
-            hybrid_rerank = ModelFactory.get_reranking_model(
-                tenant_id=dataset.tenant_id,
-                model_provider_name=retrieval_model['reranking_model']['reranking_provider_name'],
-                model_name=retrieval_model['reranking_model']['reranking_model_name']
-            )
-            all_documents = hybrid_rerank.rerank(query, all_documents,
-                                                 retrieval_model['score_threshold'] if retrieval_model['score_threshold_enabled'] else None,
-                                                 retrieval_model['top_k'])
+        all_documents = RetrievalService.retrieve(
+            dataset=dataset,
+            query=query,
+            retrieval_model=retrieval_model,
+            top_k=retrieval_model['top_k'],
+            embeddings=embeddings
+        )
 
         end = time.perf_counter()
         logging.debug(f"Hit testing retrieve in {end - start:0.4f} seconds")
@@ -130,17 +90,21 @@ class HitTestingService:
 
         query_position = tsne_position_data.pop(0)
 
+        segment_map = SegmentHydrator.get_segment_map(
+            [document.metadata['doc_id'] for document in documents],
+            dataset_id=dataset.id,
+            available_only=True
+        )
+        # load the documents of the segments in one query, `segment.document` marshalled with each segment
+        # is then served from the session
+        SegmentHydrator.get_documents(list(segment_map.values()), available_only=False)
+
         i = 0
         records = []
         for document in documents:
             index_node_id = document.metadata['doc_id']
 
-            segment = db.session.query(DocumentSegment).filter(
-                DocumentSegment.dataset_id == dataset.id,
-                DocumentSegment.enabled == True,
-                DocumentSegment.status == 'completed',
-                DocumentSegment.index_node_id == index_node_id
-            ).first()
+            segment = segment_map.get(index_node_id)
 
             if not segment:
                 i += 1
@@ -193,3 +157,6 @@ class HitTestingService:
         if not query or len(query) > 250:
             raise ValueError('Query is required and cannot exceed 250 characters')
 
+        if args.get('retrieval_model'):
+            RetrievalFusion.retrieval_model_args_validate(args['retrieval_model'])
+
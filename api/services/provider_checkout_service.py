@@ -5,6 +5,7 @@ import stripe
 from flask import current_app
 
 from core.model_providers.model_provider_factory import ModelProviderFactory
+from core.model_providers.provider_usage_accounting import ProviderUsageAccounting
 from extensions.ext_database import db
 from models.account import Account
 from models.provider import ProviderOrder, ProviderOrderPaymentStatus, ProviderType, Provider, ProviderQuotaType
@@ -137,6 +138,9 @@ class ProviderCheckoutService:
 
         db.session.commit()
 
+        if increase_quota > 0:
+            ProviderUsageAccounting.invalidate_quota(provider.id)
+
     def _check_provider_payable(self, provider_name: str, model_provider_rule: dict):
         if ProviderType.SYSTEM.value not in model_provider_rule['support_provider_types']:
             raise ValueError(f'provider name {provider_name} not support payment')
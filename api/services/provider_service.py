@@ -9,7 +9,9 @@ import requests
 
 from core.model_providers.model_factory import ModelFactory
 from extensions.ext_database import db
+from libs import rsa
 from core.model_providers.model_provider_factory import ModelProviderFactory
+from core.model_providers.model_resolution_cache import ModelResolutionCache
 from core.model_providers.models.entity.model_params import ModelType, ModelKwargsRules
 from models.provider import Provider, ProviderModel, TenantPreferredModelProvider, ProviderType, ProviderQuotaType, \
     TenantDefaultModel
@@ -234,6 +236,9 @@ class ProviderService:
             db.session.add(provider)
             db.session.commit()
 
+        ModelResolutionCache.invalidate(tenant_id)
+        rsa.purge_decryption_cache(tenant_id)
+
     def delete_custom_provider(self, tenant_id: str, provider_name: str) -> None:
         """
         delete custom provider.
@@ -258,6 +263,8 @@ class ProviderService:
 
             db.session.delete(provider)
             db.session.commit()
+            ModelResolutionCache.invalidate(tenant_id)
+            rsa.purge_decryption_cache(tenant_id)
 
     def custom_provider_model_config_validate(self,
                                               provider_name: str,
@@ -363,6 +370,9 @@ class ProviderService:
             db.session.add(provider_model)
             db.session.commit()
 
+        ModelResolutionCache.invalidate(tenant_id)
+        rsa.purge_decryption_cache(tenant_id)
+
     def delete_custom_provider_model(self,
                                      tenant_id: str,
                                      provider_name: str,
@@ -389,6 +399,8 @@ class ProviderService:
         if provider_model:
             db.session.delete(provider_model)
             db.session.commit()
+            ModelResolutionCache.invalidate(tenant_id)
+            rsa.purge_decryption_cache(tenant_id)
 
     def switch_preferred_provider(self, tenant_id: str, provider_name: str, preferred_provider_type: str) -> None:
         """
@@ -429,6 +441,7 @@ class ProviderService:
             db.session.add(preferred_model_provider)
 
         db.session.commit()
+        ModelResolutionCache.invalidate(tenant_id)
 
     def get_default_model_of_model_type(self, tenant_id: str, model_type: str) -> Optional[TenantDefaultModel]:
         """
@@ -0,0 +1,86 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from typing import Any, Callable, List, Optional
+
+from flask import current_app, Flask
+
+
+class RetrievalExecutor:
+    """
+    Process-wide bounded thread pool running the dataset searches of retrieval requests.
+
+    Every task runs in its own app context and holds a database session while it runs, so the number of
+    tasks running at once is also limited to `db_concurrency` to leave connections for request threads.
+    """
+
+    def __init__(self, max_workers: int, db_concurrency: int, timeout: Optional[float] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='retrieval')
+        self._db_semaphore = threading.BoundedSemaphore(max(1, db_concurrency))
+        self._timeout = timeout
+
+    def run(self, tasks: List[Callable[[], Any]], timeout: Optional[float] = None) -> List[Any]:
+        """
+        Run the tasks and return their results in completion order.
+
+        Failed tasks are logged and skipped. When the timeout expires, the tasks which have not started yet
+        are cancelled and the results of the unfinished ones are dropped.
+
+        :param tasks: callables without arguments
+        :param timeout: seconds to wait for all tasks, defaults to the executor timeout
+        """
+        if not tasks:
+            return []
+
+        timeout = timeout if timeout is not None else self._timeout
+        flask_app = current_app._get_current_object()
+        cancelled = threading.Event()
+        futures = [self._executor.submit(self._run_task, flask_app, task, cancelled) for task in tasks]
+
+        results = []
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    results.append(future.result())
+                except Exception:
+                    logging.exception('Retrieval task failed')
+        except TimeoutError:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+            logging.warning(f'Retrieval timed out after {timeout}s, {len(results)} of {len(tasks)} tasks finished')
+
+        return results
+
+    def _run_task(self, flask_app: Flask, task: Callable[[], Any], cancelled: threading.Event) -> Any:
+        with self._db_semaphore:
+            if cancelled.is_set():
+                return None
+
+            with flask_app.app_context():
+                return task()
+
+
+_retrieval_executor: Optional[RetrievalExecutor] = None
+_retrieval_executor_lock = threading.Lock()
+
+
+def get_retrieval_executor() -> RetrievalExecutor:
+    global _retrieval_executor
+    if _retrieval_executor is None:
+        with _retrieval_executor_lock:
+            if _retrieval_executor is None:
+                max_workers = int(current_app.config.get('RETRIEVAL_MAX_WORKERS', 16))
+                db_concurrency = current_app.config.get('RETRIEVAL_DB_CONCURRENCY')
+                if not db_concurrency:
+                    # leave half of the connection pool to the request threads by default
+                    pool_size = current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}).get('pool_size', 5)
+                    db_concurrency = min(max_workers, max(1, int(pool_size) // 2))
+
+                _retrieval_executor = RetrievalExecutor(
+                    max_workers=max_workers,
+                    db_concurrency=int(db_concurrency),
+                    timeout=float(current_app.config.get('RETRIEVAL_TIMEOUT', 30))
+                )
+
+    return _retrieval_executor
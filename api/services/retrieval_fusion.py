@@ -0,0 +1,120 @@
+from typing import List, Optional, Dict
+
+from langchain.schema import Document
+
+FUSION_METHODS = ['reciprocal_rank_fusion', 'weighted_score']
+DEFAULT_FUSION_METHOD = 'reciprocal_rank_fusion'
+DEFAULT_SEMANTIC_WEIGHT = 0.5
+
+# rank constant of reciprocal rank fusion, damps the advantage of the top ranks
+RRF_RANK_CONSTANT = 60
+
+
+class RetrievalFusion:
+    """
+    Merge the result lists of the searches of a hybrid search in-process, without a rerank model.
+
+    Results are deduplicated by `doc_id` and get a fused score in [0, 1] as their `score` metadata.
+    """
+
+    def __init__(self, method: str = DEFAULT_FUSION_METHOD, semantic_weight: float = DEFAULT_SEMANTIC_WEIGHT):
+        if method not in FUSION_METHODS:
+            raise ValueError(f'Fusion method {method} is not supported.')
+
+        if not 0 <= semantic_weight <= 1:
+            raise ValueError('Semantic weight must be between 0 and 1.')
+
+        self.method = method
+        self.weights = {
+            'semantic_search': semantic_weight,
+            'full_text_search': 1 - semantic_weight
+        }
+
+    @classmethod
+    def from_retrieval_model(cls, retrieval_model: dict) -> 'RetrievalFusion':
+        # saved retrieval models may hold a null weight, a weight of 0 is kept
+        semantic_weight = retrieval_model.get('semantic_weight')
+        return cls(
+            method=retrieval_model.get('fusion_method') or DEFAULT_FUSION_METHOD,
+            semantic_weight=float(DEFAULT_SEMANTIC_WEIGHT if semantic_weight is None else semantic_weight)
+        )
+
+    @classmethod
+    def retrieval_model_args_validate(cls, retrieval_model: dict):
+        """Reject an unsupported fusion method or semantic weight when a retrieval model is saved or tested."""
+        if retrieval_model.get('fusion_method') and retrieval_model['fusion_method'] not in FUSION_METHODS:
+            raise ValueError(f"Fusion method {retrieval_model['fusion_method']} is not supported.")
+
+        semantic_weight = retrieval_model.get('semantic_weight')
+        if semantic_weight is not None:
+            if isinstance(semantic_weight, bool) or not isinstance(semantic_weight, (int, float)) \
+                    or not 0 <= semantic_weight <= 1:
+                raise ValueError('Semantic weight must be a number between 0 and 1.')
+
+    def fuse(self, results: Dict[str, List[Document]], score_threshold: Optional[float],
+             top_k: Optional[int]) -> List[Document]:
+        """
+        Fuse the documents of each search method into one ranked list.
+
+        :param results: documents of each search method, in rank order
+        :param score_threshold: min fused score, only applied by weighted score fusion
+        :param top_k: max number of documents returned
+        """
+        scores = {}
+        documents = {}
+        for search_method, search_documents in results.items():
+            weight = self.weights.get(search_method, 0)
+            search_documents = self._unique_documents(search_documents)
+            if self.method == 'reciprocal_rank_fusion':
+                search_scores = [1 / (RRF_RANK_CONSTANT + rank + 1) for rank in range(len(search_documents))]
+            else:
+                search_scores = self._normalized_scores(search_documents)
+
+            for document, score in zip(search_documents, search_scores):
+                doc_id = document.metadata['doc_id']
+                documents.setdefault(doc_id, document)
+                scores[doc_id] = scores.get(doc_id, 0) + weight * score
+
+        if self.method == 'reciprocal_rank_fusion':
+            # scale by the score of a document ranked first by every search, so that scores fall in [0, 1]
+            max_score = sum(self.weights.get(search_method, 0) for search_method in results) / (RRF_RANK_CONSTANT + 1)
+            scores = {doc_id: score / max_score if max_score else 0 for doc_id, score in scores.items()}
+        elif score_threshold is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if score >= score_threshold}
+
+        fused_documents = []
+        for doc_id in sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)[:top_k]:
+            document = documents[doc_id]
+            document.metadata['score'] = scores[doc_id]
+            fused_documents.append(document)
+
+        return fused_documents
+
+    @staticmethod
+    def _unique_documents(documents: List[Document]) -> List[Document]:
+        doc_ids = set()
+        unique_documents = []
+        for document in documents:
+            if document.metadata['doc_id'] not in doc_ids:
+                doc_ids.add(document.metadata['doc_id'])
+                unique_documents.append(document)
+
+        return unique_documents
+
+    @staticmethod
+    def _normalized_scores(documents: List[Document]) -> List[float]:
+        """
+        Min-max normalize the search scores, or score by rank when the search does not return scores.
+        """
+        if not documents:
+            return []
+
+        if any(document.metadata.get('score') is None for document in documents):
+            return [(len(documents) - rank) / len(documents) for rank in range(len(documents))]
+
+        raw_scores = [document.metadata['score'] for document in documents]
+        min_score, max_score = min(raw_scores), max(raw_scores)
+        if max_score == min_score:
+            return [1.0 for _ in raw_scores]
+
+        return [(score - min_score) / (max_score - min_score) for score in raw_scores]
@@ -1,11 +1,14 @@
-
-from typing import Optional
-from flask import current_app, Flask
+import functools
+from typing import Optional, List, Callable, Dict, Tuple
+from flask import current_app
 from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
 from core.index.vector_index.vector_index import VectorIndex
 from core.model_providers.model_factory import ModelFactory
 from extensions.ext_database import db
 from models.dataset import Dataset
+from services.retrieval_executor import get_retrieval_executor
+from services.retrieval_fusion import RetrievalFusion
 
 default_retrieval_model = {
     'search_method': 'semantic_search',
@@ -22,74 +25,143 @@ default_retrieval_model = {
 class RetrievalService:
 
     @classmethod
-    def embedding_search(cls, flask_app: Flask, dataset_id: str, query: str,
-                         top_k: int, score_threshold: Optional[float], reranking_model: Optional[dict],
-                         all_documents: list, search_method: str, embeddings: Embeddings):
-        with flask_app.app_context():
-            dataset = db.session.query(Dataset).filter(
-                Dataset.id == dataset_id
-            ).first()
-
-            vector_index = VectorIndex(
-                dataset=dataset,
-                config=current_app.config,
-                embeddings=embeddings
-            )
+    def retrieve(cls, dataset: Dataset, query: str, retrieval_model: dict, top_k: int,
+                 embeddings: Embeddings) -> List[Document]:
+        """
+        Search the dataset with the search method of the retrieval model.
 
-            documents = vector_index.search(
-                query,
-                search_type='similarity_score_threshold',
-                search_kwargs={
-                    'k': top_k,
-                    'score_threshold': score_threshold,
-                    'filter': {
-                        'group_id': [dataset.id]
-                    }
-                }
+        Hybrid search results are reranked by the configured rerank model, as before fusion existed.
+        They are fused in-process instead when `fusion_method` is set or no rerank model is configured.
+        """
+        search_method = retrieval_model['search_method']
+        score_threshold = retrieval_model['score_threshold'] if retrieval_model['score_threshold_enabled'] else None
+        reranking_enable = retrieval_model.get('reranking_enable', False)
+
+        tasks = cls.search_tasks(
+            dataset_id=str(dataset.id),
+            query=query,
+            search_method=search_method,
+            top_k=top_k,
+            score_threshold=score_threshold,
+            reranking_model=retrieval_model['reranking_model'] if reranking_enable else None,
+            embeddings=embeddings
+        )
+
+        results = dict(get_retrieval_executor().run([
+            functools.partial(cls._run_search_task, search_task_method, task)
+            for search_task_method, task in tasks.items()
+        ]))
+
+        if search_method != 'hybrid_search':
+            return [document for documents in results.values() for document in documents]
+
+        # hybrid search always reranked with its rerank model, `reranking_enable` only applies to the other methods
+        reranking_model = retrieval_model.get('reranking_model') or {}
+        if not retrieval_model.get('fusion_method') and reranking_model.get('reranking_provider_name') \
+                and reranking_model.get('reranking_model_name'):
+            hybrid_rerank = ModelFactory.get_reranking_model(
+                tenant_id=dataset.tenant_id,
+                model_provider_name=reranking_model['reranking_provider_name'],
+                model_name=reranking_model['reranking_model_name']
             )
+            all_documents = [document for documents in results.values() for document in documents]
+            return hybrid_rerank.rerank(query, all_documents, score_threshold, top_k)
 
-            if documents:
-                if reranking_model and search_method == 'semantic_search':
-                    rerank = ModelFactory.get_reranking_model(
-                        tenant_id=dataset.tenant_id,
-                        model_provider_name=reranking_model['reranking_provider_name'],
-                        model_name=reranking_model['reranking_model_name']
-                    )
-                    all_documents.extend(rerank.rerank(query, documents, score_threshold, len(documents)))
-                else:
-                    all_documents.extend(documents)
+        return RetrievalFusion.from_retrieval_model(retrieval_model).fuse(results, score_threshold, top_k)
 
     @classmethod
-    def full_text_index_search(cls, flask_app: Flask, dataset_id: str, query: str,
-                               top_k: int, score_threshold: Optional[float], reranking_model: Optional[dict],
-                               all_documents: list, search_method: str, embeddings: Embeddings):
-        with flask_app.app_context():
-            dataset = db.session.query(Dataset).filter(
-                Dataset.id == dataset_id
-            ).first()
-
-            vector_index = VectorIndex(
-                dataset=dataset,
-                config=current_app.config,
-                embeddings=embeddings
-            )
+    def search_tasks(cls, dataset_id: str, query: str, search_method: str,
+                     top_k: int, score_threshold: Optional[float], reranking_model: Optional[dict],
+                     embeddings: Embeddings) -> Dict[str, Callable[[], List[Document]]]:
+        """
+        Get the searches of the search method as tasks for the retrieval executor, keyed by search method.
+        """
+        kwargs = {
+            'dataset_id': dataset_id,
+            'query': query,
+            'top_k': top_k,
+            'score_threshold': score_threshold,
+            'reranking_model': reranking_model,
+            'search_method': search_method,
+            'embeddings': embeddings
+        }
+
+        tasks = {}
+        # retrieval source with semantic
+        if search_method == 'semantic_search' or search_method == 'hybrid_search':
+            tasks['semantic_search'] = functools.partial(cls.embedding_search, **kwargs)
+
+        # retrieval source with full text
+        if search_method == 'full_text_search' or search_method == 'hybrid_search':
+            tasks['full_text_search'] = functools.partial(cls.full_text_index_search, **kwargs)
 
-            documents = vector_index.search_by_full_text_index(
-                query,
-                search_type='similarity_score_threshold',
-                top_k=top_k
+        return tasks
+
+    @staticmethod
+    def _run_search_task(search_method: str, task: Callable[[], List[Document]]) -> Tuple[str, List[Document]]:
+        return search_method, task()
+
+    @classmethod
+    def embedding_search(cls, dataset_id: str, query: str,
+                         top_k: int, score_threshold: Optional[float], reranking_model: Optional[dict],
+                         search_method: str, embeddings: Embeddings) -> List[Document]:
+        dataset = db.session.query(Dataset).filter(
+            Dataset.id == dataset_id
+        ).first()
+
+        vector_index = VectorIndex(
+            dataset=dataset,
+            config=current_app.config,
+            embeddings=embeddings
+        )
+
+        documents = vector_index.search(
+            query,
+            search_type='similarity_score_threshold',
+            search_kwargs={
+                'k': top_k,
+                'score_threshold': score_threshold,
+                'filter': {
+                    'group_id': [dataset.id]
+                }
+            }
+        )
+
+        if documents and reranking_model and search_method == 'semantic_search':
+            rerank = ModelFactory.get_reranking_model(
+                tenant_id=dataset.tenant_id,
+                model_provider_name=reranking_model['reranking_provider_name'],
+                model_name=reranking_model['reranking_model_name']
             )
-            if documents:
-                if reranking_model and search_method == 'full_text_search':
-                    rerank = ModelFactory.get_reranking_model(
-                        tenant_id=dataset.tenant_id,
-                        model_provider_name=reranking_model['reranking_provider_name'],
-                        model_name=reranking_model['reranking_model_name']
-                    )
-                    all_documents.extend(rerank.rerank(query, documents, score_threshold, len(documents)))
-                else:
-                    all_documents.extend(documents)
+            return rerank.rerank(query, documents, score_threshold, len(documents))
+
+        return documents
 
+    @classmethod
+    def full_text_index_search(cls, dataset_id: str, query: str,
+                               top_k: int, score_threshold: Optional[float], reranking_model: Optional[dict],
+                               search_method: str, embeddings: Embeddings) -> List[Document]:
+        dataset = db.session.query(Dataset).filter(
+            Dataset.id == dataset_id
+        ).first()
 
+        vector_index = VectorIndex(
+            dataset=dataset,
+            config=current_app.config,
+            embeddings=embeddings
+        )
 
+        documents = vector_index.search_by_full_text_index(
+            query,
+            search_type='similarity_score_threshold',
+            top_k=top_k
+        )
+        if documents and reranking_model and search_method == 'full_text_search':
+            rerank = ModelFactory.get_reranking_model(
+                tenant_id=dataset.tenant_id,
+                model_provider_name=reranking_model['reranking_provider_name'],
+                model_name=reranking_model['reranking_model_name']
+            )
+            return rerank.rerank(query, documents, score_threshold, len(documents))
 
+        return documents
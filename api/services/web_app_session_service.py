@@ -0,0 +1,140 @@
+import logging
+import threading
+from typing import Optional, Tuple, Type
+
+from cachetools import TTLCache
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.model import App, EndUser, Site
+
+
+class WebAppSessionCache:
+    """
+    In-process cache of the app, site and end user resolved from the JWT claims of web app requests,
+    for `WEB_APP_SESSION_CACHE_TTL` seconds.
+
+    Entries hold the column values of the rows with the version of the app they were read at. The version is
+    kept in Redis and bumped when the app, its model config or its site is edited, which makes the entries
+    of every process stale at once. Each request builds its own detached instances from an entry,
+    so the resolved objects are usable without a session and never shared between requests.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self._sessions = TTLCache(maxsize=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0}
+
+    def get(self, claims: tuple, version: bytes) -> Optional[Tuple[App, Site, EndUser]]:
+        with self._lock:
+            entry = self._sessions.get(claims)
+
+        if entry is None or entry[0] != version:
+            self._incr('misses')
+            return None
+        self._incr('hits')
+
+        _, app_columns, site_columns, end_user_columns = entry
+        return _detached(App, app_columns), _detached(Site, site_columns), _detached(EndUser, end_user_columns)
+
+    def set(self, claims: tuple, version: bytes, app_model: App, site: Site, end_user: EndUser):
+        entry = (version, _columns(app_model), _columns(site), _columns(end_user))
+        with self._lock:
+            self._sessions[claims] = entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._sessions)
+
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def _incr(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+
+def _columns(instance: db.Model) -> dict:
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+
+def _detached(model_class: Type[db.Model], columns: dict) -> db.Model:
+    instance = model_class(**columns)
+    make_transient_to_detached(instance)
+    return instance
+
+
+_web_app_session_cache: Optional[WebAppSessionCache] = None
+_web_app_session_cache_lock = threading.Lock()
+
+
+def get_web_app_session_cache() -> WebAppSessionCache:
+    global _web_app_session_cache
+    if _web_app_session_cache is None:
+        with _web_app_session_cache_lock:
+            if _web_app_session_cache is None:
+                _web_app_session_cache = WebAppSessionCache(
+                    max_size=int(current_app.config.get('WEB_APP_SESSION_CACHE_SIZE', 10000)),
+                    ttl=int(current_app.config.get('WEB_APP_SESSION_CACHE_TTL', 300))
+                )
+
+    return _web_app_session_cache
+
+
+class WebAppSessionService:
+
+    @classmethod
+    def resolve(cls, app_id: str, app_code: Optional[str], end_user_id: str) \
+            -> Tuple[Optional[App], Optional[Site], Optional[EndUser]]:
+        """
+        Resolve the app, site and end user of the JWT claims of a web app request.
+        Only complete resolutions are cached, the missing rows are queried again on the next request.
+
+        :param app_id: app id claim
+        :param app_code: site code claim
+        :param end_user_id: end user id claim
+        """
+        claims = (app_id, app_code, end_user_id)
+        version = cls._get_version(app_id)
+        web_app_session_cache = get_web_app_session_cache()
+        if version is not None:
+            session = web_app_session_cache.get(claims, version)
+            if session:
+                return session
+
+        app_model = db.session.query(App).filter(App.id == app_id).first()
+        site = db.session.query(Site).filter(Site.code == app_code).first()
+        end_user = db.session.query(EndUser).filter(EndUser.id == end_user_id).first()
+
+        if version is not None and app_model and site and end_user:
+            web_app_session_cache.set(claims, version, app_model, site, end_user)
+
+        return app_model, site, end_user
+
+    @classmethod
+    def invalidate(cls, app_id: str):
+        """Bump the version of an app after the app, its model config or its site was edited."""
+        try:
+            redis_client.incr(cls._version_key(app_id))
+        except Exception:
+            logging.exception('Failed to bump web app session version in redis')
+
+    @classmethod
+    def _get_version(cls, app_id: str) -> Optional[bytes]:
+        try:
+            return redis_client.get(cls._version_key(app_id)) or b'0'
+        except Exception:
+            # without the version the cached sessions can't be trusted
+            logging.exception('Failed to get web app session version from redis')
+            return None
+
+    @staticmethod
+    def _version_key(app_id: str) -> str:
+        return f'web_app_session_version:{app_id}'
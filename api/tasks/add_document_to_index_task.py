@@ -12,6 +12,7 @@ from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.dataset import DocumentSegment
 from models.dataset import Document as DatasetDocument
+from services.dataset_counter_service import DatasetCounterService
 
 
 @shared_task(queue='dataset')
@@ -82,3 +83,4 @@ def add_document_to_index_task(dataset_document_id: str):
         db.session.commit()
     finally:
         redis_client.delete(indexing_cache_key)
+        DatasetCounterService.refresh_counters(dataset_document.dataset_id)
@@ -0,0 +1,26 @@
+import logging
+import time
+
+import click
+from celery import shared_task
+
+from services.api_token_service import ApiTokenService
+
+
+@shared_task(queue='schedule')
+def api_token_last_used_flush_task():
+    """
+    Flush the last used times of the service API tokens recorded in redis, run by celery beat.
+
+    Usage: api_token_last_used_flush_task.delay()
+    """
+    logging.info(click.style('Start flush api token last used times', fg='green'))
+    start_at = time.perf_counter()
+
+    try:
+        count = ApiTokenService.flush_last_used()
+        end_at = time.perf_counter()
+        logging.info(click.style('Flushed last used times of {} api tokens, latency: {}'
+                                 .format(count, end_at - start_at), fg='green'))
+    except Exception:
+        logging.exception("Flush api token last used times failed")
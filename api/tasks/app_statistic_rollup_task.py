@@ -0,0 +1,25 @@
+import logging
+import time
+
+import click
+from celery import shared_task
+
+from services.app_statistic_service import AppStatisticService
+
+
+@shared_task(queue='schedule')
+def app_statistic_rollup_task():
+    """
+    Roll up the messages of the complete hours into the hourly app statistics, run by celery beat.
+
+    Usage: app_statistic_rollup_task.delay()
+    """
+    logging.info(click.style('Start roll up app statistics', fg='green'))
+    start_at = time.perf_counter()
+
+    try:
+        AppStatisticService.rollup()
+        end_at = time.perf_counter()
+        logging.info(click.style('Rolled up app statistics, latency: {}'.format(end_at - start_at), fg='green'))
+    except Exception:
+        logging.exception("Roll up app statistics failed")
@@ -16,6 +16,8 @@ from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from libs import helper
 from models.dataset import DocumentSegment, Dataset, Document
+from services.dataset_counter_service import DatasetCounterService
+from services.document_progress_service import DocumentProgressService
 
 
 @shared_task(queue='dataset')
@@ -89,6 +91,8 @@ def batch_create_segment_to_index_task(job_id: str, content: List, dataset_id: s
         indexing_runner = IndexingRunner()
         indexing_runner.batch_add_segments(document_segments, dataset)
         db.session.commit()
+        DocumentProgressService.invalidate_progress(document_id)
+        DatasetCounterService.refresh_counters(dataset_id)
         redis_client.setex(indexing_cache_key, 600, 'completed')
         end_at = time.perf_counter()
         logging.info(click.style('Segment batch created job: {} latency: {}'.format(job_id, end_at - start_at), fg='green'))
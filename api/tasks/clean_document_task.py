@@ -7,6 +7,7 @@ from celery import shared_task
 from core.index.index import IndexBuilder
 from extensions.ext_database import db
 from models.dataset import DocumentSegment, Dataset
+from services.dataset_counter_service import DatasetCounterService
 
 
 @shared_task(queue='dataset')
@@ -47,6 +48,7 @@ def clean_document_task(document_id: str, dataset_id: str):
                 db.session.delete(segment)
 
             db.session.commit()
+            DatasetCounterService.refresh_counters(dataset_id)
             end_at = time.perf_counter()
             logging.info(
                 click.style('Cleaned document when document deleted: {} latency: {}'.format(document_id, end_at - start_at), fg='green'))
@@ -8,6 +8,7 @@ from celery import shared_task
 from core.index.index import IndexBuilder
 from extensions.ext_database import db
 from models.dataset import DocumentSegment, Dataset, Document
+from services.dataset_counter_service import DatasetCounterService
 
 
 @shared_task(queue='dataset')
@@ -50,6 +51,7 @@ def clean_notion_document_task(document_ids: List[str], dataset_id: str):
             for segment in segments:
                 db.session.delete(segment)
         db.session.commit()
+        DatasetCounterService.refresh_counters(dataset_id)
         end_at = time.perf_counter()
         logging.info(
             click.style('Clean document when import form notion document deleted end :: {} latency: {}'.format(
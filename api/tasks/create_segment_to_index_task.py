@@ -12,6 +12,7 @@ from core.index.index import IndexBuilder
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.dataset import DocumentSegment
+from services.dataset_counter_service import DatasetCounterService
 
 
 @shared_task(queue='dataset')
@@ -100,3 +101,4 @@ def create_segment_to_index_task(segment_id: str, keywords: Optional[List[str]]
         db.session.commit()
     finally:
         redis_client.delete(indexing_cache_key)
+        DatasetCounterService.refresh_counters(segment.dataset_id)
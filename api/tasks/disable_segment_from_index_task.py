@@ -9,6 +9,7 @@ from core.index.index import IndexBuilder
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.dataset import DocumentSegment
+from services.dataset_counter_service import DatasetCounterService
 
 
 @shared_task(queue='dataset')
@@ -66,3 +67,4 @@ def disable_segment_from_index_task(segment_id: str):
         db.session.commit()
     finally:
         redis_client.delete(indexing_cache_key)
+        DatasetCounterService.refresh_counters(segment.dataset_id)
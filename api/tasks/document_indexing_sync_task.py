@@ -12,6 +12,7 @@ from core.indexing_runner import IndexingRunner, DocumentIsPausedException
 from extensions.ext_database import db
 from models.dataset import Document, Dataset, DocumentSegment
 from models.source import DataSourceBinding
+from services.dataset_counter_service import DatasetCounterService
 
 
 @shared_task(queue='dataset')
@@ -68,6 +69,7 @@ def document_indexing_sync_task(dataset_id: str, document_id: str):
             document.indexing_status = 'parsing'
             document.processing_started_at = datetime.datetime.utcnow()
             db.session.commit()
+            DatasetCounterService.refresh_counters(dataset_id)
 
             # delete all document segment and index
             try:
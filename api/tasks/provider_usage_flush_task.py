@@ -0,0 +1,26 @@
+import logging
+import time
+
+import click
+from celery import shared_task
+
+from core.model_providers.provider_usage_accounting import ProviderUsageAccounting
+
+
+@shared_task(queue='schedule')
+def provider_usage_flush_task():
+    """
+    Flush the quota used and the last used times of model providers accumulated in redis, run by celery beat.
+
+    Usage: provider_usage_flush_task.delay()
+    """
+    logging.info(click.style('Start flush provider usage', fg='green'))
+    start_at = time.perf_counter()
+
+    try:
+        quota_count, last_used_count = ProviderUsageAccounting.flush()
+        end_at = time.perf_counter()
+        logging.info(click.style('Flushed {} provider quota deltas and {} last used times, latency: {}'
+                                 .format(quota_count, last_used_count, end_at - start_at), fg='green'))
+    except Exception:
+        logging.exception("Flush provider usage failed")
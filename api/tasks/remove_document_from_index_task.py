@@ -9,6 +9,7 @@ from core.index.index import IndexBuilder
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.dataset import DocumentSegment, Document
+from services.dataset_counter_service import DatasetCounterService
 
 
 @shared_task(queue='dataset')
@@ -60,3 +61,4 @@ def remove_document_from_index_task(document_id: str):
             db.session.commit()
     finally:
         redis_client.delete(indexing_cache_key)
+        DatasetCounterService.refresh_counters(document.dataset_id)
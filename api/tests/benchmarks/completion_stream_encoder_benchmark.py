@@ -0,0 +1,54 @@
+"""
+Micro-benchmark of the SSE frames of streamed completion tokens.
+
+Compares the frames/sec of the per-token `json.dumps` of the response dict, which `CompletionService` used to do,
+with `CompletionStreamEncoder`. Run from the api directory:
+
+    python -m tests.benchmarks.completion_stream_encoder_benchmark
+"""
+import json
+import time
+import timeit
+
+from services.completion_stream_encoder import CompletionStreamEncoder, JSON_BACKEND
+
+FRAMES = 200000
+
+data = {
+    'task_id': '5ad4cb98-f0c7-4085-b384-88c403be6290',
+    'message_id': 'b9b1a5a5-7cf7-4a71-9c79-6c0bbf7cd2ea',
+    'text': ' token',
+    'mode': 'chat',
+    'conversation_id': '45701982-8118-4bc5-8e9b-64562b4555f2'
+}
+
+
+def dict_frame() -> str:
+    response_data = {
+        'event': 'message',
+        'task_id': data.get('task_id'),
+        'id': data.get('message_id'),
+        'answer': data.get('text'),
+        'created_at': int(time.time())
+    }
+
+    if data.get('mode') == 'chat':
+        response_data['conversation_id'] = data.get('conversation_id')
+
+    return "data: " + json.dumps(response_data) + "\n\n"
+
+
+def main():
+    encoder = CompletionStreamEncoder()
+    benchmarks = {
+        'json.dumps of the response dict': dict_frame,
+        f'CompletionStreamEncoder ({JSON_BACKEND})': lambda: encoder.encode_text_event('message', data),
+    }
+
+    for name, frame in benchmarks.items():
+        seconds = min(timeit.repeat(frame, number=FRAMES, repeat=3))
+        print(f'{name}: {FRAMES / seconds:,.0f} frames/sec')
+
+
+if __name__ == '__main__':
+    main()
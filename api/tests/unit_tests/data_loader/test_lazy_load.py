@@ -0,0 +1,86 @@
+from openpyxl import Workbook
+
+from core.data_loader.loader.csv_loader import CSVLoader
+from core.data_loader.loader.excel import ExcelLoader
+from core.data_loader.loader.notion import NotionLoader
+from core.data_loader.loader.pdf import PdfLoader
+
+
+def _pdf(page_texts: list[str]) -> bytes:
+    """A minimal pdf with a line of text on each page."""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', '', '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in page_texts:
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+    data = b'%PDF-1.4\n'
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f'{i} 0 obj\n{obj}\nendobj\n'.encode()
+    xref_offset = len(data)
+    data += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    data += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    data += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode()
+    return data
+
+
+def test_csv_lazy_load_matches_load(tmp_path):
+    file_path = tmp_path / 'rows.csv'
+    file_path.write_text('name,color\napple,red\npear,green\nplum,purple\n', encoding='utf-8')
+    loader = CSVLoader(file_path=str(file_path))
+
+    documents = loader.lazy_load()
+    assert next(documents).page_content == 'name: apple\ncolor: red'
+    assert [next(documents)] + list(documents) == loader.load()[1:]
+    assert len(loader.load()) == 3
+
+
+def test_excel_lazy_load_matches_load(tmp_path):
+    file_path = tmp_path / 'rows.xlsx'
+    workbook = Workbook()
+    workbook.active.append(['name', 'color'])
+    workbook.active.append(['apple', 'red'])
+    workbook.create_sheet().append(['pear', 'green'])
+    workbook.save(file_path)
+    loader = ExcelLoader(file_path=str(file_path))
+
+    assert list(loader.lazy_load()) == loader.load()
+    assert [document.page_content for document in loader.load()] == ['name:apple;color:red;', 'name:pear;color:green;']
+
+
+def test_pdf_lazy_load_matches_load(tmp_path):
+    file_path = tmp_path / 'pages.pdf'
+    file_path.write_bytes(_pdf(['first page', 'second page']))
+    loader = PdfLoader(file_path=str(file_path))
+
+    assert list(loader.lazy_load()) == loader.load()
+    assert [document.page_content for document in loader.load()] == ['first page', 'second page']
+
+
+def test_notion_lazy_load_fetches_block_pages_on_demand(mocker):
+    block_pages = [
+        {'results': [{'id': 'block-1', 'type': 'paragraph', 'has_children': False,
+                      'paragraph': {'rich_text': [{'text': {'content': 'first block'}}]}}],
+         'next_cursor': 'cursor-1'},
+        {'results': [{'id': 'block-2', 'type': 'paragraph', 'has_children': False,
+                      'paragraph': {'rich_text': [{'text': {'content': 'second block'}}]}}],
+         'next_cursor': None},
+    ]
+    mock_request = mocker.patch('core.data_loader.loader.notion.requests.request')
+    mock_request.return_value.json.side_effect = lambda: block_pages[mock_request.call_count - 1]
+    loader = NotionLoader(notion_access_token='token', notion_workspace_id='workspace_id',
+                          notion_obj_id='page_id', notion_page_type='page')
+
+    documents = loader.lazy_load()
+    assert next(documents).page_content == '\nfirst block\n\n'
+    assert mock_request.call_count == 1
+    assert [document.page_content for document in documents] == ['\nsecond block\n\n']
+
+    mock_request.reset_mock()
+    assert [document.page_content for document in loader.load()] == ['\nfirst block\n\n', '\nsecond block\n\n']
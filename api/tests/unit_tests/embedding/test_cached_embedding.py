@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+from core.embedding.cached_embedding import CacheEmbedding
+from core.embedding.query_embedding_cache import QueryEmbeddingCache
+from libs import helper
+from models.dataset import Embedding
+
+
+def _cached_row(text: str, vector: list[float]):
+    embedding = Embedding(model_name='test_model', hash=helper.generate_text_hash(text))
+    embedding.set_embedding(vector)
+    return embedding.hash, embedding.embedding
+
+
+def _mock_embedding_model(vectors: dict[str, list[float]]):
+    embedding_model = MagicMock()
+    embedding_model.name = 'test_model'
+    embedding_model.client.embed_documents.side_effect = lambda texts: [vectors[text] for text in texts]
+    return embedding_model
+
+
+def test_embed_documents_keeps_input_order(mocker):
+    mock_session = mocker.patch('core.embedding.cached_embedding.db.session')
+    mock_session.query.return_value.filter.return_value.all.return_value = [_cached_row('b', [0.0, 1.0])]
+
+    embedding_model = _mock_embedding_model({'a': [2.0, 0.0], 'c': [0.0, 0.0, 3.0]})
+    result = CacheEmbedding(embedding_model).embed_documents(['a', 'b', 'c', 'a'])
+
+    assert result == [[1.0, 0.0], [0.0, 1.0], [0.0, 0.0, 1.0], [1.0, 0.0]]
+    # cache misses are embedded once each and stored with a single upsert
+    embedding_model.client.embed_documents.assert_called_once_with(['a', 'c'])
+    assert mock_session.execute.call_count == 1
+    assert mock_session.commit.call_count == 1
+
+
+def test_embed_documents_all_cached(mocker):
+    mock_session = mocker.patch('core.embedding.cached_embedding.db.session')
+    mock_session.query.return_value.filter.return_value.all.return_value = [
+        _cached_row('a', [1.0, 0.0]),
+        _cached_row('b', [0.0, 1.0]),
+    ]
+
+    embedding_model = _mock_embedding_model({})
+    result = CacheEmbedding(embedding_model).embed_documents(['b', 'a'])
+
+    assert result == [[0.0, 1.0], [1.0, 0.0]]
+    assert mock_session.query.call_count == 1
+    embedding_model.client.embed_documents.assert_not_called()
+    mock_session.execute.assert_not_called()
+
+
+def test_embed_query_counts_db_lookups(mocker):
+    query_embedding_cache = QueryEmbeddingCache(max_size=10, redis_ttl=60)
+    mocker.patch('core.embedding.cached_embedding.get_query_embedding_cache', return_value=query_embedding_cache)
+    mocker.patch('core.embedding.query_embedding_cache.redis_client').get.return_value = None
+    mock_session = mocker.patch('core.embedding.cached_embedding.db.session')
+    cached_embedding = Embedding(model_name='test_model', hash=helper.generate_text_hash('cached'))
+    cached_embedding.set_embedding([0.0, 1.0])
+    filter_by = mock_session.query.return_value.filter_by
+    filter_by.return_value.first.side_effect = \
+        lambda: cached_embedding if filter_by.call_args.kwargs['hash'] == cached_embedding.hash else None
+
+    embedding_model = _mock_embedding_model({})
+    embedding_model.client.embed_query.return_value = [3.0, 4.0]
+    assert CacheEmbedding(embedding_model).embed_query('cached') == [0.0, 1.0]
+    assert CacheEmbedding(embedding_model).embed_query('new') == [0.6, 0.8]
+    # both are served from memory now
+    assert CacheEmbedding(embedding_model).embed_query('cached') == [0.0, 1.0]
+
+    stats = query_embedding_cache.stats()
+    assert (stats['db_hits'], stats['db_misses'], stats['memory_hits']) == (1, 1, 1)
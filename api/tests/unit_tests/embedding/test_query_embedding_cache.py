@@ -0,0 +1,30 @@
+import numpy as np
+
+from core.embedding.query_embedding_cache import QueryEmbeddingCache
+
+
+def test_query_embedding_cache_tiers(mocker):
+    mock_redis = mocker.patch('core.embedding.query_embedding_cache.redis_client')
+    mock_redis.get.return_value = None
+
+    cache = QueryEmbeddingCache(max_size=10, redis_ttl=60)
+    assert cache.get('test_model', 'hash') is None
+
+    cache.set('test_model', 'hash', [0.5, 0.25])
+    key, ttl, data = mock_redis.setex.call_args.args
+    assert ttl == 60
+    assert np.frombuffer(data, dtype='<f4').tolist() == [0.5, 0.25]
+
+    assert cache.get('test_model', 'hash') == [0.5, 0.25]
+
+    # an evicted entry is served from redis and promoted back to memory
+    cache.clear()
+    mock_redis.get.return_value = data
+    assert cache.get('test_model', 'hash') == [0.5, 0.25]
+    assert cache.get('test_model', 'hash') == [0.5, 0.25]
+
+    stats = cache.stats()
+    assert stats['memory_hits'] == 2
+    assert stats['memory_misses'] == 2
+    assert stats['redis_hits'] == 1
+    assert stats['redis_misses'] == 1
@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock
+
+from core.index.keyword_table_index.keyword_table_cache import KeywordTableCache
+
+
+def test_keyword_table_cache_reloads_on_version_change(mocker):
+    versions = {}
+    mock_redis = mocker.patch('core.index.keyword_table_index.keyword_table_cache.redis_client')
+    mock_redis.get.side_effect = lambda key: versions.get(key)
+    mock_redis.incr.side_effect = lambda key: versions.__setitem__(key, versions.get(key, 0) + 1)
+
+    loader = MagicMock(side_effect=[{'apple': {'node-1'}}, {'apple': {'node-1', 'node-2'}}])
+    cache = KeywordTableCache(max_size=10)
+
+    assert cache.get('dataset-1', loader) == {'apple': {'node-1'}}
+    assert cache.get('dataset-1', loader) == {'apple': {'node-1'}}
+    assert loader.call_count == 1
+
+    cache.invalidate('dataset-1')
+    assert cache.get('dataset-1', loader) == {'apple': {'node-1', 'node-2'}}
+    assert loader.call_count == 2
+
+
+def test_keyword_table_cache_bypassed_without_redis(mocker):
+    mock_redis = mocker.patch('core.index.keyword_table_index.keyword_table_cache.redis_client')
+    mock_redis.get.side_effect = ConnectionError()
+
+    loader = MagicMock(return_value={})
+    cache = KeywordTableCache(max_size=10)
+    cache.get('dataset-1', loader)
+    cache.get('dataset-1', loader)
+
+    assert loader.call_count == 2
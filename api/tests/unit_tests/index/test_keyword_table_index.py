@@ -0,0 +1,164 @@
+import json
+
+from click.testing import CliRunner
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
+from commands import migrate_keyword_table_to_inverted_index
+from core.index.keyword_table_index.keyword_table_index import KeywordTableIndex
+from models.dataset import Dataset, DatasetKeywordTable
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _inserted_keywords(statement) -> list[str]:
+    params = statement.compile(dialect=postgresql.dialect()).params
+    return [value for name, value in params.items() if name.startswith('keyword_')]
+
+
+def _inverted_index(mocker):
+    mock_session = mocker.patch('core.index.keyword_table_index.keyword_table_index.db.session')
+    mock_session.query.return_value.filter.return_value.scalar.return_value = 'inverted_index'
+    return KeywordTableIndex(dataset=Dataset(id='dataset-1')), mock_session
+
+
+def test_add_keyword_postings_in_batches(mocker):
+    mocker.patch('core.index.keyword_table_index.keyword_table_index.KEYWORD_POSTING_INSERT_BATCH_SIZE', 2)
+    index, mock_session = _inverted_index(mocker)
+
+    index.update_segment_keywords_index('node-1', ['apple', 'pear', 'plum', 'k' * 256])
+
+    # keywords longer than the column are skipped
+    statements = [call.args[0] for call in mock_session.execute.call_args_list]
+    assert len(statements) == 2
+    assert all(_sql(statement).endswith('ON CONFLICT (dataset_id, keyword, index_node_id) DO NOTHING')
+               for statement in statements)
+    assert sorted(_inserted_keywords(statements[0]) + _inserted_keywords(statements[1])) == ['apple', 'pear', 'plum']
+    mock_session.commit.assert_called_once()
+
+
+def test_delete_keyword_postings(mocker):
+    index, mock_session = _inverted_index(mocker)
+
+    index.delete_by_ids(['node-1', 'node-2'])
+
+    delete = mock_session.query.return_value.filter.return_value.delete
+    delete.assert_called_once_with(synchronize_session=False)
+    mock_session.commit.assert_called_once()
+
+    # no statement without ids
+    index.delete_by_ids([])
+    delete.assert_called_once()
+
+
+def test_search_ranks_postings_by_matching_keywords(mocker):
+    index, mock_session = _inverted_index(mocker)
+    mocker.patch('core.index.keyword_table_index.keyword_table_index.JiebaKeywordTableHandler.extract_keywords',
+                 return_value={'apple', 'pear'})
+    queries = []
+
+    class _Query(Query):
+        def all(self):
+            queries.append(self)
+            return [('node-2', 2), ('node-1', 1)]
+
+    mock_session.query.side_effect = lambda *entities: _Query(entities)
+
+    assert index._retrieve_ids_by_query_from_postings('apple and pear', k=3) == ['node-2', 'node-1']
+
+    sql = _sql(queries[0].statement)
+    assert 'dataset_keyword_postings.keyword IN' in sql
+    assert 'GROUP BY dataset_keyword_postings.index_node_id ' \
+           'ORDER BY count(dataset_keyword_postings.keyword) DESC' in sql
+    assert queries[0].statement.compile(dialect=postgresql.dialect()).params['param_1'] == 3
+
+
+def test_search_without_keywords(mocker):
+    index, mock_session = _inverted_index(mocker)
+    mocker.patch('core.index.keyword_table_index.keyword_table_index.JiebaKeywordTableHandler.extract_keywords',
+                 return_value=set())
+
+    assert index._retrieve_ids_by_query_from_postings('the', k=3) == []
+    mock_session.query.assert_not_called()
+
+
+def _keyword_table(dataset_id: str, table: dict) -> DatasetKeywordTable:
+    return DatasetKeywordTable(id=f'{dataset_id}-table', dataset_id=dataset_id, storage_type='json',
+                               keyword_table=json.dumps({'__type__': 'keyword_table',
+                                                         '__data__': {'index_id': dataset_id, 'summary': None,
+                                                                      'table': table}}))
+
+
+def _mock_migration_session(mocker, keyword_tables: list[DatasetKeywordTable]):
+    mock_session = mocker.patch('commands.db.session')
+    mocker.patch('commands.get_keyword_table_cache')
+
+    def query(*entities):
+        mock_query = mocker.MagicMock()
+        json_tables = [keyword_table for keyword_table in keyword_tables if keyword_table.storage_type == 'json']
+        if entities[0] is DatasetKeywordTable.id:
+            mock_query.filter.return_value.all.return_value = json_tables
+        else:
+            # the locked row is read again, a table migrated meanwhile is not found
+            def first():
+                table_id = mock_query.filter.call_args.args[0].right.value
+                return next((keyword_table for keyword_table in json_tables if keyword_table.id == table_id), None)
+
+            mock_query.filter.return_value.with_for_update.return_value.first.side_effect = first
+        return mock_query
+
+    mock_session.query.side_effect = query
+    return mock_session
+
+
+def test_migrate_keyword_table_in_batches(mocker):
+    keyword_tables = [_keyword_table('dataset-1', {'apple': ['node-1', 'node-2'], 'pear': ['node-1']}),
+                      _keyword_table('dataset-2', {})]
+    mock_session = _mock_migration_session(mocker, keyword_tables)
+
+    result = CliRunner().invoke(migrate_keyword_table_to_inverted_index, ['--batch-size', '2'])
+
+    assert result.exit_code == 0
+    assert 'Migrated 2 keyword tables' in result.output
+    statements = [call.args[0] for call in mock_session.execute.call_args_list]
+    assert [_inserted_keywords(statement) for statement in statements] == [['apple', 'apple'], ['pear']]
+    assert mock_session.commit.call_count == 2
+
+    for keyword_table in keyword_tables:
+        assert keyword_table.storage_type == 'inverted_index'
+        assert keyword_table.keyword_table_dict['__data__']['table'] == {}
+
+
+def test_migrate_keyword_table_idempotent(mocker):
+    keyword_tables = [_keyword_table('dataset-1', {'apple': ['node-1']})]
+    mock_session = _mock_migration_session(mocker, keyword_tables)
+    CliRunner().invoke(migrate_keyword_table_to_inverted_index)
+    mock_session.reset_mock()
+
+    result = CliRunner().invoke(migrate_keyword_table_to_inverted_index)
+
+    assert 'Migrated 0 keyword tables' in result.output
+    mock_session.execute.assert_not_called()
+    mock_session.commit.assert_not_called()
+
+
+def test_migrate_keyword_table_migrated_meanwhile(mocker):
+    keyword_tables = [_keyword_table('dataset-1', {'apple': ['node-1']})]
+    mock_session = _mock_migration_session(mocker, keyword_tables)
+    query = mock_session.query.side_effect
+
+    def migrate_after_listing(*entities):
+        mock_query = query(*entities)
+        if entities[0] is DatasetKeywordTable.id:
+            keyword_tables[0].storage_type = 'inverted_index'
+        return mock_query
+
+    mock_session.query.side_effect = migrate_after_listing
+
+    result = CliRunner().invoke(migrate_keyword_table_to_inverted_index)
+
+    assert 'Migrated 0 keyword tables' in result.output
+    mock_session.execute.assert_not_called()
+    mock_session.rollback.assert_called_once()
@@ -0,0 +1,50 @@
+from core.index.segment_hydrator import SegmentHydrator
+from models.dataset import DocumentSegment, Document, Dataset
+
+
+def _segment(index_node_id: str, document_id: str = 'doc-1', dataset_id: str = 'dataset-1'):
+    return DocumentSegment(index_node_id=index_node_id, document_id=document_id, dataset_id=dataset_id)
+
+
+def test_get_segments_keeps_index_node_id_order(mocker):
+    mock_session = mocker.patch('core.index.segment_hydrator.db.session')
+    mock_session.query.return_value.filter.return_value.all.return_value = [
+        _segment('node-3'), _segment('node-1'), _segment('node-2')
+    ]
+
+    segments = SegmentHydrator.get_segments(['node-2', 'node-missing', 'node-3', 'node-1', 'node-2'],
+                                            dataset_id='dataset-1', available_only=True)
+
+    assert [segment.index_node_id for segment in segments] == ['node-2', 'node-3', 'node-1']
+    assert mock_session.query.call_count == 1
+
+
+def test_get_segments_without_ids(mocker):
+    mock_session = mocker.patch('core.index.segment_hydrator.db.session')
+
+    assert SegmentHydrator.get_segments([]) == []
+    mock_session.query.assert_not_called()
+
+
+def test_get_segment_sources_loads_each_model_once(mocker):
+    mock_session = mocker.patch('core.index.segment_hydrator.db.session')
+    segments = [_segment('node-1', 'doc-1', 'dataset-1'),
+                _segment('node-2', 'doc-2', 'dataset-2'),
+                _segment('node-3', 'doc-1', 'dataset-1')]
+
+    def query(model):
+        result = mocker.MagicMock()
+        if model is Dataset:
+            rows = [Dataset(id='dataset-1'), Dataset(id='dataset-2')]
+        else:
+            rows = [Document(id='doc-1')]
+        result.filter.return_value.all.return_value = rows
+        return result
+
+    mock_session.query.side_effect = query
+
+    datasets_by_id, documents_by_id = SegmentHydrator.get_segment_sources(segments)
+
+    assert set(datasets_by_id) == {'dataset-1', 'dataset-2'}
+    assert set(documents_by_id) == {'doc-1'}
+    assert mock_session.query.call_count == 2
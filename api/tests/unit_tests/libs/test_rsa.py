@@ -0,0 +1,69 @@
+import pytest
+from Crypto.PublicKey import RSA
+
+from libs import rsa
+
+
+@pytest.fixture
+def key_storage(mocker):
+    """Private keys saved by tenant id, with the redis private key cache disabled."""
+    mock_redis = mocker.patch('libs.rsa.redis_client')
+    mock_redis.get.return_value = None
+
+    private_keys = {}
+    mock_storage = mocker.patch('libs.rsa.storage')
+    mock_storage.save.side_effect = lambda filepath, data: private_keys.__setitem__(filepath.split('/')[1], data)
+    mock_storage.load.side_effect = lambda filepath: private_keys[filepath.split('/')[1]]
+
+    # fast 1024 bit keys
+    generate = RSA.generate
+    mocker.patch('libs.rsa.RSA.generate', side_effect=lambda bits: generate(1024))
+
+    cache = rsa.DecryptionCache(max_size=10, ttl=60)
+    mocker.patch('libs.rsa.get_decryption_cache', return_value=cache)
+
+    return cache
+
+
+def test_decrypt_imports_key_once(mocker, key_storage):
+    public_key = rsa.generate_key_pair('tenant_id')
+    first_token = rsa.encrypt('first_key', public_key)
+    second_token = rsa.encrypt('second_key', public_key)
+    import_key = mocker.spy(rsa.RSA, 'import_key')
+
+    assert rsa.decrypt(first_token, 'tenant_id') == 'first_key'
+    assert rsa.decrypt(first_token, 'tenant_id') == 'first_key'
+    assert rsa.decrypt(second_token, 'tenant_id') == 'second_key'
+    assert import_key.call_count == 1
+
+    stats = key_storage.stats()
+    assert stats['text_hits'] == 1
+    assert stats['text_misses'] == 2
+    assert stats['key_hits'] == 1
+    assert stats['key_misses'] == 1
+
+
+def test_purge_tenant(key_storage):
+    first_public_key = rsa.generate_key_pair('tenant_id')
+    other_public_key = rsa.generate_key_pair('other_tenant_id')
+    rsa.decrypt(rsa.encrypt('api_key', first_public_key), 'tenant_id')
+    rsa.decrypt(rsa.encrypt('api_key', other_public_key), 'other_tenant_id')
+    assert key_storage.stats()['text_size'] == 2
+
+    rsa.purge_decryption_cache('tenant_id')
+
+    stats = key_storage.stats()
+    assert stats['key_size'] == 1
+    assert stats['text_size'] == 1
+
+
+def test_key_pair_reset_by_another_process(key_storage):
+    rsa.decrypt(rsa.encrypt('api_key', rsa.generate_key_pair('tenant_id')), 'tenant_id')
+
+    # the key pair is reset without purging the cache of this process
+    cached_key = key_storage.get_key('tenant_id')
+    public_key = rsa.generate_key_pair('tenant_id')
+    key_storage.set_key('tenant_id', cached_key)
+
+    assert rsa.decrypt(rsa.encrypt('new_api_key', public_key), 'tenant_id') == 'new_api_key'
+    assert key_storage.get_key('tenant_id') is not cached_key
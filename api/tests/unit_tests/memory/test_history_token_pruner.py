@@ -0,0 +1,104 @@
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+from core.memory.history_token_pruner import HistoryTokenPruner
+from core.model_providers.models.entity.message import PromptMessage, MessageType
+from models.model import Message
+
+# every message adds its words plus 4 tokens, every prompt has 3 base tokens
+BASE_TOKENS = 3
+MESSAGE_TOKENS = 4
+
+
+def get_num_tokens(messages: List[PromptMessage]) -> int:
+    return BASE_TOKENS + sum(MESSAGE_TOKENS + len(message.content.split()) for message in messages)
+
+
+def _model_instance(mocker):
+    model_instance = mocker.MagicMock()
+    model_instance.name = 'gpt-3.5-turbo'
+    model_instance.model_provider.provider_name = 'openai'
+    model_instance.get_num_tokens.side_effect = get_num_tokens
+    return model_instance
+
+
+def _history(count: int, model_id: str = 'gpt-3.5-turbo'):
+    history = []
+    for i in range(count):
+        message = Message(id=f'message-{i}', model_provider='openai', model_id=model_id, query=f'question {i}', answer=f'answer {i} ' * i)
+        history.append((message,
+                        PromptMessage(content=message.query, type=MessageType.USER),
+                        PromptMessage(content=message.answer, type=MessageType.ASSISTANT)))
+
+    return history
+
+
+def _naive_prune(prompt_messages: List[PromptMessage], max_token_limit: int) -> List[PromptMessage]:
+    prompt_messages = list(prompt_messages)
+    while get_num_tokens(prompt_messages) > max_token_limit and prompt_messages:
+        prompt_messages.pop(0)
+
+    return prompt_messages
+
+
+def test_prune_matches_recounting(mocker):
+    mocker.patch('core.memory.history_token_pruner.db')
+    pruner = HistoryTokenPruner(_model_instance(mocker))
+
+    history = _history(6)
+    prompt_messages = [prompt_message for _, query, answer in history for prompt_message in (query, answer)]
+    token_counts = pruner.get_history_token_counts(history)
+
+    for max_token_limit in range(0, get_num_tokens(prompt_messages) + 2):
+        assert pruner.prune(prompt_messages, token_counts, max_token_limit) \
+               == _naive_prune(prompt_messages, max_token_limit)
+
+
+def test_token_counts_are_kept_on_messages(mocker):
+    mock_db = mocker.patch('core.memory.history_token_pruner.db')
+    model_instance = _model_instance(mocker)
+    history = _history(3)
+
+    token_counts = HistoryTokenPruner(model_instance).get_history_token_counts(history)
+    assert token_counts == [6, 4, 6, 6, 6, 8]
+    assert [(message.history_query_tokens, message.history_answer_tokens) for message, _, _ in history] \
+           == [(6, 4), (6, 6), (6, 8)]
+
+    # the counts are written with one statement on a connection of their own, the request session is untouched
+    execute = mock_db.engine.begin.return_value.__enter__.return_value.execute
+    execute.assert_called_once()
+    sql = str(execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith('UPDATE messages SET history_query_tokens=CASE messages.id')
+    assert not mock_db.session.method_calls
+    assert not any(inspect(message).attrs[key].history.has_changes() for message, _, _ in history
+                   for key in ('history_query_tokens', 'history_answer_tokens'))
+
+    model_instance.get_num_tokens.reset_mock()
+    execute.reset_mock()
+
+    assert HistoryTokenPruner(model_instance).get_history_token_counts(history) == token_counts
+    model_instance.get_num_tokens.assert_not_called()
+    execute.assert_not_called()
+
+
+def test_failed_token_count_save_ignored(mocker):
+    mock_db = mocker.patch('core.memory.history_token_pruner.db')
+    mock_db.engine.begin.side_effect = Exception('database unavailable')
+    history = _history(2)
+
+    assert HistoryTokenPruner(_model_instance(mocker)).get_history_token_counts(history) == [6, 4, 6, 6]
+    assert history[0][0].history_query_tokens is None
+
+
+def test_token_counts_of_another_model_are_not_kept(mocker):
+    mock_db = mocker.patch('core.memory.history_token_pruner.db')
+    model_instance = _model_instance(mocker)
+    history = _history(2, model_id='gpt-4')
+    history[0][0].history_query_tokens = 100
+    history[0][0].history_answer_tokens = 100
+
+    assert HistoryTokenPruner(model_instance).get_history_token_counts(history) == [6, 4, 6, 6]
+    assert history[1][0].history_query_tokens is None
+    mock_db.engine.begin.assert_not_called()
@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock
 
 import pytest
+from flask import Flask
 
 from core.model_providers.error import QuotaExceededError
 from core.model_providers.models.entity.model_params import ModelType
@@ -8,6 +9,13 @@ from models.provider import Provider, ProviderType
 from tests.unit_tests.model_providers.fake_model_provider import FakeModelProvider
 
 
+def _mock_redis(mocker):
+    """No cached quota snapshot and no usage accumulated in redis."""
+    mock_redis = mocker.patch('core.model_providers.provider_usage_accounting.redis_client')
+    mock_redis.pipeline.return_value.execute.return_value = [None, None, None]
+    return mock_redis
+
+
 def test_get_supported_model_list(mocker):
     mocker.patch.object(
         FakeModelProvider,
@@ -37,10 +45,11 @@ def test_check_quota_over_limit(mocker):
     mock_query = MagicMock()
     mock_query.filter.return_value.first.return_value = None
     mocker.patch('extensions.ext_database.db.session.query', return_value=mock_query)
+    _mock_redis(mocker)
 
     provider = FakeModelProvider(provider=Provider(provider_type=ProviderType.SYSTEM.value))
 
-    with pytest.raises(QuotaExceededError):
+    with pytest.raises(QuotaExceededError), Flask('test').app_context():
         provider.check_quota_over_limit()
 
 
@@ -52,12 +61,14 @@ def test_check_quota_not_over_limit(mocker):
     )
 
     mock_query = MagicMock()
-    mock_query.filter.return_value.first.return_value = Provider()
+    mock_query.filter.return_value.first.return_value = Provider(is_valid=True, quota_limit=10, quota_used=9)
     mocker.patch('extensions.ext_database.db.session.query', return_value=mock_query)
+    _mock_redis(mocker)
 
     provider = FakeModelProvider(provider=Provider(provider_type=ProviderType.SYSTEM.value))
 
-    assert provider.check_quota_over_limit() is None
+    with Flask('test').app_context():
+        assert provider.check_quota_over_limit() is None
 
 
 def test_check_custom_quota_over_limit(mocker):
@@ -0,0 +1,86 @@
+import json
+from unittest.mock import patch
+
+from flask import Flask
+
+from core.model_providers.model_provider_factory import ModelProviderFactory
+from core.model_providers.model_resolution_cache import ModelResolutionCache
+from core.model_providers.models.entity.model_params import ModelType
+from core.model_providers.providers.openai_provider import OpenAIProvider
+from models.provider import ProviderType, Provider
+
+
+def _custom_provider(tenant_id: str = 'tenant_id') -> Provider:
+    return Provider(
+        id='provider_id',
+        tenant_id=tenant_id,
+        provider_name='openai',
+        provider_type=ProviderType.CUSTOM.value,
+        encrypted_config=json.dumps({'openai_api_key': 'encrypted_valid_key'}),
+        is_valid=True,
+    )
+
+
+def test_preferred_model_provider_resolved_once_per_request(mocker):
+    mock_get_preferred_provider = mocker.patch.object(ModelProviderFactory, '_get_preferred_provider',
+                                                      return_value=_custom_provider())
+
+    with Flask('test').app_context():
+        model_provider = ModelProviderFactory.get_preferred_model_provider('tenant_id', 'openai')
+        assert ModelProviderFactory.get_preferred_model_provider('tenant_id', 'openai') is model_provider
+        assert mock_get_preferred_provider.call_count == 1
+
+        ModelProviderFactory.get_preferred_model_provider('other_tenant_id', 'openai')
+        assert mock_get_preferred_provider.call_count == 2
+
+        # writes to the provider configuration of a tenant resolve it again
+        ModelResolutionCache.invalidate('tenant_id')
+        assert ModelProviderFactory.get_preferred_model_provider('tenant_id', 'openai') is not model_provider
+        assert mock_get_preferred_provider.call_count == 3
+
+    # each request has its own cache
+    with Flask('test').app_context():
+        ModelProviderFactory.get_preferred_model_provider('tenant_id', 'openai')
+        assert mock_get_preferred_provider.call_count == 4
+
+
+def test_unavailable_provider_is_cached(mocker):
+    mock_get_preferred_provider = mocker.patch.object(ModelProviderFactory, '_get_preferred_provider',
+                                                      return_value=None)
+
+    with Flask('test').app_context():
+        assert ModelProviderFactory.get_preferred_model_provider('tenant_id', 'openai') is None
+        assert ModelProviderFactory.get_preferred_model_provider('tenant_id', 'openai') is None
+
+    assert mock_get_preferred_provider.call_count == 1
+
+
+def test_no_cache_outside_app_context():
+    resolve_calls = []
+
+    def resolve():
+        resolve_calls.append(1)
+        return 'value'
+
+    assert ModelResolutionCache.get_or_resolve('tenant_id', 'key', resolve) == 'value'
+    assert ModelResolutionCache.get_or_resolve('tenant_id', 'key', resolve) == 'value'
+    assert len(resolve_calls) == 2
+
+
+@patch('core.helper.encrypter.decrypt_token', side_effect=lambda tenant_id, token: token.replace('encrypted_', ''))
+def test_credentials_decrypted_once(mock_decrypt):
+    model_provider = OpenAIProvider(provider=_custom_provider())
+
+    credentials = model_provider.get_model_credentials('gpt-3.5-turbo', ModelType.TEXT_GENERATION)
+    assert credentials['openai_api_key'] == 'valid_key'
+
+    # the memoized credentials can't be modified through a returned copy
+    credentials['openai_api_key'] = 'modified'
+    assert model_provider.get_model_credentials('gpt-3.5-turbo', ModelType.TEXT_GENERATION)['openai_api_key'] \
+           == 'valid_key'
+    assert model_provider.get_provider_credentials()['openai_api_key'] == 'valid_key'
+    assert mock_decrypt.call_count == 1
+
+    obfuscated_credentials = model_provider.get_provider_credentials(obfuscated=True)
+    assert obfuscated_credentials['openai_api_key'] != 'valid_key'
+    assert mock_decrypt.call_count == 2
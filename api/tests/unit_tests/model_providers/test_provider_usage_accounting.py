@@ -0,0 +1,219 @@
+import fnmatch
+
+import pytest
+from flask import Flask
+from redis import ResponseError
+
+from core.model_providers.error import QuotaExceededError
+from core.model_providers.provider_usage_accounting import ProviderUsageAccounting, QUOTA_PENDING_KEY, \
+    LAST_USED_PENDING_KEY, FLUSH_LOCK_KEY
+from models.provider import Provider, ProviderType, ProviderUsageFlush
+from tests.unit_tests.model_providers.fake_model_provider import FakeModelProvider
+
+
+class _FakeRedis:
+    """The redis commands of the accounting on a dict, with bytes values like the redis client."""
+
+    def __init__(self):
+        self.data = {}
+
+    def hincrby(self, name, key, amount):
+        value = int(self.data.setdefault(name, {}).get(key.encode(), 0)) + amount
+        self.data[name][key.encode()] = str(value).encode()
+
+    def hset(self, name, key, value):
+        self.data.setdefault(name, {})[key.encode()] = str(value).encode()
+
+    def hget(self, name, key):
+        return self.data.get(name, {}).get(key.encode())
+
+    def hgetall(self, name):
+        return dict(self.data.get(name, {}))
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def set(self, name, value):
+        self.data[name] = value.encode()
+
+    def setex(self, name, ttl, value):
+        self.data[name] = value
+
+    def delete(self, name):
+        self.data.pop(name, None)
+
+    def exists(self, name):
+        return name in self.data
+
+    def rename(self, src, dst):
+        if src not in self.data:
+            raise ResponseError('no such key')
+        self.data[dst] = self.data.pop(src)
+
+    def scan_iter(self, match):
+        return [name for name in list(self.data) if fnmatch.fnmatch(name, match)]
+
+    def lock(self, name, timeout=None):
+        redis = self
+
+        class _Lock:
+            def acquire(self, blocking=True, blocking_timeout=None):
+                if name in redis.data:
+                    return False
+                redis.data[name] = b'token'
+                return True
+
+            def release(self):
+                redis.data.pop(name)
+
+        return _Lock()
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class _Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            def __getattr__(self, name):
+                return lambda *args: self.commands.append((getattr(redis, name), args))
+
+            def execute(self):
+                return [command(*args) for command, args in self.commands]
+
+        return _Pipeline()
+
+
+@pytest.fixture
+def fake_redis(mocker):
+    redis = _FakeRedis()
+    mocker.patch('core.model_providers.provider_usage_accounting.redis_client', redis)
+    return redis
+
+
+def _mock_session(mocker, applied_batch=None):
+    mock_session = mocker.patch('core.model_providers.provider_usage_accounting.db.session')
+    mock_session.query.return_value.filter.return_value.first.return_value = applied_batch
+    return mock_session
+
+
+def _system_provider(mocker) -> FakeModelProvider:
+    mocker.patch.object(FakeModelProvider, 'get_rules', return_value={
+        'support_provider_types': ['system'],
+        'system_config': {'quota_unit': 'tokens'}
+    })
+    mocker.patch.object(FakeModelProvider, 'should_deduct_quota', return_value=True)
+    return FakeModelProvider(provider=Provider(id='provider_id', tenant_id='tenant_id', provider_name='fake',
+                                               provider_type=ProviderType.SYSTEM.value))
+
+
+def test_usage_accumulated_without_writes(mocker, fake_redis):
+    mock_session = mocker.patch('core.model_providers.provider_usage_accounting.db.session')
+    mock_session.query.return_value.filter.return_value.first.return_value = \
+        Provider(is_valid=True, quota_limit=100, quota_used=40)
+    model_provider = _system_provider(mocker)
+
+    with Flask('test').app_context():
+        model_provider.check_quota_over_limit()
+        model_provider.deduct_quota(30)
+        model_provider.update_last_used()
+        model_provider.check_quota_over_limit()
+        model_provider.deduct_quota(30)
+
+        # 40 used in the table and 60 not flushed yet
+        with pytest.raises(QuotaExceededError):
+            model_provider.check_quota_over_limit()
+
+    # the quota snapshot is loaded once and nothing is written to the table
+    assert mock_session.query.call_count == 1
+    mock_session.commit.assert_not_called()
+    assert fake_redis.hget(QUOTA_PENDING_KEY, 'provider_id') == b'60'
+    assert fake_redis.hget(LAST_USED_PENDING_KEY, 'tenant_id:fake') is not None
+
+
+def test_flush_applies_aggregated_deltas(mocker, fake_redis):
+    mock_session = _mock_session(mocker)
+    fake_redis.setex('provider_usage:quota:provider_id', 60, b'100:40')
+    ProviderUsageAccounting.record_quota('provider_id', 30)
+    ProviderUsageAccounting.record_quota('provider_id', 20)
+    ProviderUsageAccounting.record_last_used('tenant_id', 'fake')
+
+    assert ProviderUsageAccounting.flush() == (1, 1)
+
+    updates = mock_session.query.return_value.filter.return_value.update.call_args_list
+    assert len(updates) == 2
+    assert updates[0].args[0]['quota_used'].right.value == 50
+    mock_session.commit.assert_called()
+
+    # each batch is recorded in the transaction applying it
+    flushes = [call.args[0] for call in mock_session.add.call_args_list]
+    assert len(flushes) == 2 and all(isinstance(flush, ProviderUsageFlush) for flush in flushes)
+
+    # the flushed deltas and the snapshot missing them are dropped
+    assert fake_redis.data == {}
+    assert ProviderUsageAccounting.flush() == (0, 0)
+
+
+def test_failed_flush_is_retried(mocker, fake_redis):
+    mock_session = _mock_session(mocker)
+    mock_session.commit.side_effect = [Exception('database unavailable'), None, None]
+    ProviderUsageAccounting.record_quota('provider_id', 30)
+
+    with pytest.raises(Exception):
+        ProviderUsageAccounting.flush()
+    mock_session.rollback.assert_called_once()
+
+    # deltas being flushed still count against the quota
+    assert ProviderUsageAccounting.get_pending_quota('provider_id') == 30
+    ProviderUsageAccounting.record_quota('provider_id', 5)
+    assert ProviderUsageAccounting.get_pending_quota('provider_id') == 35
+
+    assert ProviderUsageAccounting.flush() == (1, 0)
+    assert ProviderUsageAccounting.get_pending_quota('provider_id') == 5
+
+    # the retried batch keeps its id
+    assert mock_session.add.call_args_list[0].args[0].id == mock_session.add.call_args_list[1].args[0].id
+
+
+def test_concurrent_flush_skipped(mocker, fake_redis):
+    mock_session = _mock_session(mocker)
+    ProviderUsageAccounting.record_quota('provider_id', 30)
+
+    # another worker holds the flush lock
+    fake_redis.data[FLUSH_LOCK_KEY] = b'token'
+    assert ProviderUsageAccounting.flush() == (0, 0)
+
+    mock_session.query.assert_not_called()
+    assert ProviderUsageAccounting.get_pending_quota('provider_id') == 30
+
+
+def test_applied_batch_not_applied_again(mocker, fake_redis):
+    mock_session = _mock_session(mocker)
+    ProviderUsageAccounting.record_quota('provider_id', 30)
+
+    # the flush crashes after its commit, before dropping the flushed hash
+    fake_redis.pipeline = mocker.Mock(side_effect=Exception('redis connection lost'))
+    with pytest.raises(Exception):
+        ProviderUsageAccounting.flush()
+    del fake_redis.pipeline
+
+    applied_batch = mock_session.add.call_args.args[0]
+    mock_session.reset_mock()
+    mock_session.query.return_value.filter.return_value.first.return_value = applied_batch
+
+    assert ProviderUsageAccounting.flush() == (1, 0)
+
+    mock_session.query.return_value.filter.return_value.update.assert_not_called()
+    mock_session.add.assert_not_called()
+    assert ProviderUsageAccounting.get_pending_quota('provider_id') == 0
+    assert fake_redis.data == {}
+
+
+def test_reconcile_drops_quota_snapshots(mocker, fake_redis):
+    _mock_session(mocker)
+    fake_redis.setex('provider_usage:quota:provider_id', 60, b'100:40')
+    fake_redis.setex('provider_usage:quota:other_provider_id', 60, b'100:100')
+
+    ProviderUsageAccounting.reconcile()
+
+    assert fake_redis.data == {}
@@ -0,0 +1,87 @@
+import re
+
+from core.model_providers.models.llm.token_counter import StreamTokenCounter
+
+
+def count_words(text: str) -> int:
+    # a word with its leading whitespace is a token, like byte pair tokenizers never merging across words
+    return len(re.findall(r'\s*\S+|\s+', text))
+
+
+def test_count_matches_whole_text():
+    calls = []
+
+    def count_text_tokens(text: str) -> int:
+        calls.append(text)
+        return count_words(text)
+
+    counter = StreamTokenCounter(count_text_tokens, message_tokens=3)
+    chunks = ['Hel', 'lo', ', wor', 'ld', '!', ' How', '  are', ' you', '?\n\n', 'Fine', ' ']
+    for chunk in chunks:
+        counter.append(chunk)
+
+    text = ''.join(chunks)
+    assert counter.text == text
+    assert counter.num_tokens == count_words(text) + 3
+    # each part of the text is tokenized once
+    assert ''.join(calls) == text
+
+
+def test_num_tokens_is_cached_until_next_chunk():
+    calls = []
+
+    def count_text_tokens(text: str) -> int:
+        calls.append(text)
+        return count_words(text)
+
+    counter = StreamTokenCounter(count_text_tokens)
+    counter.append('Hello')
+
+    assert counter.num_tokens == 1
+    assert counter.num_tokens == 1
+    assert calls == ['Hello']
+
+    counter.append('')
+    counter.append(' world')
+    assert counter.num_tokens == 2
+    assert calls == ['Hello', 'Hello', ' world']
+
+
+def test_long_text_without_word_boundary():
+    counter = StreamTokenCounter(len)
+    for _ in range(StreamTokenCounter.MAX_PENDING_LENGTH + 10):
+        counter.append('字')
+
+    assert counter.num_tokens == StreamTokenCounter.MAX_PENDING_LENGTH + 10
+    assert len(counter._pending) < StreamTokenCounter.MAX_PENDING_LENGTH
+
+
+def test_empty_counter():
+    counter = StreamTokenCounter(count_words, message_tokens=6)
+
+    assert counter.text == ''
+    assert counter.num_tokens == 6
+
+
+def test_counter_without_local_tokenizer_counts_once():
+    calls = []
+
+    def count_message_tokens(text: str) -> int:
+        calls.append(text)
+        return count_words(text) + 3
+
+    counter = StreamTokenCounter(count_message_tokens, incremental=False)
+    chunks = ['Hel', 'lo', ', wor', 'ld', '!', ' How', '  are', ' you', '?\n\n', 'Fine', ' ']
+    for chunk in chunks:
+        counter.append(chunk)
+
+    # nothing is tokenized while streaming
+    assert calls == []
+
+    text = ''.join(chunks)
+    assert counter.num_tokens == count_words(text) + 3
+    assert counter.num_tokens == count_words(text) + 3
+    assert calls == [text]
+
+    # an empty completion is counted as an empty message
+    assert StreamTokenCounter(count_message_tokens, incremental=False).num_tokens == 3
@@ -0,0 +1,36 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from models.dataset import Embedding
+
+
+def test_compact_float32_embedding():
+    embedding = Embedding()
+    embedding.set_embedding([0.5, -0.25, 1.0])
+
+    assert embedding.is_compact_embedding()
+    assert len(embedding.embedding) == Embedding.STORAGE_HEADER_SIZE + 3 * 4
+    assert embedding.get_embedding() == [0.5, -0.25, 1.0]
+    assert embedding.get_embedding_array().dtype == np.float32
+
+
+def test_compact_float16_embedding():
+    embedding = Embedding()
+    embedding.set_embedding([0.5, -0.25, 1.0], dtype='float16')
+
+    assert len(embedding.embedding) == Embedding.STORAGE_HEADER_SIZE + 3 * 2
+    assert embedding.get_embedding() == [0.5, -0.25, 1.0]
+
+
+def test_pickled_embedding_is_still_readable():
+    embedding = Embedding(embedding=pickle.dumps([0.1, 0.2], protocol=pickle.HIGHEST_PROTOCOL))
+
+    assert not embedding.is_compact_embedding()
+    assert embedding.get_embedding() == [0.1, 0.2]
+
+
+def test_unsupported_embedding_dtype():
+    with pytest.raises(ValueError):
+        Embedding().set_embedding([0.1], dtype='float64')
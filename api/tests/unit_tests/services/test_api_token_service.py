@@ -0,0 +1,115 @@
+import pytest
+from flask import Flask
+from redis import ResponseError
+from sqlalchemy.dialects import postgresql
+
+from models.model import ApiToken
+from services.api_token_service import ApiTokenService, ApiTokenCache, LAST_USED_PENDING_KEY, \
+    LAST_USED_FLUSHING_KEY, FLUSH_LOCK_KEY
+
+
+@pytest.fixture
+def redis_cache(mocker):
+    cache = {}
+    mock_redis = mocker.patch('services.api_token_service.redis_client')
+    mock_redis.get.side_effect = lambda key: cache.get(key)
+    mock_redis.setex.side_effect = lambda key, ttl, value: cache.__setitem__(key, value.encode('utf-8'))
+    mock_redis.delete.side_effect = lambda key: cache.pop(key, None)
+    return cache
+
+
+@pytest.fixture
+def api_token_cache(mocker):
+    api_token_cache = ApiTokenCache(ttl=60)
+    mocker.patch('services.api_token_service.get_api_token_cache', return_value=api_token_cache)
+    return api_token_cache
+
+
+def _mock_session(mocker, api_token):
+    mock_session = mocker.patch('services.api_token_service.db.session')
+    mock_session.query.return_value.filter.return_value.first.return_value = api_token
+    return mock_session
+
+
+def test_api_token_cached(mocker, redis_cache, api_token_cache):
+    mock_session = _mock_session(mocker, ApiToken(id='token_id', app_id='app_id', type='app', token='app-token'))
+
+    with Flask('test').app_context():
+        api_token = ApiTokenService.get_api_token('app-token', 'app')
+        assert ApiTokenService.get_api_token('app-token', 'app').app_id == 'app_id'
+
+    assert (api_token.id, api_token.app_id, api_token.tenant_id) == ('token_id', 'app_id', None)
+    assert mock_session.query.call_count == 1
+    assert api_token_cache.stats() == {'hits': 1, 'misses': 1}
+
+    # tokens are not stored as redis keys
+    assert len(redis_cache) == 1
+    assert 'app-token' not in next(iter(redis_cache))
+
+
+def test_deleted_api_token_invalidated(mocker, redis_cache, api_token_cache):
+    mock_session = _mock_session(mocker, ApiToken(id='token_id', tenant_id='tenant_id', type='dataset',
+                                                  token='dataset-token'))
+    api_token = ApiTokenService.get_api_token('dataset-token', 'dataset')
+
+    # no process keeps the deleted token in memory
+    mock_session.query.return_value.filter.return_value.first.return_value = None
+    ApiTokenService.invalidate(api_token)
+
+    assert ApiTokenService.get_api_token('dataset-token', 'dataset') is None
+    assert redis_cache == {}
+    assert mock_session.query.call_count == 2
+
+
+def test_unknown_api_token_not_cached(mocker, redis_cache, api_token_cache):
+    mock_session = _mock_session(mocker, None)
+
+    assert ApiTokenService.get_api_token('unknown-token', 'app') is None
+    assert ApiTokenService.get_api_token('unknown-token', 'app') is None
+    assert mock_session.query.call_count == 2
+
+
+def test_flush_last_used_in_one_statement(mocker):
+    pending = {}
+    mock_redis = mocker.patch('services.api_token_service.redis_client')
+    mock_redis.hset.side_effect = lambda name, key, value: pending.setdefault(name, {}) \
+        .__setitem__(key.encode(), str(value).encode())
+    mock_redis.exists.side_effect = lambda name: name in pending
+    mock_redis.hgetall.side_effect = lambda name: pending.get(name, {})
+    mock_redis.delete.side_effect = lambda name: pending.pop(name, None)
+
+    def rename(src, dst):
+        if src not in pending:
+            raise ResponseError('no such key')
+        pending[dst] = pending.pop(src)
+
+    mock_redis.rename.side_effect = rename
+    mock_session = mocker.patch('services.api_token_service.db.session')
+
+    for api_token_id in ('token_1', 'token_2', 'token_1'):
+        ApiTokenService.record_last_used(ApiToken(id=api_token_id))
+    assert len(pending[LAST_USED_PENDING_KEY]) == 2
+
+    assert ApiTokenService.flush_last_used() == 2
+
+    query = mock_session.query.return_value.filter.return_value
+    assert query.update.call_count == 1
+    sql = str(query.update.call_args.args[0]['last_used_at'].compile(dialect=postgresql.dialect()))
+    assert sql.startswith('CASE api_tokens.id')
+    mock_session.commit.assert_called_once()
+    assert LAST_USED_FLUSHING_KEY not in pending
+
+    assert ApiTokenService.flush_last_used() == 0
+
+
+def test_concurrent_flush_last_used_skipped(mocker):
+    mock_redis = mocker.patch('services.api_token_service.redis_client')
+    mock_redis.lock.return_value.acquire.return_value = False
+    mock_session = mocker.patch('services.api_token_service.db.session')
+
+    assert ApiTokenService.flush_last_used() == 0
+
+    mock_redis.lock.assert_called_once_with(FLUSH_LOCK_KEY, timeout=600)
+    mock_redis.rename.assert_not_called()
+    mock_redis.hgetall.assert_not_called()
+    mock_session.query.assert_not_called()
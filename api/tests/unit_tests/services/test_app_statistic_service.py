@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytz
+from flask import Flask
+
+from services.app_statistic_service import AppStatisticService, EPOCH, ROLLUP_WATERMARK_KEY
+
+
+def _mock_watermark(mocker, watermark):
+    mock_redis = mocker.patch('services.app_statistic_service.redis_client')
+    mock_redis.get.return_value = watermark.isoformat().encode('utf-8') if watermark else None
+    return mock_redis
+
+
+def _mock_engine(mocker):
+    mock_db = mocker.patch('services.app_statistic_service.db')
+    mock_db.text.side_effect = lambda sql_query: sql_query
+    conn = mock_db.engine.begin.return_value.__enter__.return_value
+    conn.execute.return_value = []
+    return conn
+
+
+def test_rollup_range_keeps_complete_rolled_up_hours(mocker):
+    _mock_watermark(mocker, datetime(2023, 12, 7, 10))
+
+    assert AppStatisticService.get_rollup_range('America/New_York', datetime(2023, 12, 1, 5, 30),
+                                                datetime(2023, 12, 8, 5)) \
+           == (datetime(2023, 12, 1, 6), datetime(2023, 12, 7, 10))
+    assert AppStatisticService.get_rollup_range('UTC', None, datetime(2023, 12, 6, 23, 59)) \
+           == (EPOCH, datetime(2023, 12, 6, 23))
+
+
+def test_rollup_range_falls_back_to_messages(mocker):
+    _mock_watermark(mocker, None)
+    assert AppStatisticService.get_rollup_range('UTC', None, None) is None
+
+    _mock_watermark(mocker, datetime(2023, 12, 7, 10))
+    # hours split between days in timezones with a fractional offset
+    assert AppStatisticService.get_rollup_range('Asia/Kolkata', datetime(2023, 12, 1), None) is None
+    # no complete hour
+    assert AppStatisticService.get_rollup_range('UTC', datetime(2023, 12, 1, 5, 10),
+                                                datetime(2023, 12, 1, 5, 50)) is None
+
+
+def test_daily_statistics_read_rollups_and_edge_messages(mocker):
+    _mock_watermark(mocker, datetime(2023, 12, 7, 10))
+    conn = _mock_engine(mocker)
+
+    AppStatisticService.get_daily_statistics(
+        app_id='app-1',
+        timezone='America/New_York',
+        start=pytz.utc.localize(datetime(2023, 12, 1, 5, 30)),
+        end=None,
+        table='app_hourly_statistics',
+        columns=['message_count', 'feedback_count'],
+        aggregates='SUM(t.message_count) AS message_count'
+    )
+
+    sql_query, arg_dict = conn.execute.call_args.args
+    assert 'FROM app_hourly_statistics' in sql_query
+    assert 'UNION ALL' in sql_query
+    assert '(messages.created_at < :rollup_start OR messages.created_at >= :rollup_end)' in sql_query
+    assert 'message_feedbacks' in sql_query
+    assert arg_dict == {
+        'tz': 'America/New_York',
+        'app_id': 'app-1',
+        'start': datetime(2023, 12, 1, 5, 30),
+        'rollup_start': datetime(2023, 12, 1, 6),
+        'rollup_end': datetime(2023, 12, 7, 10)
+    }
+
+
+def test_daily_statistics_without_rollups(mocker):
+    _mock_watermark(mocker, None)
+    conn = _mock_engine(mocker)
+
+    AppStatisticService.get_daily_statistics(
+        app_id='app-1',
+        timezone='UTC',
+        start=None,
+        end=None,
+        table='app_hourly_conversations',
+        columns=['conversation_id'],
+        aggregates='COUNT(DISTINCT t.conversation_id) AS conversation_count'
+    )
+
+    sql_query, arg_dict = conn.execute.call_args.args
+    assert 'app_hourly_conversations' not in sql_query
+    assert 'UNION ALL' not in sql_query
+    assert arg_dict == {'tz': 'UTC', 'app_id': 'app-1'}
+
+
+def test_rollup_recomputes_lookback_and_advances_watermark(mocker):
+    mock_redis = _mock_watermark(mocker, datetime(2023, 12, 7, 10))
+    conn = _mock_engine(mocker)
+
+    app = Flask('test')
+    app.config['APP_STATISTIC_ROLLUP_LOOKBACK_HOURS'] = 24
+    with app.app_context():
+        AppStatisticService.rollup(now=datetime(2023, 12, 7, 12, 5))
+
+    assert conn.execute.call_count == 2
+    for call in conn.execute.call_args_list:
+        assert call.args[1] == {'start': datetime(2023, 12, 7, 10) - timedelta(hours=24),
+                                'end': datetime(2023, 12, 7, 12)}
+
+    mock_redis.set.assert_called_once_with(ROLLUP_WATERMARK_KEY, datetime(2023, 12, 7, 12).isoformat())
+
+
+def test_first_rollup_covers_all_messages(mocker):
+    _mock_watermark(mocker, None)
+    conn = _mock_engine(mocker)
+
+    with Flask('test').app_context():
+        AppStatisticService.rollup(now=datetime(2023, 12, 7, 12, 5))
+
+    assert conn.execute.call_args.args[1] == {'start': EPOCH, 'end': datetime(2023, 12, 7, 12)}
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from services.completion_stream_encoder import CompletionStreamEncoder
+
+
+def _data(text: str, mode: str = 'chat') -> dict:
+    return {
+        'task_id': 'task-id',
+        'message_id': 'message-id',
+        'text': text,
+        'mode': mode,
+        'conversation_id': 'conversation-id'
+    }
+
+
+@pytest.mark.parametrize('text', ['Hello', ' "quoted" \\ \n\t', '你好 👋', ''])
+def test_encode_text_event(text):
+    frame = CompletionStreamEncoder().encode_text_event('message', _data(text))
+
+    assert frame.startswith('data: ') and frame.endswith('\n\n')
+    response_data = json.loads(frame[len('data: '):])
+    assert response_data.pop('created_at') > 0
+    assert response_data == {
+        'event': 'message',
+        'task_id': 'task-id',
+        'id': 'message-id',
+        'answer': text,
+        'conversation_id': 'conversation-id'
+    }
+
+
+def test_encode_text_event_without_conversation():
+    encoder = CompletionStreamEncoder()
+    encoder.encode_text_event('message', _data('a', mode='completion'))
+    frame = encoder.encode_text_event('message_replace', _data('b', mode='completion'))
+
+    response_data = json.loads(frame[len('data: '):])
+    assert response_data['event'] == 'message_replace'
+    assert response_data['answer'] == 'b'
+    assert 'conversation_id' not in response_data
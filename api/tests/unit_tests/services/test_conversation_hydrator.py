@@ -0,0 +1,110 @@
+from datetime import datetime
+
+from flask_restful import marshal
+
+from extensions.ext_database import db
+from fields.conversation_fields import conversation_fields, conversation_with_summary_fields
+from models.account import Account
+from models.model import Conversation, Message, MessageFeedback, MessageAnnotation, AppModelConfig, EndUser, App
+from services.conversation_hydrator import ConversationHydrator
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def group_by(self, *args):
+        return self
+
+    def distinct(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def _conversations(count: int):
+    return [Conversation(id=f'conversation-{i}', app_id='app-1', app_model_config_id='config-1',
+                         from_end_user_id='end-user-1', mode='chat', name=f'chat {i}', summary=None,
+                         created_at=datetime(2023, 12, 1)) for i in range(count)]
+
+
+def _mock_session(mocker, conversation_count: int):
+    app_model_config = mocker.MagicMock()
+    app_model_config.id = 'config-1'
+    app_model_config.to_dict.return_value = {'pre_prompt': 'You are a helpful assistant.'}
+
+    def query(*entities):
+        entity = entities[0]
+        if entity is Message.conversation_id:
+            return FakeQuery([(f'conversation-{i}', i + 1) for i in range(conversation_count)])
+        if entity is MessageFeedback.conversation_id:
+            return FakeQuery([('conversation-0', 'user', 'like', 2), ('conversation-0', 'admin', 'dislike', 1)])
+        if entity is Message:
+            return FakeQuery([Message(conversation_id=f'conversation-{i}', query=f'question {i}', answer='answer',
+                                      message=[{'text': f'question {i}'}], inputs={})
+                              for i in range(conversation_count)])
+        if entity is MessageAnnotation:
+            return FakeQuery([MessageAnnotation(conversation_id='conversation-1', account_id='account-1',
+                                                content='annotated', created_at=datetime(2023, 12, 1))])
+        if entity is Account:
+            return FakeQuery([Account(id='account-1', name='Account', email='account@example.com')])
+        if entity is AppModelConfig:
+            return FakeQuery([app_model_config])
+        if entity is EndUser:
+            return FakeQuery([EndUser(id='end-user-1', session_id='session-1')])
+
+        raise AssertionError(f'Unexpected query of {entity}')
+
+    mock_session = mocker.patch.object(db, 'session')
+    mock_session.query.side_effect = query
+    return mock_session
+
+
+def test_hydrated_listing_query_count_does_not_grow_with_page_size(mocker):
+    for page_size in [1, 20, 100]:
+        mock_session = _mock_session(mocker, page_size)
+        conversations = _conversations(page_size)
+
+        ConversationHydrator.hydrate(conversations, App(id='app-1'))
+        marshal(conversations, conversation_fields)
+        marshal(conversations, conversation_with_summary_fields)
+
+        assert mock_session.query.call_count <= 7
+
+
+def test_hydrated_values(mocker):
+    _mock_session(mocker, 3)
+    conversations = _conversations(3)
+    app = App(id='app-1')
+
+    ConversationHydrator.hydrate(conversations, app)
+    data = marshal(conversations, conversation_with_summary_fields)
+
+    assert [item['message_count'] for item in data] == [1, 2, 3]
+    assert [item['summary'] for item in data] == ['question 0', 'question 1', 'question 2']
+    assert [item['annotated'] for item in data] == [False, True, False]
+    assert data[0]['user_feedback_stats'] == {'like': 2, 'dislike': 0}
+    assert data[0]['admin_feedback_stats'] == {'like': 0, 'dislike': 1}
+    assert data[1]['user_feedback_stats'] == {'like': 0, 'dislike': 0}
+    assert data[0]['from_end_user_session_id'] == 'session-1'
+
+    completion_data = marshal(conversations, conversation_fields)
+    assert completion_data[1]['annotation']['account']['email'] == 'account@example.com'
+    assert completion_data[0]['annotation'] is None
+    assert completion_data[2]['message']['query'] == 'question 2'
+    assert conversations[0].app is app
+
+
+def test_hydrate_empty_page(mocker):
+    mock_session = mocker.patch.object(db, 'session')
+
+    ConversationHydrator.hydrate([])
+
+    mock_session.query.assert_not_called()
@@ -0,0 +1,54 @@
+from sqlalchemy.dialects import postgresql
+
+from models.dataset import Dataset
+from services.dataset_counter_service import DatasetCounterService
+
+
+def test_refresh_counters_in_one_statement(mocker):
+    mock_session = mocker.patch('services.dataset_counter_service.db.session')
+
+    DatasetCounterService.refresh_counters('dataset-1')
+
+    query = mock_session.query.return_value.filter.return_value
+    assert query.update.call_count == 1
+    values = query.update.call_args.args[0]
+    assert set(values) == {Dataset._app_count, Dataset._document_count, Dataset._available_document_count,
+                           Dataset._available_segment_count, Dataset._word_count}
+
+    # each counter is a subquery correlated to the updated dataset
+    for value in values.values():
+        sql = str(value.compile(dialect=postgresql.dialect()))
+        assert '.dataset_id = datasets.id' in sql
+        assert 'FROM datasets' not in sql
+
+    filter_args = mock_session.query.return_value.filter.call_args.args
+    assert filter_args[0].right.value == ['dataset-1']
+    mock_session.commit.assert_called_once()
+
+
+def test_refresh_without_datasets(mocker):
+    mock_session = mocker.patch('services.dataset_counter_service.db.session')
+
+    DatasetCounterService.refresh_counters([])
+
+    mock_session.query.assert_not_called()
+
+
+def test_counters_read_from_columns(mocker):
+    mock_session = mocker.patch('models.dataset.db.session')
+    dataset = Dataset(id='dataset-1', _app_count=2, _document_count=3, _available_document_count=1,
+                      _available_segment_count=0, _word_count=1024)
+
+    assert (dataset.app_count, dataset.document_count, dataset.available_document_count,
+            dataset.available_segment_count, dataset.word_count) == (2, 3, 1, 0, 1024)
+    mock_session.query.assert_not_called()
+
+
+def test_counters_fall_back_to_query_before_reconciled(mocker):
+    mock_session = mocker.patch('models.dataset.db.session')
+    mock_session.query.return_value.filter.return_value.scalar.return_value = 5
+    dataset = Dataset(id='dataset-1')
+
+    assert dataset.document_count == 5
+    assert dataset.available_segment_count == 5
+    assert mock_session.query.call_count == 2
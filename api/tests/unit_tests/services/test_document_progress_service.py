@@ -0,0 +1,66 @@
+from flask import Flask
+
+from models.dataset import Document
+from services.document_progress_service import DocumentProgressService
+
+
+def _mock_redis(mocker, cache: dict):
+    mock_redis = mocker.patch('services.document_progress_service.redis_client')
+    mock_redis.mget.side_effect = lambda keys: [cache.get(key) for key in keys]
+    pipeline = mock_redis.pipeline.return_value
+    pipeline.setex.side_effect = lambda key, ttl, value: cache.__setitem__(key, value.encode('utf-8'))
+    return mock_redis
+
+
+def _mock_session(mocker, rows):
+    mock_session = mocker.patch('services.document_progress_service.db.session')
+    mock_session.query.return_value.filter.return_value.group_by.return_value.all.return_value = rows
+    return mock_session
+
+
+def test_batch_progress_in_one_query(mocker):
+    cache = {}
+    _mock_redis(mocker, cache)
+    mock_session = _mock_session(mocker, [('document-0', 3, 5), ('document-2', 0, 1)])
+    documents = [Document(id=f'document-{i}') for i in range(3)]
+
+    with Flask('test').app_context():
+        DocumentProgressService.attach_progress(documents)
+
+    assert [(document.completed_segments, document.total_segments) for document in documents] \
+           == [(3, 5), (0, 0), (0, 1)]
+    assert mock_session.query.call_count == 1
+    assert cache['document_segment_progress:document-1'] == b'0:0'
+
+
+def test_cached_progress_skips_query(mocker):
+    cache = {
+        'document_segment_progress:document-0': b'4:5',
+        'document_segment_progress:document-1': b'1:1',
+    }
+    _mock_redis(mocker, cache)
+    mock_session = _mock_session(mocker, [('document-2', 2, 8)])
+
+    with Flask('test').app_context():
+        progress = DocumentProgressService.get_progress(['document-0', 'document-1'])
+        assert progress == {'document-0': (4, 5), 'document-1': (1, 1)}
+        mock_session.query.assert_not_called()
+
+        # only the missing documents are counted
+        progress = DocumentProgressService.get_progress(['document-0', 'document-2'])
+
+    assert progress == {'document-0': (4, 5), 'document-2': (2, 8)}
+    filter_args = mock_session.query.return_value.filter.call_args.args
+    assert filter_args[0].right.value == ['document-2']
+
+
+def test_redis_failure_falls_back_to_query(mocker):
+    mock_redis = mocker.patch('services.document_progress_service.redis_client')
+    mock_redis.mget.side_effect = ConnectionError()
+    mock_redis.pipeline.side_effect = ConnectionError()
+    _mock_session(mocker, [('document-0', 1, 2)])
+
+    with Flask('test').app_context():
+        progress = DocumentProgressService.get_progress(['document-0'])
+
+    assert progress == {'document-0': (1, 2)}
@@ -0,0 +1,87 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.errors.completion import CompletionQueueFullError
+from services.generation_executor import TimerWheel, GenerationExecutor
+
+
+class ManualTimerWheel(TimerWheel):
+    """Timer wheel advanced by the test instead of its thread."""
+
+    def schedule(self, delay, callback):
+        self._thread = threading.current_thread()
+        return super().schedule(delay, callback)
+
+
+def test_timer_wheel_fires_after_delay():
+    timer_wheel = ManualTimerWheel(tick=1, slots=4)
+    fired = []
+    timer_wheel.schedule(2, lambda: fired.append('short'))
+    timer_wheel.schedule(6, lambda: fired.append('long'))
+    timer_wheel.schedule(3, lambda: fired.append('cancelled')).cancel()
+
+    for _ in range(2):
+        timer_wheel.advance()
+    assert fired == ['short']
+
+    for _ in range(4):
+        timer_wheel.advance()
+    assert fired == ['short', 'long']
+
+
+def test_executor_pings_until_done(mocker):
+    mock_pub_handler = mocker.patch('services.generation_executor.PubHandler')
+    timer_wheel = ManualTimerWheel(tick=1, slots=8)
+    executor = GenerationExecutor(max_workers=1, max_queue_size=1, timeout=5, ping_interval=1,
+                                  timer_wheel=timer_wheel)
+    release = threading.Event()
+
+    future = executor.submit(lambda generate_task_id: release.wait(5), user='user', generate_task_id='task',
+                             subscription=MagicMock())
+    timer_wheel.advance()
+    timer_wheel.advance()
+    assert mock_pub_handler.ping.call_count == 2
+
+    release.set()
+    future.result(timeout=5)
+    timer_wheel.advance()
+    assert mock_pub_handler.ping.call_count == 2
+    mock_pub_handler.stop.assert_not_called()
+    assert executor.stats() == {'max_workers': 1, 'running': 0, 'queued': 0, 'rejected': 0}
+
+
+def test_executor_rejects_when_queue_is_full_and_stops_on_timeout(mocker):
+    mock_pub_handler = mocker.patch('services.generation_executor.PubHandler')
+    timer_wheel = ManualTimerWheel(tick=1, slots=8)
+    executor = GenerationExecutor(max_workers=1, max_queue_size=1, timeout=2, ping_interval=10,
+                                  timer_wheel=timer_wheel)
+    release = threading.Event()
+    started = threading.Event()
+
+    def worker(generate_task_id):
+        started.set()
+        release.wait(5)
+
+    executor.submit(worker, user='user', generate_task_id='running', subscription=MagicMock())
+    started.wait(5)
+    queued_subscription = MagicMock()
+    queued = executor.submit(worker, user='user', generate_task_id='queued', subscription=queued_subscription)
+
+    rejected_subscription = MagicMock()
+    with pytest.raises(CompletionQueueFullError):
+        executor.submit(worker, user='user', generate_task_id='rejected', subscription=rejected_subscription)
+    rejected_subscription.close.assert_called_once()
+    assert executor.stats() == {'max_workers': 1, 'running': 1, 'queued': 1, 'rejected': 1}
+
+    timer_wheel.advance()
+    timer_wheel.advance()
+    # both generations time out, the queued one is cancelled before it starts
+    assert sorted(call.args[1] for call in mock_pub_handler.stop.call_args_list) == ['queued', 'running']
+    assert queued.cancelled()
+    queued_subscription.close.assert_called_once()
+
+    release.set()
+    executor._executor.shutdown(wait=True)
+    assert executor.stats()['queued'] == 0
@@ -0,0 +1,63 @@
+import threading
+
+from flask import Flask
+
+from services.retrieval_executor import RetrievalExecutor
+
+
+def test_run_collects_results_and_skips_failures():
+    executor = RetrievalExecutor(max_workers=4, db_concurrency=2)
+
+    def failing_task():
+        raise ValueError('search failed')
+
+    with Flask('test').app_context():
+        results = executor.run([lambda: ['a'], failing_task, lambda: ['b']], timeout=5)
+
+    assert sorted(results) == [['a'], ['b']]
+
+
+def test_run_cuts_off_slow_tasks():
+    executor = RetrievalExecutor(max_workers=1, db_concurrency=1)
+    release = threading.Event()
+    started = []
+
+    def slow_task():
+        release.wait(5)
+        return 'slow'
+
+    def pending_task():
+        started.append(True)
+        return 'pending'
+
+    with Flask('test').app_context():
+        results = executor.run([slow_task, pending_task], timeout=0.1)
+
+    release.set()
+    executor._executor.shutdown(wait=True)
+
+    assert results == []
+    # the task queued behind the slow one is cancelled instead of run
+    assert started == []
+
+
+def test_run_limits_db_concurrency():
+    executor = RetrievalExecutor(max_workers=4, db_concurrency=1)
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def task():
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        threading.Event().wait(0.01)
+        with lock:
+            running[0] -= 1
+        return True
+
+    with Flask('test').app_context():
+        results = executor.run([task for _ in range(4)], timeout=5)
+
+    assert results == [True, True, True, True]
+    assert max_running[0] == 1
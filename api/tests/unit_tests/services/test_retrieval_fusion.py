@@ -0,0 +1,71 @@
+import pytest
+from langchain.schema import Document
+
+from services.retrieval_fusion import RetrievalFusion
+
+
+def _documents(*hits):
+    return [Document(page_content=doc_id, metadata={'doc_id': doc_id, 'score': score}) for doc_id, score in hits]
+
+
+def test_reciprocal_rank_fusion_merges_and_dedupes():
+    results = {
+        'semantic_search': _documents(('a', 0.9), ('b', 0.8), ('c', 0.7)),
+        'full_text_search': _documents(('c', None), ('a', None), ('c', None)),
+    }
+
+    documents = RetrievalFusion('reciprocal_rank_fusion').fuse(results, score_threshold=None, top_k=10)
+
+    assert [document.metadata['doc_id'] for document in documents] == ['a', 'c', 'b']
+    assert all(0 < document.metadata['score'] <= 1 for document in documents)
+
+
+def test_reciprocal_rank_fusion_top_k():
+    results = {
+        'semantic_search': _documents(('a', 0.9), ('b', 0.8)),
+        'full_text_search': _documents(('b', None), ('c', None)),
+    }
+
+    documents = RetrievalFusion('reciprocal_rank_fusion').fuse(results, score_threshold=None, top_k=1)
+
+    assert [document.metadata['doc_id'] for document in documents] == ['b']
+    assert documents[0].metadata['score'] == pytest.approx((1 / 62 + 1 / 61) / (2 / 61))
+
+
+def test_weighted_score_fusion():
+    results = {
+        'semantic_search': _documents(('a', 0.9), ('b', 0.5), ('c', 0.1)),
+        'full_text_search': _documents(('c', None), ('b', None)),
+    }
+
+    documents = RetrievalFusion('weighted_score', semantic_weight=0.8).fuse(results, score_threshold=0.3, top_k=10)
+
+    # a: 0.8 * 1, b: 0.8 * 0.5 + 0.2 * 0.5, c: 0.8 * 0 + 0.2 * 1
+    assert [document.metadata['doc_id'] for document in documents] == ['a', 'b']
+    assert [document.metadata['score'] for document in documents] == pytest.approx([0.8, 0.5])
+
+
+def test_from_retrieval_model():
+    fusion = RetrievalFusion.from_retrieval_model({'search_method': 'hybrid_search'})
+    assert fusion.method == 'reciprocal_rank_fusion'
+
+    with pytest.raises(ValueError):
+        RetrievalFusion.from_retrieval_model({'fusion_method': 'unknown'})
+
+    with pytest.raises(ValueError):
+        RetrievalFusion.from_retrieval_model({'fusion_method': 'weighted_score', 'semantic_weight': 2})
+
+    fusion = RetrievalFusion.from_retrieval_model({'fusion_method': 'weighted_score', 'semantic_weight': None})
+    assert fusion.weights['semantic_search'] == 0.5
+
+    fusion = RetrievalFusion.from_retrieval_model({'fusion_method': 'weighted_score', 'semantic_weight': 0})
+    assert fusion.weights['full_text_search'] == 1
+
+
+def test_retrieval_model_args_validate():
+    RetrievalFusion.retrieval_model_args_validate({'search_method': 'hybrid_search', 'semantic_weight': None})
+    RetrievalFusion.retrieval_model_args_validate({'fusion_method': 'weighted_score', 'semantic_weight': 0.7})
+
+    for retrieval_model in ({'fusion_method': 'unknown'}, {'semantic_weight': 1.5}, {'semantic_weight': 'high'}):
+        with pytest.raises(ValueError):
+            RetrievalFusion.retrieval_model_args_validate(retrieval_model)
@@ -0,0 +1,64 @@
+from langchain.schema import Document
+
+from models.dataset import Dataset
+from services.retrieval_service import RetrievalService
+
+
+def _retrieval_model(**kwargs) -> dict:
+    retrieval_model = {
+        'search_method': 'hybrid_search',
+        'reranking_enable': False,
+        'reranking_model': {
+            'reranking_provider_name': 'cohere',
+            'reranking_model_name': 'rerank-english-v2.0'
+        },
+        'top_k': 2,
+        'score_threshold_enabled': False
+    }
+    retrieval_model.update(kwargs)
+    return retrieval_model
+
+
+def _retrieve(mocker, retrieval_model: dict):
+    results = {
+        'semantic_search': [Document(page_content='a', metadata={'doc_id': 'a', 'score': 0.9})],
+        'full_text_search': [Document(page_content='b', metadata={'doc_id': 'b', 'score': 0.5})]
+    }
+    mocker.patch.object(RetrievalService, 'search_tasks',
+                        return_value={search_method: (lambda documents=documents: documents)
+                                      for search_method, documents in results.items()})
+    mocker.patch('services.retrieval_service.get_retrieval_executor').return_value.run.side_effect = \
+        lambda tasks: [task() for task in tasks]
+    mock_get_reranking_model = mocker.patch('services.retrieval_service.ModelFactory.get_reranking_model')
+    mock_get_reranking_model.return_value.rerank.side_effect = \
+        lambda query, documents, score_threshold, top_k: list(reversed(documents))[:top_k]
+
+    documents = RetrievalService.retrieve(Dataset(id='dataset_id', tenant_id='tenant_id'), 'query',
+                                          retrieval_model, top_k=2, embeddings=mocker.MagicMock())
+    return [document.page_content for document in documents], mock_get_reranking_model
+
+
+def test_hybrid_search_reranked_with_configured_model(mocker):
+    # hybrid configs stored by the web app have reranking disabled but a rerank model configured
+    documents, mock_get_reranking_model = _retrieve(mocker, _retrieval_model())
+
+    assert documents == ['b', 'a']
+    mock_get_reranking_model.assert_called_once_with(tenant_id='tenant_id', model_provider_name='cohere',
+                                                     model_name='rerank-english-v2.0')
+
+
+def test_hybrid_search_fused_with_fusion_method(mocker):
+    documents, mock_get_reranking_model = _retrieve(mocker, _retrieval_model(fusion_method='weighted_score',
+                                                                            semantic_weight=0.7))
+
+    assert documents == ['a', 'b']
+    mock_get_reranking_model.assert_not_called()
+
+
+def test_hybrid_search_fused_without_rerank_model(mocker):
+    documents, mock_get_reranking_model = _retrieve(mocker, _retrieval_model(reranking_model={
+        'reranking_provider_name': '', 'reranking_model_name': ''
+    }))
+
+    assert documents == ['a', 'b']
+    mock_get_reranking_model.assert_not_called()
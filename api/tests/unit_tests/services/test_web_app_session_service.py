@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import inspect
+
+from models.model import App, EndUser, Site
+from services.web_app_session_service import WebAppSessionService, WebAppSessionCache
+
+
+@pytest.fixture
+def versions(mocker):
+    versions = {}
+    mock_redis = mocker.patch('services.web_app_session_service.redis_client')
+    mock_redis.get.side_effect = lambda key: versions.get(key)
+    mock_redis.incr.side_effect = lambda key: versions.__setitem__(key, str(int(versions.get(key, 0)) + 1).encode())
+    return mock_redis
+
+
+@pytest.fixture
+def web_app_session_cache(mocker):
+    web_app_session_cache = WebAppSessionCache(max_size=10, ttl=60)
+    mocker.patch('services.web_app_session_service.get_web_app_session_cache', return_value=web_app_session_cache)
+    return web_app_session_cache
+
+
+def _mock_session(mocker, rows: dict):
+    mock_session = mocker.patch('services.web_app_session_service.db.session')
+
+    def query(model):
+        mock_query = MagicMock()
+        mock_query.filter.return_value.first.side_effect = lambda: rows.get(model)
+        return mock_query
+
+    mock_session.query.side_effect = query
+    return mock_session
+
+
+def _rows() -> dict:
+    return {
+        App: App(id='app_id', tenant_id='tenant_id', name='app', mode='chat', enable_site=True),
+        Site: Site(id='site_id', app_id='app_id', title='site', code='app_code'),
+        EndUser: EndUser(id='end_user_id', app_id='app_id', type='browser', session_id='session_id'),
+    }
+
+
+def test_session_resolved_once(mocker, versions, web_app_session_cache):
+    mock_session = _mock_session(mocker, _rows())
+
+    WebAppSessionService.resolve('app_id', 'app_code', 'end_user_id')
+    app_model, site, end_user = WebAppSessionService.resolve('app_id', 'app_code', 'end_user_id')
+    other_app_model, _, _ = WebAppSessionService.resolve('app_id', 'app_code', 'end_user_id')
+
+    assert mock_session.query.call_count == 3
+    assert web_app_session_cache.stats()['hits'] == 2
+    assert (app_model.name, app_model.enable_site, site.code, end_user.session_id) \
+           == ('app', True, 'app_code', 'session_id')
+
+    # each request gets its own detached instances
+    assert inspect(app_model).detached and inspect(end_user).detached
+    assert other_app_model is not app_model
+
+
+def test_edited_app_resolved_again(mocker, versions, web_app_session_cache):
+    rows = _rows()
+    mock_session = _mock_session(mocker, rows)
+    WebAppSessionService.resolve('app_id', 'app_code', 'end_user_id')
+
+    rows[App] = App(id='app_id', tenant_id='tenant_id', name='app', mode='chat', enable_site=False)
+    WebAppSessionService.invalidate('app_id')
+
+    app_model, _, _ = WebAppSessionService.resolve('app_id', 'app_code', 'end_user_id')
+    assert app_model.enable_site is False
+    assert mock_session.query.call_count == 6
+
+
+def test_incomplete_session_not_cached(mocker, versions, web_app_session_cache):
+    rows = _rows()
+    del rows[Site]
+    mock_session = _mock_session(mocker, rows)
+
+    assert WebAppSessionService.resolve('app_id', 'reset_code', 'end_user_id')[1] is None
+    assert WebAppSessionService.resolve('app_id', 'reset_code', 'end_user_id')[1] is None
+    assert mock_session.query.call_count == 6
+
+
+def test_no_cache_without_version(mocker, versions, web_app_session_cache):
+    versions.get.side_effect = Exception('redis unavailable')
+    mock_session = _mock_session(mocker, _rows())
+
+    WebAppSessionService.resolve('app_id', 'app_code', 'end_user_id')
+    WebAppSessionService.resolve('app_id', 'app_code', 'end_user_id')
+
+    assert mock_session.query.call_count == 6
+    assert web_app_session_cache.stats()['size'] == 0
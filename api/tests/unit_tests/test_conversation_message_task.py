@@ -0,0 +1,150 @@
+import json
+import threading
+from typing import Optional
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from core import generation_transport
+from core.conversation_message_task import PubHandler, ConversationTaskStoppedException
+from core.timer_wheel import TimerWheel
+from models.model import Account
+
+
+class ManualTimerWheel(TimerWheel):
+    """Timer wheel advanced by the test instead of its thread."""
+
+    def schedule(self, delay, callback):
+        self._thread = threading.current_thread()
+        return super().schedule(delay, callback)
+
+
+def _pub_handler(timer_wheel: Optional[TimerWheel] = None, **config) -> PubHandler:
+    app = Flask('test')
+    app.config.update(config)
+    with app.app_context():
+        return PubHandler(
+            user=Account(id='account-id'),
+            task_id='task-id',
+            message=MagicMock(id='message-id'),
+            conversation=MagicMock(id='conversation-id', mode='chat'),
+            timer_wheel=timer_wheel or ManualTimerWheel(tick=1, slots=4)
+        )
+
+
+@pytest.fixture
+def mock_redis(mocker):
+    mock_redis = mocker.patch('core.conversation_message_task.redis_client')
+    mocker.patch('core.generation_transport.redis_client', mock_redis)
+    mock_redis.get.return_value = None
+    return mock_redis
+
+
+def _published(mock_redis) -> list[dict]:
+    return [json.loads(call.args[1]) for call in mock_redis.publish.call_args_list]
+
+
+def test_pub_text_coalesces_tokens(mock_redis):
+    pub_handler = _pub_handler(STREAM_TEXT_FLUSH_INTERVAL_MS=60000, STREAM_TEXT_FLUSH_SIZE=8,
+                               STREAM_STOP_CHECK_INTERVAL_MS=60000)
+
+    for token in ['Hel', 'lo', ', ', 'wor', 'ld', '!']:
+        pub_handler.pub_text(token)
+    pub_handler.pub_message_end([])
+    pub_handler.pub_end()
+
+    events = _published(mock_redis)
+    texts = [event['data']['text'] for event in events if event['event'] == 'message']
+    # the first token is flushed right away, then tokens go out once 8 chars are buffered
+    assert texts == ['Hel', 'lo, world', '!']
+    assert ''.join(texts) == 'Hello, world!'
+    assert [event['event'] for event in events] == ['message', 'message', 'message', 'message_end', 'end']
+    assert pub_handler.stats == {'texts': 6, 'publishes': 5, 'stop_checks': 2}
+
+
+def test_pub_text_flushed_on_timer(mock_redis):
+    timer_wheel = ManualTimerWheel(tick=1, slots=4)
+    pub_handler = _pub_handler(timer_wheel, STREAM_TEXT_FLUSH_INTERVAL_MS=2000, STREAM_TEXT_FLUSH_SIZE=64,
+                               STREAM_STOP_CHECK_INTERVAL_MS=60000)
+
+    for token in ['Hel', 'lo', ', ']:
+        pub_handler.pub_text(token)
+
+    # the tail of the buffer goes out once the flush interval passes without another token
+    timer_wheel.advance()
+    assert [event['data']['text'] for event in _published(mock_redis)] == ['Hel']
+    timer_wheel.advance()
+    assert [event['data']['text'] for event in _published(mock_redis)] == ['Hel', 'lo, ']
+
+    # the timer of a buffer flushed by another event does not fire
+    pub_handler.pub_text('world')
+    pub_handler.pub_end()
+    for _ in range(4):
+        timer_wheel.advance()
+    assert [event['event'] for event in _published(mock_redis)] == ['message', 'message', 'message', 'end']
+
+
+def test_pub_error_flushes_buffered_text(mock_redis):
+    pub_handler = _pub_handler(STREAM_TEXT_FLUSH_INTERVAL_MS=60000, STREAM_TEXT_FLUSH_SIZE=64)
+
+    for token in ['Hel', 'lo']:
+        pub_handler.pub_text(token)
+    PubHandler.pub_error(Account(id='account-id'), 'task-id', ValueError('model failed'))
+
+    assert _published(mock_redis) == [
+        {'event': 'message', 'data': {'task_id': 'task-id', 'message_id': 'message-id', 'text': 'Hel',
+                                      'mode': 'chat', 'conversation_id': 'conversation-id'}},
+        {'event': 'message', 'data': {'task_id': 'task-id', 'message_id': 'message-id', 'text': 'lo',
+                                      'mode': 'chat', 'conversation_id': 'conversation-id'}},
+        {'error': 'ValueError', 'description': 'model failed'}
+    ]
+
+
+def test_pub_text_without_coalescing(mock_redis):
+    pub_handler = _pub_handler(STREAM_TEXT_FLUSH_SIZE=1)
+
+    for token in ['a', 'b', 'c']:
+        pub_handler.pub_text(token)
+
+    assert [event['data']['text'] for event in _published(mock_redis)] == ['a', 'b', 'c']
+
+
+def test_pub_text_stopped(mock_redis):
+    mock_redis.get.return_value = b'1'
+    pub_handler = _pub_handler(STREAM_TEXT_FLUSH_INTERVAL_MS=60000, STREAM_TEXT_FLUSH_SIZE=64)
+
+    with pytest.raises(ConversationTaskStoppedException):
+        pub_handler.pub_text('token')
+
+    assert [event['event'] for event in _published(mock_redis)] == ['message', 'end']
+
+
+def test_local_transport_skips_redis(mock_redis):
+    app = Flask('test')
+    user = Account(id='account-id')
+    with app.app_context():
+        subscription = generation_transport.subscribe(PubHandler.generate_channel_name(user, 'task-id'))
+    pub_handler = _pub_handler(STREAM_TEXT_FLUSH_SIZE=1)
+
+    try:
+        pub_handler.pub_text('Hi')
+        pub_handler.pub_end()
+
+        events = subscription.listen()
+        assert next(events)['data']['text'] == 'Hi'
+        assert next(events) == {'event': 'end'}
+        mock_redis.publish.assert_not_called()
+
+        # a stop in this process is seen without asking redis
+        PubHandler.stop(user, 'task-id')
+        mock_redis.get.reset_mock()
+        with pytest.raises(ConversationTaskStoppedException):
+            pub_handler.pub_text('!')
+        mock_redis.get.assert_not_called()
+    finally:
+        subscription.unsubscribe()
+
+    # without a local subscription events go to redis
+    pub_handler.pub_end()
+    assert _published(mock_redis) == [{'event': 'end'}]
@@ -0,0 +1,140 @@
+import json
+import threading
+
+import pytest
+from flask import Flask
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from core.indexing_runner import IndexingRunner, DocumentIsPausedException
+from models.dataset import Dataset, DatasetProcessRule
+from models.dataset import Document as DatasetDocument
+
+
+@pytest.fixture
+def streaming_pipeline(mocker):
+    """Mock the stores of the streaming pipeline, recording the order of loads, segment writes and index writes."""
+    events = []
+
+    def lazy_load(upload_file, is_automatic=False):
+        for i in range(5):
+            events.append('load')
+            yield Document(page_content=f'text {i}')
+
+    mocker.patch('core.indexing_runner.FileExtractor.lazy_load', side_effect=lazy_load)
+    mocker.patch('core.indexing_runner.db.session')
+    mocker.patch('core.indexing_runner.DocumentProgressService')
+    mock_doc_store = mocker.patch('core.indexing_runner.DatesetDocumentStore').return_value
+    mock_doc_store.add_documents.side_effect = lambda documents: events.append(('prepare', len(documents)))
+
+    mock_keyword_table_index = mocker.MagicMock()
+    mock_keyword_table_index.add_texts.side_effect = lambda documents: events.append(('index', len(documents)))
+    mocker.patch('core.indexing_runner.IndexBuilder.get_index',
+                 side_effect=lambda dataset, technique: mock_keyword_table_index if technique == 'economy' else None)
+    mock_update_status = mocker.patch.object(IndexingRunner, '_update_document_index_status')
+    mock_redis = mocker.patch('core.indexing_runner.redis_client')
+    mock_redis.get.return_value = None
+
+    return events, mock_update_status, mock_redis
+
+
+def _index_lazily():
+    app = Flask('test')
+    app.config.update(INDEXING_EMBEDDING_MAX_WORKERS=1, INDEXING_EMBEDDING_BATCH_SIZE=2)
+    with app.app_context():
+        IndexingRunner()._step_split_and_build_index_lazily(
+            splitter=RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=0),
+            dataset=Dataset(id='dataset_id', tenant_id='tenant_id', indexing_technique='economy'),
+            dataset_document=DatasetDocument(id='document_id', dataset_id='dataset_id', created_by='account_id',
+                                             data_source_type='upload_file', doc_form='text_model',
+                                             data_source_info=json.dumps({'upload_file_id': 'upload_file_id'})),
+            processing_rule=DatasetProcessRule(mode='automatic')
+        )
+
+
+def test_index_lazily_in_chunks(streaming_pipeline):
+    events, mock_update_status, _ = streaming_pipeline
+
+    _index_lazily()
+
+    # one chunk is embedded ahead of the chunk being written, the rest of the file is not loaded yet
+    assert events == ['load', 'load', ('prepare', 2),
+                      'load', 'load', ('prepare', 2), ('index', 2),
+                      'load', ('prepare', 1), ('index', 2),
+                      ('index', 1)]
+
+    statuses = [call.kwargs['after_indexing_status'] for call in mock_update_status.call_args_list]
+    assert statuses == ['indexing', 'completed']
+    completed_params = {column.key: value
+                        for column, value in mock_update_status.call_args.kwargs['extra_update_params'].items()}
+    assert completed_params['word_count'] == len('text 0') * 5
+
+
+def test_index_lazily_stops_when_paused(streaming_pipeline):
+    events, mock_update_status, mock_redis = streaming_pipeline
+    mock_redis.get.side_effect = [None, b'1']
+
+    with pytest.raises(DocumentIsPausedException):
+        _index_lazily()
+
+    # the paused document is neither loaded nor indexed further
+    assert events == ['load', 'load', ('prepare', 2),
+                      'load', 'load', ('prepare', 2), ('index', 2)]
+    statuses = [call.kwargs['after_indexing_status'] for call in mock_update_status.call_args_list]
+    assert statuses == ['indexing']
+
+
+def _embedding_model(mocker, provider_name: str = 'openai'):
+    embedding_model = mocker.MagicMock()
+    embedding_model.model_provider.provider_name = provider_name
+    embedding_model.get_num_tokens.side_effect = lambda text: len(text)
+    return embedding_model
+
+
+def test_indexing_concurrency_per_provider(mocker):
+    app = Flask('test')
+    app.config.update(INDEXING_EMBEDDING_MAX_WORKERS=4, INDEXING_EMBEDDING_BATCH_SIZE=100,
+                      INDEXING_EMBEDDING_PROVIDER_SETTINGS='openai:x:200, broken, openai:8:0,xinference:2:32')
+    with app.app_context():
+        # invalid entries are skipped, the chunk size is at least 1
+        assert IndexingRunner()._get_indexing_concurrency(_embedding_model(mocker)) == (8, 1)
+        assert IndexingRunner()._get_indexing_concurrency(_embedding_model(mocker, 'xinference')) == (2, 32)
+        assert IndexingRunner()._get_indexing_concurrency(_embedding_model(mocker, 'cohere')) == (4, 100)
+        assert IndexingRunner()._get_indexing_concurrency(None) == (4, 100)
+
+
+def test_chunks_embedded_ahead_in_worker_pool(mocker):
+    events = []
+    embedding_model = _embedding_model(mocker)
+    mocker.patch('core.indexing_runner.ModelFactory.get_embedding_model', return_value=embedding_model)
+    mock_cache_embedding = mocker.patch('core.indexing_runner.CacheEmbedding')
+    mock_cache_embedding.return_value.embed_documents.side_effect = \
+        lambda texts: events.append(('embed', texts, threading.current_thread() is not main_thread))
+    mock_vector_index = mocker.MagicMock()
+    mock_vector_index.add_texts.side_effect = lambda documents: events.append(('write', len(documents)))
+    mocker.patch('core.indexing_runner.IndexBuilder.get_index',
+                 side_effect=lambda dataset, technique: mock_vector_index if technique == 'high_quality'
+                 else mocker.MagicMock())
+    mocker.patch('core.indexing_runner.db.session')
+    mocker.patch('core.indexing_runner.DocumentProgressService')
+    mocker.patch('core.indexing_runner.redis_client').get.return_value = None
+    main_thread = threading.current_thread()
+
+    documents = [Document(page_content=f'text {i}', metadata={'doc_id': f'node-{i}'}) for i in range(5)]
+    app = Flask('test')
+    app.config.update(INDEXING_EMBEDDING_MAX_WORKERS=2, INDEXING_EMBEDDING_BATCH_SIZE=2)
+    with app.app_context():
+        tokens = IndexingRunner()._index_documents(
+            dataset=Dataset(id='dataset_id', tenant_id='tenant_id', indexing_technique='high_quality'),
+            dataset_document=DatasetDocument(id='document_id'),
+            documents=iter(documents)
+        )
+
+    assert tokens == len('text 0') * 5
+    # every chunk is embedded in the pool once, and written in order after its embedding
+    embeds = [event for event in events if event[0] == 'embed']
+    assert sorted(texts for _, texts, _ in embeds) == [['text 0', 'text 1'], ['text 2', 'text 3'], ['text 4']]
+    assert all(in_worker for _, _, in_worker in embeds)
+    writes = [event for event in events if event[0] == 'write']
+    assert writes == [('write', 2), ('write', 2), ('write', 1)]
+    assert events.index(embeds[0]) < events.index(writes[0])